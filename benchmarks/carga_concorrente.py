@@ -0,0 +1,282 @@
+# =====================================
+# benchmarks/carga_concorrente.py – Teste de carga com sessões simultâneas
+# Zetta Inteligência em Dados
+# =====================================
+#
+# Sobe o painel com `streamlit run` numa porta local e abre N sessões pelo
+# mesmo websocket que o navegador usa (/_stcore/stream), todas no mesmo
+# processo do servidor, como em produção: compartilham o cache_resource da
+# base e o cache de figuras. Cada sessão abre a seção IQE e troca de
+# município e de visão ao acaso; a latência de um rerun vai do envio do
+# rerun_script até o script_finished do servidor.
+#
+# Para cada N informado: latência p50/p95/p99, reruns por segundo e o pico de
+# memória (RSS) do servidor.
+#
+#   python benchmarks/carga_concorrente.py --sessoes 1 5 10 25 --passos 20 --saida carga.json
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from tornado.websocket import websocket_connect
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+from painel_iqe.carga import ENV_DIR_DADOS  # noqa: E402
+
+SECAO_IQE = "📊 IQE"
+ROTULO_SECAO = "Escolha a seção:"
+ROTULO_MUNICIPIO = "Selecione o município:"
+ROTULO_MODO = "Modo de exibição:"
+ROTULO_VISAO = "Visão:"
+MODOS = {"ativa": "Somente a aba ativa (mais rápido)", "todas": "Todas as abas"}
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def iniciar_servidor(porta, dir_dados=None, timeout=60):
+    env = dict(os.environ)
+    if dir_dados:
+        env[ENV_DIR_DADOS] = dir_dados
+    processo = subprocess.Popen(
+        [
+            sys.executable, "-m", "streamlit", "run", os.path.join(RAIZ, "app.py"),
+            "--server.headless", "true", "--server.port", str(porta),
+            "--browser.gatherUsageStats", "false",
+        ],
+        cwd=RAIZ, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError(f"O servidor Streamlit terminou com código {processo.returncode}.")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{porta}/_stcore/health", timeout=1) as r:
+                if r.read().strip() == b"ok":
+                    return processo
+        except OSError:
+            time.sleep(0.2)
+    processo.terminate()
+    raise TimeoutError(f"O servidor Streamlit não respondeu em {timeout} s.")
+
+
+def rss_mb(pid):
+    """(RSS atual, pico de RSS) do processo em MB, lidos de /proc (None fora do Linux)."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            campos = dict(linha.split(":", 1) for linha in f if ":" in linha)
+    except OSError:
+        return None, None
+    kb = lambda campo: int(campos[campo].split()[0]) if campo in campos else None  # noqa: E731
+    atual, pico = kb("VmRSS"), kb("VmHWM")
+    return (atual / 1024 if atual else None), (pico / 1024 if pico else None)
+
+
+class Sessao:
+    """Uma sessão do navegador: guarda os widgets recebidos e os valores escolhidos."""
+
+    def __init__(self, url, timeout):
+        self.url = url
+        self.timeout = timeout
+        self.widgets = {}
+        self.estados = {}
+        self.ws = None
+
+    async def conectar(self):
+        self.ws = await websocket_connect(self.url)
+
+    def fechar(self):
+        if self.ws is not None:
+            self.ws.close()
+
+    async def rerun(self):
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        for wid, valor in self.estados.items():
+            estado = msg.rerun_script.widget_states.widgets.add()
+            estado.id = wid
+            estado.int_value = valor
+
+        inicio = time.perf_counter()
+        await self.ws.write_message(msg.SerializeToString(), binary=True)
+        while True:
+            dados = await asyncio.wait_for(self.ws.read_message(), self.timeout)
+            if dados is None:
+                raise ConnectionError("O servidor fechou o websocket.")
+            fmsg = ForwardMsg()
+            fmsg.ParseFromString(dados)
+            tipo = fmsg.WhichOneof("type")
+            if tipo == "delta" and fmsg.delta.WhichOneof("type") == "new_element":
+                self._guardar_widget(fmsg.delta.new_element)
+            elif tipo == "script_finished":
+                if fmsg.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise RuntimeError("Erro de compilação no app.py.")
+                return time.perf_counter() - inicio
+
+    def _guardar_widget(self, elemento):
+        tipo = elemento.WhichOneof("type")
+        if tipo in ("selectbox", "radio"):
+            widget = getattr(elemento, tipo)
+            self.widgets[widget.label] = (widget.id, list(widget.options))
+
+    def opcoes(self, rotulo):
+        return self.widgets[rotulo][1]
+
+    def escolher(self, rotulo, opcao):
+        wid, opcoes = self.widgets[rotulo]
+        self.estados[wid] = opcoes.index(opcao)
+
+
+async def simular_sessao(url, passos, modo, rng, pausa, timeout):
+    """Latências dos reruns de uma sessão (a abertura da seção IQE não entra na conta)."""
+    sessao = Sessao(url, timeout)
+    await sessao.conectar()
+    try:
+        await sessao.rerun()
+        sessao.escolher(ROTULO_SECAO, SECAO_IQE)
+        await sessao.rerun()
+        sessao.escolher(ROTULO_MODO, MODOS[modo])
+        await sessao.rerun()
+
+        latencias = []
+        for _ in range(passos):
+            if pausa:
+                await asyncio.sleep(rng.uniform(0, 2 * pausa))
+            sessao.escolher(ROTULO_MUNICIPIO, rng.choice(sessao.opcoes(ROTULO_MUNICIPIO)))
+            if ROTULO_VISAO in sessao.widgets:
+                sessao.escolher(ROTULO_VISAO, rng.choice(sessao.opcoes(ROTULO_VISAO)))
+            latencias.append(await sessao.rerun())
+        return latencias
+    finally:
+        sessao.fechar()
+
+
+async def _monitorar_rss(pid, picos, intervalo=0.1):
+    while True:
+        atual, _ = rss_mb(pid)
+        if atual is not None:
+            picos.append(atual)
+        await asyncio.sleep(intervalo)
+
+
+async def rodada(url, n_sessoes, passos, modo, semente, pausa, timeout, pid=None):
+    amostras_rss = []
+    monitor = asyncio.ensure_future(_monitorar_rss(pid, amostras_rss)) if pid else None
+    inicio = time.perf_counter()
+    try:
+        resultados = await asyncio.gather(*(
+            simular_sessao(url, passos, modo, random.Random(semente * 1_000_003 + i), pausa, timeout)
+            for i in range(n_sessoes)
+        ), return_exceptions=True)
+    finally:
+        duracao = time.perf_counter() - inicio
+        if monitor is not None:
+            monitor.cancel()
+
+    erros = [repr(r) for r in resultados if isinstance(r, BaseException)]
+    latencias = np.array([t for r in resultados if not isinstance(r, BaseException) for t in r])
+    resumo = {
+        "sessoes": n_sessoes,
+        "reruns": int(latencias.size),
+        "erros": erros,
+        "duracao_s": duracao,
+        "reruns_por_s": latencias.size / duracao if duracao > 0 else 0.0,
+    }
+    if latencias.size:
+        p50, p95, p99 = np.percentile(latencias, [50, 95, 99])
+        resumo.update({"p50_s": p50, "p95_s": p95, "p99_s": p99, "max_s": float(latencias.max())})
+    if pid:
+        _, pico_processo = rss_mb(pid)
+        resumo["rss_pico_mb"] = max(amostras_rss, default=None)
+        resumo["rss_pico_processo_mb"] = pico_processo
+    return resumo
+
+
+async def executar(args):
+    processo = None
+    url, pid = args.url, args.pid
+    if url is None:
+        porta = porta_livre()
+        processo = iniciar_servidor(porta, args.dir_dados)
+        url, pid = f"ws://127.0.0.1:{porta}/_stcore/stream", processo.pid
+    try:
+        # Uma sessão antes das medições, para a carga da base não cair no primeiro nível
+        await simular_sessao(url, 1, args.modo, random.Random(args.semente), 0, args.timeout)
+        rss_inicial, _ = rss_mb(pid) if pid else (None, None)
+        niveis = []
+        for n in args.sessoes:
+            resumo = await rodada(url, n, args.passos, args.modo, args.semente, args.pausa, args.timeout, pid)
+            niveis.append(resumo)
+            linha = f"{n:>4} sessões: {resumo['reruns']} reruns, {resumo['reruns_por_s']:.1f}/s"
+            if resumo["reruns"]:
+                linha += (
+                    f", p50 {resumo['p50_s'] * 1000:.0f} ms, p95 {resumo['p95_s'] * 1000:.0f} ms, "
+                    f"p99 {resumo['p99_s'] * 1000:.0f} ms"
+                )
+            if resumo.get("rss_pico_mb"):
+                linha += f", RSS pico {resumo['rss_pico_mb']:.0f} MB"
+            if resumo["erros"]:
+                linha += f", {len(resumo['erros'])} erro(s)"
+            print(linha, file=sys.stderr)
+    finally:
+        if processo is not None:
+            processo.terminate()
+            processo.wait(timeout=30)
+
+    return {
+        "url": url,
+        "modo": args.modo,
+        "passos_por_sessao": args.passos,
+        "pausa_s": args.pausa,
+        "cpus": os.cpu_count(),
+        "rss_inicial_mb": rss_inicial,
+        "niveis": niveis,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do Painel IQE com N sessões simultâneas.")
+    parser.add_argument("--sessoes", type=int, nargs="+", default=[1, 5, 10, 25],
+                        help="números de sessões simultâneas, um nível por valor")
+    parser.add_argument("--passos", type=int, default=20, help="reruns medidos por sessão")
+    parser.add_argument("--modo", choices=list(MODOS), default="ativa",
+                        help="ativa: troca de visão a cada passo; todas: todas as abas a cada rerun")
+    parser.add_argument("--pausa", type=float, default=0.0,
+                        help="pausa média (s) entre as interações de uma sessão; 0 = sem pausa")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120.0, help="limite (s) para um rerun")
+    parser.add_argument("--dir-dados", default=None, help="planilhas do servidor (ex.: as de sinteticos.py)")
+    parser.add_argument("--url", default=None, help="websocket de um servidor já em execução (não sobe outro)")
+    parser.add_argument("--pid", type=int, default=None, help="PID desse servidor, para medir o RSS")
+    parser.add_argument("--saida", help="arquivo JSON para gravar o resultado")
+    args = parser.parse_args()
+
+    resultado = asyncio.run(executar(args))
+    texto = json.dumps(resultado, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    print(texto)
+    return 1 if any(n["erros"] for n in resultado["niveis"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
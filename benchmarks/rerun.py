@@ -0,0 +1,100 @@
+# =====================================
+# benchmarks/rerun.py – Latência de rerun do painel (Streamlit AppTest)
+# Zetta Inteligência em Dados
+# =====================================
+#
+# Mede o tempo de um rerun completo ao trocar de município, no modo
+# "Todas as abas" e no modo "Somente a aba ativa" (para cada visão).
+#
+#   python benchmarks/rerun.py --repeticoes 10 --saida rerun.json
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)  # o `streamlit run` faz o mesmo com a pasta do app.py
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+SECAO_IQE = "📊 IQE"
+CHAVE_MODO = "modo_exibicao_iqe"
+CHAVE_VISAO = "visao_iqe"
+
+
+def abrir_app(timeout=300):
+    at = AppTest.from_file(os.path.join(RAIZ, "app.py"), default_timeout=timeout)
+    at.run()
+    at.sidebar.radio[0].set_value(SECAO_IQE).run()
+    _verificar(at)
+    return at
+
+
+def _verificar(at):
+    if at.exception:
+        raise RuntimeError("; ".join(e.message for e in at.exception))
+
+
+def resumir(tempos):
+    tempos = sorted(tempos)
+    return {
+        "n": len(tempos),
+        "mediana_s": statistics.median(tempos),
+        "p95_s": tempos[min(len(tempos) - 1, int(round(0.95 * (len(tempos) - 1))))],
+        "min_s": tempos[0],
+        "max_s": tempos[-1],
+    }
+
+
+def medir_troca_municipio(at, repeticoes):
+    municipios = at.sidebar.selectbox[0].options
+    tempos = []
+    for i in range(repeticoes):
+        municipio = municipios[i % len(municipios)]
+        inicio = time.perf_counter()
+        at.sidebar.selectbox[0].set_value(municipio).run()
+        tempos.append(time.perf_counter() - inicio)
+        _verificar(at)
+    return resumir(tempos)
+
+
+def medir_reruns(repeticoes=10):
+    at = abrir_app()
+    modos = at.radio(key=CHAVE_MODO).options
+    resultado = {}
+
+    for modo in modos:
+        at.radio(key=CHAVE_MODO).set_value(modo).run()
+        _verificar(at)
+        visoes = [r for r in at.main.radio if r.key == CHAVE_VISAO]
+        if not visoes:
+            resultado[modo] = medir_troca_municipio(at, repeticoes)
+            continue
+        resultado[modo] = {}
+        for visao in visoes[0].options:
+            at.radio(key=CHAVE_VISAO).set_value(visao).run()
+            _verificar(at)
+            resultado[modo][visao] = medir_troca_municipio(at, repeticoes)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latência de rerun do Painel IQE por modo de exibição.")
+    parser.add_argument("--repeticoes", type=int, default=10)
+    parser.add_argument("--saida", help="arquivo JSON para gravar o resultado")
+    args = parser.parse_args()
+
+    resultado = medir_reruns(args.repeticoes)
+    texto = json.dumps(resultado, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    print(texto)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# =====================================
+# benchmarks/sinteticos.py – Planilhas sintéticas no layout da SEDU
+# Zetta Inteligência em Dados
+# =====================================
+#
+# Gera as "Memória de cálculo IQE AAAA.xlsx" (aba RESUMO) e a planilha de ICMS
+# (aba cal) com N municípios (ou escolas), para medir o painel em escala.
+# O cabeçalho vem das planilhas reais de data/, o que garante o layout que o
+# esquema valida. As linhas são reamostradas das reais com um ruído pequeno
+# nos números, com nomes e códigos sintéticos. Os blocos que a SEDU grava
+# deslocados (esquema.DESLOCAMENTOS_RESUMO) saem deslocados do mesmo jeito.
+#
+#   python benchmarks/sinteticos.py --municipios 10000 --destino /tmp/iqe_10k
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+from painel_iqe.carga import descobrir_arquivos, dir_dados_padrao, ler_icms  # noqa: E402
+from painel_iqe.esquema import LINHAS_CABECALHO_RESUMO, deslocamentos_resumo  # noqa: E402
+
+RUIDO_RELATIVO = 0.02
+
+
+def _numero(v):
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def _ler_resumo_bruto(caminho):
+    import openpyxl
+
+    wb = openpyxl.load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        linhas = [list(linha) for linha in wb["RESUMO"].iter_rows(values_only=True)]
+    finally:
+        wb.close()
+    largura = max(len(linha) for linha in linhas)
+    return [linha + [None] * (largura - len(linha)) for linha in linhas]
+
+
+def _colunas_deslocadas(edicao, largura):
+    """{coluna: deslocamento em linhas} dos blocos deslocados da edição."""
+    return {
+        c: linhas
+        for primeira, ultima, linhas in deslocamentos_resumo(edicao)
+        for c in range(primeira, min(ultima, largura - 1) + 1)
+    }
+
+
+def _alinhar(linhas, edicao):
+    """Linhas de dados com os blocos deslocados já trazidos para a linha do município."""
+    h = LINHAS_CABECALHO_RESUMO
+    deslocadas = _colunas_deslocadas(edicao, len(linhas[0]))
+    dados = []
+    for i in range(h, len(linhas)):
+        if linhas[i][1] is None:
+            continue
+        linha = list(linhas[i])
+        for c, d in deslocadas.items():
+            linha[c] = linhas[i + d][c]
+        dados.append(linha)
+    return dados
+
+
+def _reamostrar(dados, n, rng):
+    escolhidas = rng.integers(0, len(dados), n)
+    ruido = rng.normal(0.0, RUIDO_RELATIVO, (n, len(dados[0])))
+    saida = []
+    for i, (j, r) in enumerate(zip(escolhidas, ruido)):
+        linha = [v * (1 + e) if _numero(v) else v for v, e in zip(dados[j], r)]
+        linha[0] = 3200000 + i + 1
+        linha[1] = f"MUNICIPIO {i + 1:05d}"
+        saida.append(linha)
+    return saida
+
+
+def _gravar_resumo(caminho, cabecalho, dados, edicao):
+    import openpyxl
+
+    h = len(cabecalho)
+    largura = len(cabecalho[0])
+    deslocadas = _colunas_deslocadas(edicao, largura)
+    sobra = max([0] + list(deslocadas.values()))
+    linhas = [list(linha) for linha in cabecalho] + [list(linha) for linha in dados]
+    linhas += [[None] * largura for _ in range(sobra)]
+    # Nos blocos deslocados o valor do município da linha i fica na linha i + d
+    for c, d in deslocadas.items():
+        for i in range(h, len(linhas)):
+            linhas[i][c] = None
+        for k, linha in enumerate(dados):
+            linhas[h + k + d][c] = linha[c]
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("RESUMO")
+    for linha in linhas:
+        ws.append(linha)
+    wb.save(caminho)
+
+
+def _gravar_icms(caminho, original, nomes, rng):
+    import openpyxl
+    import pandas as pd
+
+    cal = pd.read_excel(original, sheet_name="cal")
+    colunas = [c for c in cal.columns if c != "NomeMunicipio"]
+    valores = cal[colunas].apply(pd.to_numeric, errors="coerce").dropna().to_numpy()
+    escolhidas = valores[rng.integers(0, len(valores), len(nomes))]
+    escolhidas = escolhidas * (1 + rng.normal(0.0, RUIDO_RELATIVO, escolhidas.shape))
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("cal")
+    ws.append(["NomeMunicipio"] + colunas)
+    for nome, linha in zip(nomes, escolhidas):
+        ws.append([nome] + [float(v) for v in linha])
+    wb.save(caminho)
+
+
+def gerar_planilhas(destino, n_municipios, dir_modelo=None, semente=0):
+    """Grava as planilhas sintéticas em `destino` (se ainda não existirem) e devolve a pasta."""
+    dir_modelo = dir_modelo or dir_dados_padrao()
+    edicoes, arquivos_icms = descobrir_arquivos(dir_modelo)
+    if not edicoes:
+        raise FileNotFoundError(f"Sem planilhas modelo em {dir_modelo}.")
+
+    os.makedirs(destino, exist_ok=True)
+    pronto = os.path.join(destino, ".completo")
+    if os.path.exists(pronto):
+        return destino
+
+    rng = np.random.default_rng(semente)
+    nomes = [f"MUNICIPIO {i + 1:05d}" for i in range(n_municipios)]
+    for edicao, caminho in sorted(edicoes.items()):
+        linhas = _ler_resumo_bruto(caminho)
+        cabecalho = linhas[:LINHAS_CABECALHO_RESUMO]
+        dados = _reamostrar(_alinhar(linhas, edicao), n_municipios, rng)
+        _gravar_resumo(os.path.join(destino, os.path.basename(caminho)), cabecalho, dados, edicao)
+    for caminho in arquivos_icms:
+        ler_icms(caminho)  # valida o layout do modelo antes de copiá-lo
+        _gravar_icms(os.path.join(destino, os.path.basename(caminho)), caminho, nomes, rng)
+
+    open(pronto, "w").close()
+    return destino
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera planilhas sintéticas do IQE com N municípios.")
+    parser.add_argument("--municipios", type=int, default=1000)
+    parser.add_argument("--destino", required=True)
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args()
+    print(gerar_planilhas(args.destino, args.municipios, semente=args.semente))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+# =====================================
+# benchmarks/suite.py – Benchmarks de carga, diagnóstico e renderização
+# Zetta Inteligência em Dados
+# =====================================
+#
+# Mede os caminhos críticos do painel com planilhas sintéticas (sinteticos.py)
+# de vários tamanhos: leitura do RESUMO, carga da base (sem e com cache em
+# disco), índice de ranking, diagnóstico, normalizações do radar, figuras de
+# cada aba, formatação pt-BR de todos os valores da base (por coluna e, como
+# referência, valor a valor) e o rerun completo do app.py pelo AppTest. O
+# resultado vai para um JSON; com --baseline, as medianas são comparadas com
+# as de um JSON anterior e o script sai com código 1 se alguma piorar mais
+# que o limiar.
+#
+#   python benchmarks/suite.py --tamanhos 78 1000 10000 --saida bench.json
+#   python benchmarks/suite.py --saida atual.json --baseline bench.json --limiar 0.25
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+from painel_iqe import graficos  # noqa: E402
+from painel_iqe.base_indexada import BaseIndexada  # noqa: E402
+from painel_iqe.carga import (  # noqa: E402
+    ENV_DIR_DADOS, ano_referencia_edicao, carregar_base, descobrir_arquivos, ler_resumo_iqe,
+)
+from painel_iqe.diagnostico import DiagnosticoIndicadores  # noqa: E402
+from painel_iqe.formatacao import fmt_br_money_col, fmt_br_num, fmt_br_num_col  # noqa: E402
+from painel_iqe.indicadores import indicadores_diagnostico  # noqa: E402
+from painel_iqe.normalizacao import IndicadoresNormalizados  # noqa: E402
+from painel_iqe.ranking import IndiceRanking  # noqa: E402
+
+from rerun import abrir_app, medir_troca_municipio, resumir  # noqa: E402
+from sinteticos import gerar_planilhas  # noqa: E402
+
+TAMANHOS_PADRAO = (78, 1000, 10000)
+LIMIAR_PADRAO = 0.25
+
+# Figuras construídas por cada aba da seção IQE (sem o cache de figuras)
+FIGURAS_ABA = {
+    "resumo": lambda d, m, a: [graficos.grafico_faixa_icms(d, m, ano) for ano in d.anos],
+    "decomposicao": lambda d, m, a: [graficos.grafico_decomposicao(d, m)],
+    "iqef_imeg": lambda d, m, a: [graficos.grafico_radar(d, m, a, modo) for modo in graficos.MODOS_RADAR],
+    "diagnostico": lambda d, m, a: [graficos.grafico_ranking_subindicadores(d, m, a)],
+    "evolucao": lambda d, m, a: [graficos.grafico_evolucao_iqe(d, m), graficos.grafico_desv(d, m)],
+    "ranking": lambda d, m, a: [graficos.grafico_ranking_iqe(d, m, a)],
+}
+
+
+def medir(funcao, repeticoes, aquecer=True):
+    if aquecer:
+        funcao()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return resumir(tempos)
+
+
+def _carga_fria(dir_dados):
+    with tempfile.TemporaryDirectory() as dir_cache:
+        base, versao = carregar_base(dir_dados, dir_cache)
+        return BaseIndexada(base, versao)
+
+
+def medir_tamanho(dir_dados, repeticoes, com_apptest, repeticoes_apptest):
+    resultado = {}
+    edicoes, _ = descobrir_arquivos(dir_dados)
+    edicao, caminho = max(edicoes.items())
+    resultado["ler_resumo_iqe"] = medir(
+        lambda: ler_resumo_iqe(caminho, ano_referencia_edicao(edicao), edicao), repeticoes, aquecer=False
+    )
+    resultado["carregar_dados_sem_cache"] = medir(lambda: _carga_fria(dir_dados), repeticoes, aquecer=False)
+
+    with tempfile.TemporaryDirectory() as dir_cache:
+        def carga_com_cache():
+            base, versao = carregar_base(dir_dados, dir_cache)
+            return BaseIndexada(base, versao)
+
+        dados = carga_com_cache()
+        resultado["carregar_dados_com_cache"] = medir(carga_com_cache, repeticoes, aquecer=False)
+
+    resultado["ranking_indicadores"] = medir(lambda: IndiceRanking(dados.base, dados.indicadores), repeticoes)
+    indicadores = indicadores_diagnostico(dados.indicadores)
+    resultado["diagnostico_indicadores"] = medir(
+        lambda: DiagnosticoIndicadores(dados.base, dados.ranking, indicadores), repeticoes
+    )
+
+    resultado["indicadores_normalizados"] = medir(
+        lambda: IndicadoresNormalizados(dados.cubo, dados.presentes), repeticoes
+    )
+
+    municipio, ano = dados.municipios[0], dados.ano_atual
+    for aba, figuras in FIGURAS_ABA.items():
+        resultado[f"figuras/{aba}"] = medir(lambda: figuras(dados, municipio, ano), repeticoes)
+
+    # Uma linha por valor de indicador (municípios x anos x indicadores; ~76 mil com 1000 municípios)
+    valores = pd.Series(dados.base[dados.indicadores].to_numpy(dtype=float).ravel())
+    resultado["formatacao/fmt_br_num_col"] = medir(lambda: fmt_br_num_col(valores, 3), repeticoes)
+    resultado["formatacao/fmt_br_money_col"] = medir(lambda: fmt_br_money_col(valores, 2), repeticoes)
+    resultado["formatacao/fmt_br_num_por_valor"] = medir(
+        lambda: valores.apply(lambda x: fmt_br_num(x, 3)), repeticoes
+    )
+
+    if com_apptest:
+        resultado.update(medir_apptest(dir_dados, repeticoes_apptest))
+    return resultado
+
+
+def medir_apptest(dir_dados, repeticoes):
+    import streamlit as st
+
+    anterior = os.environ.get(ENV_DIR_DADOS)
+    os.environ[ENV_DIR_DADOS] = dir_dados
+    st.cache_resource.clear()  # a base de outro tamanho ficaria no cache do processo
+    try:
+        inicio = time.perf_counter()
+        at = abrir_app()
+        resultado = {"apptest_primeira_execucao": resumir([time.perf_counter() - inicio])}
+        resultado["apptest_rerun_aba_ativa"] = medir_troca_municipio(at, repeticoes)
+        at.radio(key="modo_exibicao_iqe").set_value("Todas as abas").run()
+        resultado["apptest_rerun_todas_abas"] = medir_troca_municipio(at, repeticoes)
+    finally:
+        st.cache_resource.clear()
+        if anterior is None:
+            os.environ.pop(ENV_DIR_DADOS, None)
+        else:
+            os.environ[ENV_DIR_DADOS] = anterior
+    return resultado
+
+
+def comparar(atual, baseline, limiar):
+    """[(medida, mediana da baseline, mediana atual, variação relativa, regrediu)] das medidas em comum."""
+    linhas = []
+    for chave, medida in atual["resultados"].items():
+        referencia = baseline.get("resultados", {}).get(chave)
+        if not referencia or referencia["mediana_s"] <= 0:
+            continue
+        variacao = medida["mediana_s"] / referencia["mediana_s"] - 1
+        linhas.append((chave, referencia["mediana_s"], medida["mediana_s"], variacao, variacao > limiar))
+    return linhas
+
+
+def executar(tamanhos, repeticoes, dir_sinteticos, com_apptest, max_apptest, repeticoes_apptest, semente=0):
+    resultados = {}
+    for n in tamanhos:
+        inicio = time.perf_counter()
+        dir_dados = gerar_planilhas(os.path.join(dir_sinteticos, f"{n}_s{semente}"), n, semente=semente)
+        print(f"[{n}] planilhas sintéticas em {time.perf_counter() - inicio:.1f} s ({dir_dados})", file=sys.stderr)
+        medidas = medir_tamanho(dir_dados, repeticoes, com_apptest and n <= max_apptest, repeticoes_apptest)
+        for nome, medida in medidas.items():
+            resultados[f"{n}/{nome}"] = medida
+            print(f"[{n}] {nome}: mediana {medida['mediana_s'] * 1000:.1f} ms", file=sys.stderr)
+
+    import numpy
+    import pandas
+    import plotly
+    import streamlit
+
+    return {
+        "data": datetime.datetime.now().isoformat(timespec="seconds"),
+        "ambiente": {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+            "pandas": pandas.__version__,
+            "numpy": numpy.__version__,
+            "plotly": plotly.__version__,
+            "streamlit": streamlit.__version__,
+        },
+        "parametros": {"tamanhos": list(tamanhos), "repeticoes": repeticoes, "semente": semente},
+        "resultados": resultados,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de carga, diagnóstico e renderização do Painel IQE.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=list(TAMANHOS_PADRAO),
+                        help="números de municípios das planilhas sintéticas")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--saida", help="arquivo JSON para gravar o resultado")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparar as medianas")
+    parser.add_argument("--limiar", type=float, default=LIMIAR_PADRAO,
+                        help="piora relativa da mediana que conta como regressão (padrão: 0.25)")
+    parser.add_argument("--dir-sinteticos", default=os.path.join(tempfile.gettempdir(), "painel_iqe_bench"),
+                        help="onde guardar as planilhas sintéticas (reaproveitadas entre execuções)")
+    parser.add_argument("--sem-apptest", action="store_true", help="não mede o rerun pelo AppTest")
+    parser.add_argument("--max-apptest", type=int, default=1000,
+                        help="maior tamanho em que o rerun pelo AppTest é medido (padrão: 1000)")
+    parser.add_argument("--repeticoes-apptest", type=int, default=5)
+    args = parser.parse_args()
+
+    resultado = executar(
+        args.tamanhos, args.repeticoes, args.dir_sinteticos,
+        not args.sem_apptest, args.max_apptest, args.repeticoes_apptest,
+    )
+
+    regressoes = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        comparacao = comparar(resultado, baseline, args.limiar)
+        resultado["comparacao"] = {
+            "baseline": args.baseline,
+            "limiar": args.limiar,
+            "medidas": [
+                {"medida": c, "baseline_s": b, "atual_s": a, "variacao": v, "regressao": r}
+                for c, b, a, v, r in comparacao
+            ],
+        }
+        regressoes = [c for c in comparacao if c[4]]
+
+    texto = json.dumps(resultado, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    print(texto)
+
+    for chave, b, a, v, _ in regressoes:
+        print(f"REGRESSÃO {chave}: {b * 1000:.1f} ms -> {a * 1000:.1f} ms ({v:+.0%})", file=sys.stderr)
+    return 1 if regressoes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+# =====================================
+# painel_iqe – Núcleo de dados do Painel IQE
+# Zetta Inteligência em Dados
+# =====================================
@@ -0,0 +1,151 @@
+# =====================================
+# painel_iqe/base_indexada.py – Base IQE indexada por ano × município × indicador
+# Zetta Inteligência em Dados
+# =====================================
+#
+# Os valores numéricos ficam num cubo NumPy denso (ano × município × indicador)
+# com mapas nome -> posição, o que torna "valor do indicador X do município M no
+# ano Y" uma consulta O(1). A base tabular fica ordenada por ano e município, de
+# modo que o recorte de um ano é uma fatia contígua (visão, sem cópia).
+# O objeto é compartilhado entre sessões e deve ser tratado como somente leitura.
+#
+# Montada a partir de uma versão `anterior` (recarga de uma planilha alterada),
+# reaproveita os rankings, o diagnóstico e os simuladores dos anos cujas linhas
+# não mudaram; só os anos alterados são recalculados.
+
+import hashlib
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from painel_iqe.diagnostico import DiagnosticoIndicadores
+from painel_iqe.indicadores import indicadores_diagnostico
+from painel_iqe.municipios import dimensao_municipios
+from painel_iqe.normalizacao import IndicadoresNormalizados
+from painel_iqe.ranking import IndiceRanking
+from painel_iqe.simulacao import SimuladorICMS
+
+COLUNAS_NAO_INDICADORES = ["Código Município", "Ano-Referência", "Município"]
+
+
+class BaseIndexada:
+    def __init__(self, base, versao=None, anterior=None):
+        self.versao = versao
+        # A base do cache já vem ordenada e mapeada em memória: nesse caso é usada sem cópia
+        chave = ["Ano-Referência", "Município"]
+        if not pd.MultiIndex.from_frame(base[chave]).is_monotonic_increasing:
+            base = base.sort_values(chave, kind="stable")
+        if not base.index.equals(pd.RangeIndex(len(base))):
+            base = base.reset_index(drop=True)
+        self.base = base
+
+        self.anos = sorted(int(a) for a in self.base["Ano-Referência"].dropna().unique())
+        self.municipios = sorted(self.base["Município"].astype(str).unique())
+        # Uma linha por código IBGE (nome da edição mais recente)
+        self.dim = dimensao_municipios(self.base)
+        self.indicadores = [
+            c for c in self.base.columns
+            if c not in COLUNAS_NAO_INDICADORES and pd.api.types.is_numeric_dtype(self.base[c])
+        ]
+
+        # Edição atual e a anterior (a mesma quando só há uma edição)
+        self.ano_atual = self.anos[-1] if self.anos else None
+        self.ano_anterior = self.anos[-2] if len(self.anos) >= 2 else self.ano_atual
+
+        self.pos_ano = {a: i for i, a in enumerate(self.anos)}
+        self.pos_municipio = {m: i for i, m in enumerate(self.municipios)}
+        self.pos_indicador = {c: i for i, c in enumerate(self.indicadores)}
+
+        idx_ano = self.base["Ano-Referência"].map(self.pos_ano).to_numpy()
+        idx_mun = self.base["Município"].map(self.pos_municipio).to_numpy()
+        self.cubo = np.full((len(self.anos), len(self.municipios), len(self.indicadores)), np.nan)
+        self.cubo[idx_ano, idx_mun, :] = self.base[self.indicadores].to_numpy(dtype=float)
+
+        self._presentes = set(zip(self.base["Ano-Referência"], self.base["Município"]))
+        self.presentes = np.zeros((len(self.anos), len(self.municipios)), dtype=bool)
+        self.presentes[idx_ano, idx_mun] = True
+        limites = np.searchsorted(idx_ano, np.arange(len(self.anos) + 1))
+        self._fatias = {a: (limites[i], limites[i + 1]) for i, a in enumerate(self.anos)}
+
+        self.assinaturas = {
+            a: hashlib.blake2b(
+                pd.util.hash_pandas_object(self.ano(a), index=False).to_numpy().tobytes(), digest_size=16
+            ).hexdigest()
+            for a in self.anos
+        }
+        self.anos_reaproveitados = self._anos_iguais(anterior)
+
+        self.ranking = IndiceRanking(
+            self.base, self.indicadores,
+            anterior=anterior.ranking if anterior else None, anos_reaproveitados=self.anos_reaproveitados,
+        )
+        self.diagnostico = DiagnosticoIndicadores(
+            self.base, self.ranking, indicadores_diagnostico(self.indicadores),
+            anterior=anterior.diagnostico if anterior else None, anos_reaproveitados=self.anos_reaproveitados,
+        )
+        self.normalizados = IndicadoresNormalizados(self.cubo, self.presentes)
+        self.simuladores = {
+            a: anterior.simuladores[a] if a in self.anos_reaproveitados else SimuladorICMS(self, a)
+            for a in self.anos
+        }
+
+    def _anos_iguais(self, anterior):
+        """Anos com exatamente as mesmas linhas (e colunas) na versão anterior."""
+        if anterior is None or list(anterior.base.columns) != list(self.base.columns):
+            return []
+        return [a for a in self.anos if anterior.assinaturas.get(a) == self.assinaturas[a]]
+
+    def ano(self, ano):
+        """Linhas de um ano (fatia da base ordenada, sem cópia)."""
+        inicio, fim = self._fatias.get(ano, (0, 0))
+        return self.base.iloc[inicio:fim]
+
+    def tem_municipio(self, ano, municipio):
+        return (ano, municipio) in self._presentes
+
+    def valor(self, indicador, municipio, ano, default=np.nan):
+        try:
+            v = self.cubo[self.pos_ano[ano], self.pos_municipio[municipio], self.pos_indicador[indicador]]
+        except KeyError:
+            return default
+        return float(v) if np.isfinite(v) else default
+
+    def serie(self, indicador, ano):
+        """Valores de todos os municípios (na ordem de self.municipios) em um ano."""
+        return self.cubo[self.pos_ano[ano], :, self.pos_indicador[indicador]]
+
+    def historico(self, indicador, municipio):
+        """Valores do município em cada ano de self.anos."""
+        return self.cubo[:, self.pos_municipio[municipio], self.pos_indicador[indicador]]
+
+    def normalizado(self, normalizacao, municipio, ano, indicadores):
+        """(valores do município, média estadual) dos indicadores na normalização pedida (normalizacao.py)."""
+        posicoes = [self.pos_indicador[c] for c in indicadores]
+        i_ano = self.pos_ano[ano]
+        return (
+            self.normalizados.linha(normalizacao, i_ano, self.pos_municipio[municipio], posicoes),
+            self.normalizados.media(normalizacao, i_ano, posicoes),
+        )
+
+    def estatisticas(self, indicador, ano):
+        if indicador not in self.pos_indicador or ano not in self.pos_ano:
+            return {"media": np.nan, "minimo": np.nan, "maximo": np.nan}
+        valores = self.serie(indicador, ano)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return {
+                "media": float(np.nanmean(valores)),
+                "minimo": float(np.nanmin(valores)),
+                "maximo": float(np.nanmax(valores)),
+            }
+
+    def estatisticas_por_ano(self, indicador):
+        """Média, mínimo e máximo estaduais do indicador em cada ano com dados."""
+        linhas = [
+            {"Ano-Referência": a, "Média": e["media"], "Mín": e["minimo"], "Máx": e["maximo"]}
+            for a in self.anos
+            for e in [self.estatisticas(indicador, a)]
+            if np.isfinite(e["media"])
+        ]
+        return pd.DataFrame(linhas, columns=["Ano-Referência", "Média", "Mín", "Máx"])
@@ -0,0 +1,206 @@
+# =====================================
+# painel_iqe/cache.py – Cache persistente da base IQE
+# Zetta Inteligência em Dados
+# =====================================
+#
+# A leitura das planilhas via openpyxl domina o tempo de abertura do painel.
+# A base já consolidada é gravada como arquivo Arrow IPC sem compressão e
+# reaproveitada enquanto as planilhas de origem não mudarem: a chave do cache
+# combina tamanho, data de modificação e hash SHA-256 de cada arquivo.
+#
+# O cache é compartilhado entre processos (réplicas do servidor, reinícios,
+# workers dos relatórios): quem chega primeiro monta a base sob uma trava de
+# arquivo (trava_cache) e os demais esperam e leem o arquivo pronto. A leitura
+# é por mmap, então as colunas numéricas apontam para o page cache do sistema
+# e a mesma cópia física serve a todos os processos do host. Para réplicas em
+# pastas diferentes, aponte PAINEL_IQE_CACHE_DIR para um diretório comum.
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ENV_DIR_CACHE = "PAINEL_IQE_CACHE_DIR"
+PREFIXO_BASE = "base-"
+PREFIXO_PARTE = "parte-"
+EXTENSAO = ".arrow"
+ARQUIVO_TRAVA = ".trava"
+
+
+def dir_cache_padrao():
+    """Diretório do cache: variável PAINEL_IQE_CACHE_DIR ou .cache/ na raiz do projeto."""
+    dir_env = os.environ.get(ENV_DIR_CACHE)
+    if dir_env:
+        return dir_env
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(raiz, ".cache", "painel_iqe")
+
+
+def impressao_digital(caminho, tamanho_bloco=1 << 20):
+    info = os.stat(caminho)
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            h.update(bloco)
+    return {
+        "arquivo": os.path.basename(caminho),
+        "tamanho": info.st_size,
+        "mtime_ns": info.st_mtime_ns,
+        "sha256": h.hexdigest(),
+    }
+
+
+def chave_impressoes(impressoes, versao_carga):
+    """Chave única para um conjunto de impressões digitais + versão do código de carga."""
+    dados = {
+        "versao_carga": versao_carga,
+        "arquivos": sorted(impressoes, key=lambda i: i["arquivo"]),
+    }
+    texto = json.dumps(dados, sort_keys=True, ensure_ascii=True)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()[:24]
+
+
+def chave_cache(caminhos, versao_carga):
+    """Chave única para o conjunto de planilhas + versão do código de carga."""
+    return chave_impressoes([impressao_digital(c) for c in caminhos], versao_carga)
+
+
+def _caminho(nome, dir_cache):
+    return os.path.join(dir_cache, f"{nome}{EXTENSAO}")
+
+
+@contextmanager
+def trava_cache(dir_cache=None):
+    """Trava exclusiva entre processos no diretório do cache (sem fcntl ou sem escrita, não trava)."""
+    dir_cache = dir_cache or dir_cache_padrao()
+    if fcntl is None:
+        yield
+        return
+    try:
+        os.makedirs(dir_cache, exist_ok=True)
+        arquivo = open(os.path.join(dir_cache, ARQUIVO_TRAVA), "a")
+    except OSError:
+        logger.warning("Não foi possível criar a trava do cache em %s.", dir_cache, exc_info=True)
+        yield
+        return
+    with arquivo:
+        fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(arquivo.fileno(), fcntl.LOCK_UN)
+
+
+def _tabela_arrow(base):
+    import pyarrow as pa
+
+    # from_pandas=False mantém o NaN como valor (sem máscara de nulos), o que
+    # permite ler as colunas numéricas direto do mmap, sem cópia
+    return pa.table({
+        col: pa.array(base[col].to_numpy(), from_pandas=False) if base[col].dtype.kind in "fiub" else pa.array(base[col])
+        for col in base.columns
+    })
+
+
+def ler_cache_tabela(nome, dir_cache=None):
+    """Tabela gravada com esse nome, ou None se não houver entrada válida.
+
+    As colunas numéricas são visões somente leitura do arquivo mapeado em memória.
+    """
+    import pyarrow as pa
+
+    caminho = _caminho(nome, dir_cache or dir_cache_padrao())
+    if not os.path.exists(caminho):
+        return None
+    try:
+        tabela = pa.ipc.open_file(pa.memory_map(caminho, "r")).read_all()
+        return tabela.to_pandas(split_blocks=True)
+    except Exception:
+        logger.warning("Cache corrompido em %s; a tabela será reconstruída.", caminho, exc_info=True)
+        return None
+
+
+def ler_metadados_cache(nome, dir_cache=None):
+    """Metadados (dict de texto) gravados junto com a tabela, sem ler as colunas; None se não houver entrada."""
+    import pyarrow as pa
+
+    caminho = _caminho(nome, dir_cache or dir_cache_padrao())
+    if not os.path.exists(caminho):
+        return None
+    try:
+        with pa.memory_map(caminho, "r") as arquivo:
+            metadados = pa.ipc.open_file(arquivo).schema.metadata or {}
+    except Exception:
+        logger.warning("Cache corrompido em %s.", caminho, exc_info=True)
+        return None
+    return {k.decode(): v.decode() for k, v in metadados.items()}
+
+
+def gravar_cache_tabela(df, nome, dir_cache=None, metadados=None):
+    """Grava a tabela de forma atômica; devolve o caminho (None se não foi possível gravar).
+
+    `metadados` (dict de texto) vai no esquema do arquivo e é lido por ler_metadados_cache.
+    """
+    import pyarrow as pa
+
+    dir_cache = dir_cache or dir_cache_padrao()
+    destino = _caminho(nome, dir_cache)
+    try:
+        os.makedirs(dir_cache, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".tmp-", suffix=EXTENSAO, dir=dir_cache)
+        os.close(fd)
+        try:
+            tabela = _tabela_arrow(df.reset_index(drop=True))
+            if metadados:
+                tabela = tabela.replace_schema_metadata(metadados)
+            with pa.OSFile(tmp, "wb") as f, pa.ipc.new_file(f, tabela.schema) as escritor:
+                escritor.write_table(tabela)
+            os.chmod(tmp, 0o644)  # mkstemp cria 0600; outras réplicas (outro usuário) também leem
+            os.replace(tmp, destino)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    except Exception:
+        logger.warning("Não foi possível gravar o cache em %s.", dir_cache, exc_info=True)
+        return None
+    return destino
+
+
+def remover_antigas(prefixo, manter, dir_cache=None):
+    """Remove as entradas com o prefixo cujo nome não está em `manter` (inclui formatos anteriores, .feather).
+
+    Quem já mapeou uma entrada removida continua lendo o arquivo até soltá-lo.
+    """
+    dir_cache = dir_cache or dir_cache_padrao()
+    manter = {os.path.abspath(_caminho(nome, dir_cache)) for nome in manter}
+    for antigo in glob.glob(os.path.join(dir_cache, f"{prefixo}*")):
+        if os.path.abspath(antigo) not in manter:
+            try:
+                os.remove(antigo)
+            except OSError:
+                pass
+
+
+def ler_cache_base(chave, dir_cache=None):
+    """Retorna a base gravada para a chave, ou None se não houver entrada válida."""
+    return ler_cache_tabela(PREFIXO_BASE + chave, dir_cache)
+
+
+def gravar_cache_base(base, chave, dir_cache=None, metadados=None):
+    """Grava a base de forma atômica e remove as entradas de versões anteriores."""
+    destino = gravar_cache_tabela(base, PREFIXO_BASE + chave, dir_cache, metadados)
+    if destino is not None:
+        remover_antigas(PREFIXO_BASE, [PREFIXO_BASE + chave], dir_cache)
+    return destino
@@ -0,0 +1,94 @@
+# =====================================
+# painel_iqe/cache_figuras.py – Cache LRU das figuras Plotly
+# Zetta Inteligência em Dados
+# =====================================
+#
+# Montar uma figura Plotly (validação de cada trace e propriedade) é a maior
+# parte do custo de um rerun. As figuras prontas ficam num LRU limitado,
+# compartilhado por todas as sessões do processo, com chave
+# (gráfico, versão da base, município, ano, modo...). A versão da base entra
+# na chave, então uma nova carga das planilhas nunca reaproveita figuras antigas.
+#
+# Guardamos o objeto go.Figure e não o JSON: st.plotly_chart só aceita JSON
+# como dict e, nesse caso, revalida tudo com go.Figure(**dict), o que custa o
+# mesmo que montar a figura de novo. A partir de uma figura pronta o Streamlit
+# só faz to_dict + to_json (~2 ms). As figuras em cache são somente leitura.
+
+import os
+import threading
+from collections import OrderedDict
+
+from painel_iqe.perfil import trecho
+
+ENV_CAPACIDADE = "PAINEL_IQE_CACHE_FIGURAS"
+CAPACIDADE_PADRAO = 256
+
+_AUSENTE = object()
+
+
+class CacheFiguras:
+    def __init__(self, capacidade=CAPACIDADE_PADRAO):
+        self.capacidade = max(1, int(capacidade))
+        self.acertos = 0
+        self.falhas = 0
+        self._figuras = OrderedDict()
+        self._trava = threading.Lock()
+
+    def obter(self, chave, construir):
+        """Figura da chave; em caso de falha chama construir() e guarda o resultado (inclusive None)."""
+        with self._trava:
+            fig = self._figuras.get(chave, _AUSENTE)
+            if fig is not _AUSENTE:
+                self._figuras.move_to_end(chave)
+                self.acertos += 1
+                return fig
+            self.falhas += 1
+
+        # Construção fora da trava: sessões concorrentes não esperam umas pelas outras
+        fig = construir()
+
+        with self._trava:
+            self._figuras[chave] = fig
+            self._figuras.move_to_end(chave)
+            while len(self._figuras) > self.capacidade:
+                self._figuras.popitem(last=False)
+        return fig
+
+    def limpar(self):
+        with self._trava:
+            self._figuras.clear()
+            self.acertos = self.falhas = 0
+
+    def estatisticas(self):
+        with self._trava:
+            consultas = self.acertos + self.falhas
+            return {
+                "figuras": len(self._figuras),
+                "capacidade": self.capacidade,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._figuras)
+
+
+def _capacidade_padrao():
+    try:
+        return int(os.environ.get(ENV_CAPACIDADE, "0")) or CAPACIDADE_PADRAO
+    except ValueError:
+        return CAPACIDADE_PADRAO
+
+
+# Instância do processo: o módulo é importado uma vez e sobrevive aos reruns
+figuras = CacheFiguras(_capacidade_padrao())
+
+
+def figura_em_cache(nome, dados, *parametros, construir):
+    """Atalho para figuras.obter com a chave (nome, versão da base, *parâmetros)."""
+    def construir_medindo():
+        with trecho(f"figura {nome}"):
+            return construir()
+
+    return figuras.obter((nome, dados.versao) + parametros, construir_medindo)
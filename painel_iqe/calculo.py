@@ -0,0 +1,299 @@
+# =====================================
+# painel_iqe/calculo.py – Motor de cálculo do IQE a partir dos insumos
+# Zetta Inteligência em Dados
+# =====================================
+#
+# Recalcula IQ2/IQ5, IDE, IQEF, IMEG/IVEC e IQE a partir dos insumos da
+# "Memória de cálculo IQE" (proficiência média, distribuição nos padrões e
+# participação do Paebes, quartis de proficiência e taxa de aprovação),
+# como uma sequência de etapas nomeadas com as fórmulas de metodologia.py.
+#
+# Cada etapa declara as colunas que lê e as que produz. O motor guarda a
+# saída de cada etapa com a assinatura (hash do conteúdo) das entradas, então
+# ao recalcular com um insumo alterado só as etapas a jusante dele rodam de
+# novo; uma etapa cuja saída não muda também não propaga o recálculo.
+#
+#   python -m painel_iqe.calculo            # conciliação com a aba RESUMO
+
+import argparse
+import hashlib
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from painel_iqe import metodologia
+from painel_iqe.indicadores import PESOS_IQE
+
+COLUNAS_ID = ["Código Município", "Município"]
+
+EDICOES_PAEBES = ("", "Anterior")
+
+# Insumos lidos pelo motor (mesmos nomes de esquema.ESQUEMA_INSUMOS)
+COLUNAS_INSUMOS = (
+    [
+        f"{sigla}{d}{e}{s}"
+        for e in metodologia.ETAPAS for d in metodologia.DISCIPLINAS for s in EDICOES_PAEBES
+        for sigla in ("PM", "B", "P", "AV", "TP")
+    ]
+    + [f"{q}{d}{e}{s}" for e in metodologia.ETAPAS for d in metodologia.DISCIPLINAS for s in EDICOES_PAEBES for q in ("P1Q", "P3Q")]
+    + ["P"]
+)
+
+# Saída do motor -> coluna da base (aba RESUMO) com o mesmo indicador
+CONCILIACAO_RESUMO = {
+    "IQE": "IQE",
+    "IQEF": "IQEF",
+    **{f"IQ{e}": f"IQ{e}" for e in metodologia.ETAPAS},
+    **{f"DeltaIDEN{e}": f"DeltaIDEN{e}" for e in metodologia.ETAPAS},
+    **{f"IDE{e}": f"IDE{e}" for e in metodologia.ETAPAS},
+    **{f"IDE{e}Anterior": f"IDE{e}Anterior" for e in metodologia.ETAPAS},
+    **{f"IDA{d}{e}": f"IDA{d}{e}" for e in metodologia.ETAPAS for d in metodologia.DISCIPLINAS},
+    **{f"IEQ{d}{e}Anterior": f"IEQ{d}{e}" for e in metodologia.ETAPAS for d in metodologia.DISCIPLINAS},
+    **{f"IEQ{d}{e}": f"IEQ{d}{e}Atual" for e in metodologia.ETAPAS for d in metodologia.DISCIPLINAS},
+    **{f"DeltaDESV{d}{e}": f"ΔDESVFSEt{d}{e}" for e in metodologia.ETAPAS for d in metodologia.DISCIPLINAS},
+    "IVEC": "IVEC",
+    "IMEG": "IMEG",
+
+}
+
+TOLERANCIA_CONCILIACAO = 1e-9
+
+COLUNAS_CONCILIACAO = [
+    "Indicador", "Coluna RESUMO", "Municípios", "Divergentes",
+    "Máx. |dif.|", "Média |dif.|", "Maior divergência",
+]
+
+
+class Etapa:
+    """Etapa do cálculo: funcao(entradas, **parametros) -> {coluna: array}."""
+
+    def __init__(self, nome, funcao, entradas, saidas, parametros=()):
+        self.nome = nome
+        self.funcao = funcao
+        self.entradas = tuple(entradas)
+        self.saidas = tuple(saidas)
+        self.parametros = tuple(parametros)
+
+    def __repr__(self):
+        return f"Etapa({self.nome!r})"
+
+
+def _etapa_disciplina(d, e, s):
+    def calcular(v):
+        pmn = metodologia.proficiencia_normalizada(v[f"PM{d}{e}{s}"], d, e)
+        ida = metodologia.distribuicao_padroes(v[f"B{d}{e}{s}"], v[f"P{d}{e}{s}"], v[f"AV{d}{e}{s}"])
+        return {
+            f"PMN{d}{e}{s}": pmn,
+            f"IDA{d}{e}{s}": ida,
+            f"IQ{d}{e}{s}": metodologia.qualidade_disciplina(pmn, ida, v[f"TP{d}{e}{s}"]),
+        }
+
+    return Etapa(
+        f"disciplina {d}{e}{s}".strip(), calcular,
+        [f"{sigla}{d}{e}{s}" for sigla in ("PM", "B", "P", "AV", "TP")],
+        [f"PMN{d}{e}{s}", f"IDA{d}{e}{s}", f"IQ{d}{e}{s}"],
+    )
+
+
+def _etapa_desempenho(e, s):
+    def calcular(v):
+        return {f"IDE{e}{s}": metodologia.desempenho_etapa(v[f"IQLP{e}{s}"], v[f"IQMT{e}{s}"], e)}
+
+    return Etapa(f"desempenho {e}{s}".strip(), calcular, [f"IQLP{e}{s}", f"IQMT{e}{s}"], [f"IDE{e}{s}"])
+
+
+def _etapa_qualidade(e):
+    def calcular(v):
+        delta, delta_n, iq = metodologia.qualidade_etapa(v[f"IDE{e}"], v[f"IDE{e}Anterior"])
+        return {f"DeltaIDE{e}": delta, f"DeltaIDEN{e}": delta_n, f"IQ{e}": iq}
+
+    return Etapa(
+        f"qualidade {e}", calcular,
+        [f"IDE{e}", f"IDE{e}Anterior"], [f"DeltaIDE{e}", f"DeltaIDEN{e}", f"IQ{e}"],
+    )
+
+
+def _etapa_equidade(d, e):
+    def calcular(v):
+        ieq_ant = metodologia.equidade(v[f"P1Q{d}{e}Anterior"], v[f"P3Q{d}{e}Anterior"])
+        ieq = metodologia.equidade(v[f"P1Q{d}{e}"], v[f"P3Q{d}{e}"])
+        return {
+            f"IEQ{d}{e}Anterior": ieq_ant,
+            f"IEQ{d}{e}": ieq,
+            f"DeltaDESV{d}{e}": metodologia.variacao_desvio(ieq_ant, ieq),
+        }
+
+    return Etapa(
+        f"equidade {d}{e}", calcular,
+        [f"{q}{d}{e}{s}" for s in EDICOES_PAEBES for q in ("P1Q", "P3Q")],
+        [f"IEQ{d}{e}Anterior", f"IEQ{d}{e}", f"DeltaDESV{d}{e}"],
+    )
+
+
+def _iqef(v):
+    return {"IQEF": metodologia.iqef(v["IQ2"], v["IQ5"])}
+
+
+def _imeg(v):
+    variacoes = [v[f"DeltaDESV{d}{e}"] for e in metodologia.ETAPAS for d in metodologia.DISCIPLINAS]
+    ivec, imeg = metodologia.imeg(variacoes)
+    return {"IVEC": ivec, "IMEG": imeg}
+
+
+def _iqe(v, pesos):
+    return {"IQE": metodologia.iqe(v["IQEF"], v["P"], v["IMEG"], pesos)}
+
+
+# Em ordem de execução: cada etapa só lê insumos ou saídas de etapas anteriores
+ETAPAS_CALCULO = (
+    [_etapa_disciplina(d, e, s) for e in metodologia.ETAPAS for d in metodologia.DISCIPLINAS for s in EDICOES_PAEBES]
+    + [_etapa_desempenho(e, s) for e in metodologia.ETAPAS for s in EDICOES_PAEBES]
+    + [_etapa_qualidade(e) for e in metodologia.ETAPAS]
+    + [Etapa("IQEF", _iqef, ["IQ2", "IQ5"], ["IQEF"])]
+    + [_etapa_equidade(d, e) for e in metodologia.ETAPAS for d in metodologia.DISCIPLINAS]
+    + [Etapa("IMEG", _imeg,
+             [f"DeltaDESV{d}{e}" for e in metodologia.ETAPAS for d in metodologia.DISCIPLINAS],
+             ["IVEC", "IMEG"])]
+    + [Etapa("IQE", _iqe, ["IQEF", "P", "IMEG"], ["IQE"], parametros=["pesos"])]
+)
+
+
+def _assinatura(*partes):
+    h = hashlib.blake2b(digest_size=16)
+    for parte in partes:
+        if isinstance(parte, np.ndarray):
+            h.update(str((parte.dtype, parte.shape)).encode())
+            h.update(np.ascontiguousarray(parte).tobytes())
+        else:
+            h.update(repr(parte).encode())
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class MotorIQE:
+    """Executa as etapas do cálculo, reaproveitando as que não tiveram entradas alteradas."""
+
+    def __init__(self, etapas=ETAPAS_CALCULO):
+        produzidas = set()
+        for etapa in etapas:
+            posteriores = [c for c in etapa.entradas if c in {s for o in etapas for s in o.saidas} - produzidas]
+            if posteriores:
+                raise ValueError(f"A etapa {etapa.nome} lê colunas de etapas posteriores: {', '.join(posteriores)}")
+            produzidas.update(etapa.saidas)
+        self.etapas = tuple(etapas)
+        self._cache = {}
+        # Etapas executadas (não reaproveitadas) no último cálculo
+        self.recalculadas = []
+
+    def limpar(self):
+        self._cache.clear()
+
+    def calcular_arrays(self, insumos, pesos=None):
+        """{coluna: array} com insumos e saídas; os arrays podem ter eixos de cenário à frente."""
+        parametros = {"pesos": dict(pesos or PESOS_IQE)}
+        valores, assinaturas = {}, {}
+        for coluna, valor in insumos.items():
+            valores[coluna] = np.asarray(valor, dtype=float)
+            assinaturas[coluna] = _assinatura(valores[coluna])
+
+        self.recalculadas = []
+        for etapa in self.etapas:
+            faltando = [c for c in etapa.entradas if c not in valores]
+            if faltando:
+                raise KeyError(f"Etapa {etapa.nome}: insumos ausentes: {', '.join(faltando)}")
+
+            kwargs = {p: parametros[p] for p in etapa.parametros}
+            assinatura = _assinatura(
+                etapa.nome,
+                *(assinaturas[c] for c in etapa.entradas),
+                sorted((p, sorted(v.items())) for p, v in kwargs.items()),
+            )
+            em_cache = self._cache.get(etapa.nome)
+            if em_cache is not None and em_cache[0] == assinatura:
+                saidas, assinaturas_saidas = em_cache[1], em_cache[2]
+            else:
+                saidas = etapa.funcao({c: valores[c] for c in etapa.entradas}, **kwargs)
+                assinaturas_saidas = {c: _assinatura(np.asarray(a)) for c, a in saidas.items()}
+                self._cache[etapa.nome] = (assinatura, saidas, assinaturas_saidas)
+                self.recalculadas.append(etapa.nome)
+
+            valores.update(saidas)
+            assinaturas.update(assinaturas_saidas)
+        return valores
+
+    def calcular(self, insumos, pesos=None):
+        """DataFrame de insumos (um município por linha) -> DataFrame com todas as saídas."""
+        ids = [c for c in COLUNAS_ID if c in insumos.columns]
+        numericas = {c: insumos[c].to_numpy(dtype=float) for c in insumos.columns if c not in ids}
+        valores = self.calcular_arrays(numericas, pesos)
+
+        saidas = [s for etapa in self.etapas for s in etapa.saidas]
+        out = insumos[ids].reset_index(drop=True)
+        return pd.concat([out, pd.DataFrame({c: valores[c] for c in saidas})], axis=1)
+
+
+def conciliar(calculado, oficial, tolerancia=TOLERANCIA_CONCILIACAO):
+    """Compara as saídas do motor com a aba RESUMO, por Código Município."""
+    juntos = calculado.merge(
+        oficial, on="Código Município", how="inner", suffixes=("", " RESUMO"), validate="one_to_one",
+    )
+    linhas = []
+    for indicador, coluna in CONCILIACAO_RESUMO.items():
+        if indicador not in calculado.columns or coluna not in oficial.columns:
+            continue
+        coluna_oficial = coluna + " RESUMO" if coluna in calculado.columns else coluna
+        dif = (juntos[indicador] - juntos[coluna_oficial]).abs()
+        # Ausente dos dois lados conta como igual; de um lado só, como divergente
+        ausente = juntos[indicador].isna() != juntos[coluna_oficial].isna()
+        divergentes = (dif > tolerancia) | ausente
+        if not divergentes.any():
+            pior = ""
+        elif (dif > tolerancia).any():
+            pior = juntos.loc[dif.idxmax(), "Município"]
+        else:
+            pior = juntos.loc[ausente.idxmax(), "Município"]
+        linhas.append({
+            "Indicador": indicador,
+            "Coluna RESUMO": coluna,
+            "Municípios": len(juntos),
+            "Divergentes": int(divergentes.sum()),
+            "Máx. |dif.|": dif.max(),
+            "Média |dif.|": dif.mean(),
+            "Maior divergência": pior,
+        })
+    return pd.DataFrame(linhas, columns=COLUNAS_CONCILIACAO)
+
+
+def conciliar_edicao(caminho_arquivo, edicao, motor=None, tolerancia=TOLERANCIA_CONCILIACAO):
+    """(saídas do motor, relatório de conciliação) de uma "Memória de cálculo IQE"."""
+    from painel_iqe.carga import ano_referencia_edicao, ler_insumos_resumo, ler_resumo_iqe
+
+    motor = motor or MotorIQE()
+    calculado = motor.calcular(ler_insumos_resumo(caminho_arquivo, edicao))
+    oficial = ler_resumo_iqe(caminho_arquivo, ano_referencia_edicao(edicao), edicao)
+    return calculado, conciliar(calculado, oficial, tolerancia)
+
+
+def main(argv=None):
+    from painel_iqe.carga import descobrir_arquivos, dir_dados_padrao
+
+    parser = argparse.ArgumentParser(description="Recalcula o IQE e concilia com a aba RESUMO.")
+    parser.add_argument("--dir-dados", default=None, help="pasta com as planilhas (padrão: data/)")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_CONCILIACAO)
+    args = parser.parse_args(argv)
+
+    edicoes, _ = descobrir_arquivos(args.dir_dados or dir_dados_padrao())
+    divergencias = 0
+    with pd.option_context("display.width", 200, "display.max_columns", None, "display.max_rows", None):
+        for edicao, caminho in sorted(edicoes.items()):
+            _, relatorio = conciliar_edicao(caminho, edicao, tolerancia=args.tolerancia)
+            divergencias += int(relatorio["Divergentes"].sum())
+            print(f"\n== {os.path.basename(caminho)} ==")
+            print(relatorio.to_string(index=False))
+    return 1 if divergencias else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,429 @@
+# =====================================
+# painel_iqe/carga.py – Leitura das planilhas do IQE
+# Zetta Inteligência em Dados
+# =====================================
+
+import io
+import logging
+import multiprocessing
+import os
+import re
+import unicodedata
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import pandas as pd
+
+from painel_iqe.cache import (
+    PREFIXO_BASE,
+    PREFIXO_PARTE,
+    chave_impressoes,
+    gravar_cache_base,
+    gravar_cache_tabela,
+    impressao_digital,
+    ler_cache_base,
+    ler_metadados_cache,
+    ler_cache_tabela,
+    remover_antigas,
+    trava_cache,
+)
+from painel_iqe.compactacao import compactar_base, resumo_memoria
+from painel_iqe.esquema import (
+    COLUNAS_TEXTO,
+    ESQUEMA_INSUMOS,
+    LINHAS_CABECALHO_RESUMO,
+    deslocamentos_resumo,
+    esquema_resumo,
+)
+from painel_iqe.municipios import COL_CODIGO, codigos_por_nome, linhas_sem_par, tabela_apelidos
+from painel_iqe.perfil import trecho
+
+logger = logging.getLogger(__name__)
+
+# Incrementar sempre que a lógica de leitura/merge mudar, para invalidar o cache em disco
+VERSAO_CARGA = 9
+
+CHAVE_RELATORIO_MEMORIA = "relatorio_memoria"
+
+ENV_DIR_DADOS = "PAINEL_IQE_DATA_DIR"
+ENV_WORKERS = "PAINEL_IQE_WORKERS"
+
+# Nomes já normalizados (normalizar_nome), o que tolera acentos em NFC/NFD
+PADRAO_ARQUIVO_EDICAO = re.compile(r"MEMORIA DE CALCULO IQE (\d{4})\.XLSX")
+PADRAO_ARQUIVO_ICMS = re.compile(r"ICMS EDUCACIONAL\b.*\.XLSX")
+PADRAO_COLUNA_ICMS = re.compile(r"ICMS EDUCACIONAL (DISTRIBUIDO|ESTIMADO) (\d{4})")
+
+# Aba da planilha de ICMS com os pares (código IBGE, nome) usados na tabela de apelidos
+ABA_CODIGOS_ICMS = "Plan5"
+PADRAO_COLUNA_CODIGO_ICMS = re.compile(r"CODIGO IBGE")
+PADRAO_COLUNA_NOME_ICMS = re.compile(r"MUNICIPIO")
+
+# Valor distribuído tem prioridade sobre o estimado quando ambos cobrem o mesmo ano
+PRIORIDADE_TIPO_ICMS = {"DISTRIBUIDO": 0, "ESTIMADO": 1}
+
+
+def normalizar_nome(txt):
+    if pd.isna(txt):
+        return ""
+    txt = str(txt).strip().upper()
+    txt = unicodedata.normalize("NFKD", txt).encode("ASCII", "ignore").decode("ASCII")
+    txt = " ".join(txt.split())
+    return txt
+
+
+def rotulos_coluna(cabecalho, posicao):
+    rotulos = (normalizar_nome(linha[posicao]) for linha in cabecalho if posicao < len(linha))
+    return [r for r in rotulos if r]
+
+
+def resolver_esquema(cabecalho, esquema, nome_arquivo):
+    """Converte o esquema em {indicador: posição}, validando os cabeçalhos.
+
+    Qualquer divergência interrompe a carga: é preferível falhar a ler o
+    indicador errado quando a SEDU desloca uma coluna.
+    """
+    from openpyxl.utils import get_column_letter
+
+    n_colunas = max((len(linha) for linha in cabecalho), default=0)
+    posicoes, erros = {}, []
+
+    for indicador, (posicao, padrao) in esquema.items():
+        regex = re.compile(padrao)
+        if posicao is None:
+            achadas = [
+                p for p in range(n_colunas)
+                if any(regex.fullmatch(r) for r in rotulos_coluna(cabecalho, p))
+            ]
+            if len(achadas) != 1:
+                erros.append(
+                    f"{indicador}: esperava 1 coluna com cabeçalho '{padrao}', encontrei {len(achadas)}"
+                )
+                continue
+            posicao = achadas[0]
+        else:
+            rotulos = rotulos_coluna(cabecalho, posicao)
+            if not any(regex.fullmatch(r) for r in rotulos):
+                erros.append(
+                    f"{indicador}: coluna {get_column_letter(posicao + 1)} deveria ter cabeçalho "
+                    f"'{padrao}', mas tem {rotulos or 'vazio'}"
+                )
+                continue
+        posicoes[indicador] = posicao
+
+    if erros:
+        raise ValueError(
+            f"O layout da aba RESUMO de {nome_arquivo} não corresponde ao esquema esperado:\n- "
+            + "\n- ".join(erros)
+        )
+    return posicoes
+
+
+def ler_colunas_resumo(caminho_arquivo, esquema, deslocamentos=()):
+    """Colunas do esquema na aba RESUMO, uma linha por município (Município preenchido).
+
+    deslocamentos: [(primeira, última, linhas)] de blocos gravados linhas acima
+    (linhas < 0) da coluna Município; ver esquema.DESLOCAMENTOS_RESUMO.
+    """
+    # openpyxl só é importado quando há planilha para ler (o cache em disco dispensa a leitura)
+    import openpyxl
+
+    # Modo read-only: as linhas são lidas em streaming e só as colunas do esquema são guardadas
+    wb = openpyxl.load_workbook(caminho_arquivo, read_only=True, data_only=True)
+    try:
+        linhas = wb["RESUMO"].iter_rows(values_only=True)
+        cabecalho = [list(linha) for linha in islice(linhas, LINHAS_CABECALHO_RESUMO)]
+        posicoes = resolver_esquema(cabecalho, esquema, os.path.basename(caminho_arquivo))
+
+        atraso = {
+            ind: -linhas_bloco
+            for ind, p in posicoes.items()
+            for primeira, ultima, linhas_bloco in deslocamentos
+            if primeira <= p <= ultima
+        }
+        if any(a <= 0 for a in atraso.values()):
+            raise ValueError("Só há suporte a blocos deslocados para cima (linhas < 0).")
+        # Últimas linhas lidas, de onde saem os valores dos blocos deslocados
+        recentes = deque(cabecalho, maxlen=max(atraso.values(), default=0))
+
+        colunas = {ind: [] for ind in posicoes}
+        for linha in linhas:
+            for ind, p in posicoes.items():
+                origem = recentes[-atraso[ind]] if ind in atraso else linha
+                colunas[ind].append(origem[p] if p < len(origem) else None)
+            recentes.append(linha)
+    finally:
+        wb.close()
+
+    out = pd.DataFrame(colunas)
+    out = out[out["Município"].notna()].reset_index(drop=True)
+
+    for ind in out.columns:
+        if ind in COLUNAS_TEXTO:
+            out[ind] = out[ind].astype(str).str.strip()
+        else:
+            out[ind] = pd.to_numeric(out[ind], errors="coerce")
+    return out
+
+
+def ler_resumo_iqe(caminho_arquivo, ano_referencia, edicao=None):
+    edicao = edicao if edicao is not None else ano_referencia + 1
+    out = ler_colunas_resumo(caminho_arquivo, esquema_resumo(edicao), deslocamentos_resumo(edicao))
+    out["Ano-Referência"] = ano_referencia
+    return out
+
+
+def ler_insumos_resumo(caminho_arquivo, edicao):
+    """Insumos do cálculo do IQE (esquema.ESQUEMA_INSUMOS) de uma edição."""
+    return ler_colunas_resumo(caminho_arquivo, ESQUEMA_INSUMOS, deslocamentos_resumo(edicao))
+
+
+def ano_referencia_edicao(edicao):
+    # A "Memória de cálculo IQE 2025" usa os resultados do Paebes 2024
+    return edicao - 1
+
+
+def ano_referencia_repasse(ano_repasse):
+    # O ICMS repassado em 2026 é calculado com o IQE 2025, referência 2024
+    return ano_repasse - 2
+
+
+def dir_dados_padrao():
+    dir_env = os.environ.get(ENV_DIR_DADOS)
+    if dir_env:
+        return dir_env
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(raiz, "data")
+
+
+def descobrir_arquivos(dir_dados):
+    """Retorna ({edição: caminho da Memória de cálculo}, [caminhos das planilhas de ICMS])."""
+    edicoes, icms = {}, []
+    for nome in sorted(os.listdir(dir_dados)):
+        if nome.startswith("~$"):
+            continue
+        nome_norm = normalizar_nome(nome)
+        caminho = os.path.join(dir_dados, nome)
+        m = PADRAO_ARQUIVO_EDICAO.fullmatch(nome_norm)
+        if m:
+            edicoes[int(m.group(1))] = caminho
+        elif PADRAO_ARQUIVO_ICMS.fullmatch(nome_norm):
+            icms.append(caminho)
+    return edicoes, icms
+
+
+def _coluna(df, padrao):
+    achadas = [c for c in df.columns if padrao.fullmatch(normalizar_nome(c))]
+    return achadas[0] if len(achadas) == 1 else None
+
+
+def ler_icms(caminho_arquivo):
+    """Valores de ICMS da aba cal, com o código IBGE de cada nome pela aba Plan5 (NaN se não houver)."""
+    with pd.ExcelFile(caminho_arquivo) as planilha:
+        icms = planilha.parse("cal")
+        codigos = planilha.parse(ABA_CODIGOS_ICMS) if ABA_CODIGOS_ICMS in planilha.sheet_names else None
+
+    pares = []
+    if codigos is not None:
+        col_codigo = _coluna(codigos, PADRAO_COLUNA_CODIGO_ICMS)
+        col_nome = _coluna(codigos, PADRAO_COLUNA_NOME_ICMS)
+        if col_codigo is not None and col_nome is not None:
+            pares.append(codigos[[col_codigo, col_nome]])
+    codigo = codigos_por_nome(icms["NomeMunicipio"], tabela_apelidos(pares))
+
+    partes = []
+    for col in icms.columns:
+        m = PADRAO_COLUNA_ICMS.search(normalizar_nome(col))
+        if not m:
+            continue
+        partes.append(pd.DataFrame({
+            COL_CODIGO: codigo,
+            "NomeMunicipio": icms["NomeMunicipio"].astype(str),
+            "Ano-Referência": ano_referencia_repasse(int(m.group(2))),
+            "Tipo": m.group(1),
+            "ICMS_Educacional_Estimado": pd.to_numeric(icms[col], errors="coerce"),
+        }))
+
+    if not partes:
+        raise KeyError(f"Não encontrei colunas de ICMS Educacional na aba cal de {caminho_arquivo}.")
+    return pd.concat(partes, ignore_index=True)
+
+
+def _numero_workers(n_tarefas):
+    try:
+        limite = int(os.environ.get(ENV_WORKERS, "0")) or os.cpu_count() or 1
+    except ValueError:
+        limite = os.cpu_count() or 1
+    return max(1, min(n_tarefas, limite))
+
+
+def _contexto_pool():
+    # forkserver: um processo limpo (sem as threads do servidor Streamlit) já com
+    # pandas/openpyxl importados, de onde os workers são criados por fork barato
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        contexto = multiprocessing.get_context("forkserver")
+        contexto.set_forkserver_preload([__name__, "openpyxl"])
+        return contexto
+    return multiprocessing.get_context("spawn")
+
+
+def _executar(tarefas):
+    """Executa [(função, args)] num pool de processos, devolvendo os resultados na ordem recebida.
+
+    Se o pool não puder ser criado (ambientes restritos), a leitura é feita em sequência.
+    """
+    workers = _numero_workers(len(tarefas))
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=_contexto_pool()) as pool:
+                futuros = [pool.submit(func, *args) for func, args in tarefas]
+                return [f.result() for f in futuros]
+        except (OSError, RuntimeError) as exc:
+            logger.warning("Pool de processos indisponível (%s); lendo em sequência.", exc)
+    return [func(*args) for func, args in tarefas]
+
+
+def _ler_partes(tarefas, impressoes, dir_cache=None):
+    """Resultado de cada tarefa [(caminho, função, args)], uma parte do cache por planilha.
+
+    Só as planilhas novas ou alteradas são lidas; as demais vêm do cache.
+    """
+    nomes = {
+        caminho: PREFIXO_PARTE + chave_impressoes([impressoes[caminho]], VERSAO_CARGA)
+        for caminho, _, _ in tarefas
+    }
+    partes = {caminho: ler_cache_tabela(nomes[caminho], dir_cache) for caminho, _, _ in tarefas}
+    faltando = [(caminho, func, args) for caminho, func, args in tarefas if partes[caminho] is None]
+    if faltando:
+        with trecho("ler planilhas"):
+            lidas = _executar([(func, args) for _, func, args in faltando])
+        for (caminho, _, _), parte in zip(faltando, lidas):
+            gravar_cache_tabela(parte, nomes[caminho], dir_cache)
+            partes[caminho] = parte
+        logger.info(
+            "Planilhas lidas: %s (%d reaproveitada(s) do cache).",
+            ", ".join(os.path.basename(c) for c, _, _ in faltando), len(tarefas) - len(faltando),
+        )
+    remover_antigas(PREFIXO_PARTE, nomes.values(), dir_cache)
+    return [partes[caminho] for caminho, _, _ in tarefas]
+
+
+def _montar_base(edicoes, arquivos_icms, impressoes, dir_cache=None):
+    """Consolida a base (edições + ICMS), já na ordem de ano e município."""
+    tarefas = [
+        (caminho, ler_resumo_iqe, (caminho, ano_referencia_edicao(edicao), edicao))
+        for edicao, caminho in sorted(edicoes.items())
+    ] + [(caminho, ler_icms, (caminho,)) for caminho in arquivos_icms]
+    resultados = _ler_partes(tarefas, impressoes, dir_cache)
+
+    base = pd.concat(resultados[:len(edicoes)], ignore_index=True)
+
+    if arquivos_icms:
+        base = _cruzar_icms(base, pd.concat(resultados[len(edicoes):], ignore_index=True))
+    else:
+        base["ICMS_Educacional_Estimado"] = float("nan")
+
+    # Mesma ordem da BaseIndexada, que assim usa a base (mapeada do cache) sem copiá-la
+    return base.sort_values(["Ano-Referência", "Município"], kind="stable").reset_index(drop=True)
+
+
+def _cruzar_icms(base, icms):
+    """Base com a coluna de ICMS, cruzada pelo código IBGE e pelo ano (junção por chave inteira).
+
+    O código de cada linha sai da tabela de apelidos (Plan5 primeiro, depois
+    a RESUMO): nomes do ICMS sem código na Plan5 são resolvidos pela RESUMO e
+    códigos da RESUMO que divergem da Plan5 são corrigidos. Correções e
+    linhas que continuam sem par são relatadas no log.
+    """
+    apelidos = tabela_apelidos([icms[[COL_CODIGO, "NomeMunicipio"]], base[[COL_CODIGO, "Município"]]])
+    icms[COL_CODIGO] = icms[COL_CODIGO].fillna(codigos_por_nome(icms["NomeMunicipio"], apelidos))
+
+    canonico = codigos_por_nome(base["Município"], apelidos)
+    corrigidos = canonico.notna() & base[COL_CODIGO].notna() & (canonico != base[COL_CODIGO])
+    if corrigidos.any():
+        logger.warning(
+            "Códigos IBGE da RESUMO corrigidos pela tabela de apelidos: %s.",
+            ", ".join(
+                f"{m} ({int(a)}) {int(c)} -> {int(n)}"
+                for m, a, c, n in zip(
+                    base.loc[corrigidos, "Município"], base.loc[corrigidos, "Ano-Referência"],
+                    base.loc[corrigidos, COL_CODIGO], canonico[corrigidos],
+                )
+            ),
+        )
+    base[COL_CODIGO] = canonico.fillna(base[COL_CODIGO])
+
+    sem_par = linhas_sem_par(base, icms, icms["Ano-Referência"].unique())
+    if not sem_par.empty:
+        logger.warning(
+            "%d linha(s) sem par no cruzamento com o ICMS:\n%s", len(sem_par), sem_par.to_string(index=False)
+        )
+
+    icms = (
+        icms[icms[COL_CODIGO].notna()]
+        .assign(_prioridade=icms["Tipo"].map(PRIORIDADE_TIPO_ICMS))
+        .sort_values("_prioridade", kind="stable")
+        .drop_duplicates([COL_CODIGO, "Ano-Referência"], keep="first")
+    )
+    chave_icms = pd.DataFrame({
+        "_codigo": icms[COL_CODIGO].astype("int64").to_numpy(),
+        "Ano-Referência": icms["Ano-Referência"].astype("int64").to_numpy(),
+        "ICMS_Educacional_Estimado": icms["ICMS_Educacional_Estimado"].to_numpy(),
+    })
+    # Linhas da base sem código ficam com -1, que não existe no ICMS
+    base["_codigo"] = base[COL_CODIGO].fillna(-1).astype("int64")
+    base = base.merge(chave_icms, on=["_codigo", "Ano-Referência"], how="left", validate="many_to_one")
+    return base.drop(columns="_codigo")
+
+
+def carregar_base(dir_dados=None, dir_cache=None):
+    """Base consolidada de todas as edições encontradas em dir_dados (com cache em disco).
+
+    Retorna (base, versao); a versão é a chave do cache e muda sempre que uma
+    planilha de origem ou a lógica de carga muda. Quando só uma planilha muda,
+    só ela é relida: as demais vêm do cache por planilha.
+    """
+    dir_dados = dir_dados or dir_dados_padrao()
+    if not os.path.isdir(dir_dados):
+        raise FileNotFoundError(f"A pasta de dados {dir_dados} não existe.")
+
+    edicoes, arquivos_icms = descobrir_arquivos(dir_dados)
+    if not edicoes:
+        raise FileNotFoundError(
+            f"Nenhuma planilha 'Memória de cálculo IQE AAAA.xlsx' foi encontrada em {dir_dados}."
+        )
+
+    impressoes = {c: impressao_digital(c) for c in list(edicoes.values()) + arquivos_icms}
+    chave = chave_impressoes(list(impressoes.values()), VERSAO_CARGA)
+    with trecho("ler cache da base"):
+        base = ler_cache_base(chave, dir_cache)
+    if base is not None:
+        return base, chave
+
+    # Só um processo por host monta a base: os outros esperam na trava e leem o arquivo gravado
+    with trava_cache(dir_cache):
+        with trecho("ler cache da base"):
+            base = ler_cache_base(chave, dir_cache)
+        if base is not None:
+            return base, chave
+
+        base = _montar_base(edicoes, arquivos_icms, impressoes, dir_cache)
+        with trecho("compactar a base"):
+            base, relatorio = compactar_base(base)
+        logger.info("Base %s em tipos compactos: %s.", chave, resumo_memoria(relatorio))
+        with trecho("gravar cache da base"):
+            gravado = gravar_cache_base(
+                base, chave, dir_cache, {CHAVE_RELATORIO_MEMORIA: relatorio.to_json(orient="records")}
+            )
+
+    # Relida do arquivo, este processo também passa a usar a cópia mapeada
+    mapeada = ler_cache_base(chave, dir_cache) if gravado else None
+    return (base if mapeada is None else mapeada), chave
+
+
+def ler_relatorio_memoria(versao, dir_cache=None):
+    """Relatório de memória (compactar_base) gravado com a versão da base, ou None."""
+    metadados = ler_metadados_cache(PREFIXO_BASE + versao, dir_cache)
+    if not metadados or CHAVE_RELATORIO_MEMORIA not in metadados:
+        return None
+    return pd.read_json(io.StringIO(metadados[CHAVE_RELATORIO_MEMORIA]), orient="records")
@@ -0,0 +1,146 @@
+# =====================================
+# painel_iqe/compactacao.py – Tipos compactos da base consolidada
+# Zetta Inteligência em Dados
+# =====================================
+#
+# Última etapa da carga, antes da gravação no cache: a base vai para o disco,
+# e daí para a memória de cada processo, já nos tipos compactos.
+#
+#   Município          -> category (um código por linha, nomes guardados uma vez)
+#   Ano-Referência     -> int16
+#   Código Município   -> int32 (códigos IBGE têm 7 dígitos; se faltar algum, fica float64)
+#   indicadores        -> float32, quando passam na verificação de precisão
+#
+# Verificação de precisão (por coluna): o valor convertido para float32 e de
+# volta não pode se afastar do original mais que TOLERANCIA_RELATIVA *
+# max(|valor|, 1) -- o painel mostra no máximo 3 casas decimais -- e a
+# posição de cada município no ranking de cada ano tem que ser a mesma com os
+# dois tipos (valores distintos em float64 que ficariam iguais em float32
+# mudariam um empate). Coluna reprovada fica em float64.
+#
+# Ficam sempre em float64 o ICMS (centavos em valores de milhões, fora do
+# alcance do float32) e o IQE com seus componentes: o ICMS é repartido em
+# proporção ao IQE, e o simulador precisa reproduzir o ICMS publicado no centavo.
+#
+#   python -m painel_iqe.compactacao        # relatório de memória da versão atual
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from painel_iqe.indicadores import PESOS_IQE
+
+TOLERANCIA_RELATIVA = 1e-6
+COLUNAS_FLOAT64 = {"ICMS_Educacional_Estimado", "IQE", *PESOS_IQE}
+COLUNAS_INTEIRAS = {"Ano-Referência": np.int16, "Código Município": np.int32}
+COLUNAS_CATEGORIA = ["Município"]
+
+
+def erro_float32(valores):
+    """Maior erro da ida e volta por float32, relativo a max(|valor|, 1)."""
+    valores = np.asarray(valores, dtype=np.float64)
+    ida_volta = valores.astype(np.float32).astype(np.float64)
+    finitos = np.isfinite(valores)
+    if not np.array_equal(finitos, np.isfinite(ida_volta)):
+        return np.inf
+    if not finitos.any():
+        return 0.0
+    erro = np.abs(ida_volta[finitos] - valores[finitos]) / np.maximum(np.abs(valores[finitos]), 1.0)
+    return float(erro.max())
+
+
+def _ranking_preservado(coluna, anos):
+    """True se a posição de cada linha no ranking do ano é a mesma em float64 e float32."""
+    original = coluna.groupby(anos).rank(method="min", ascending=False)
+    compacto = coluna.astype(np.float32).groupby(anos).rank(method="min", ascending=False)
+    return original.equals(compacto)
+
+
+def _inteiro(coluna, tipo):
+    valores = coluna.to_numpy()
+    if not np.issubdtype(valores.dtype, np.number) or not np.isfinite(valores).all():
+        return None
+    limites = np.iinfo(tipo)
+    if len(valores) and (valores.min() < limites.min or valores.max() > limites.max):
+        return None
+    convertidos = valores.astype(tipo)
+    return convertidos if np.array_equal(convertidos, valores) else None
+
+
+def compactar_base(base):
+    """(base com tipos compactos, relatório de memória por coluna)."""
+    anos = base["Ano-Referência"].to_numpy()
+    colunas, erros, observacoes = {}, {}, {}
+    for col in base.columns:
+        serie = base[col]
+        colunas[col] = serie
+        if col in COLUNAS_CATEGORIA:
+            colunas[col] = serie.astype("category")
+        elif col in COLUNAS_INTEIRAS:
+            convertidos = _inteiro(serie, COLUNAS_INTEIRAS[col])
+            if convertidos is not None:
+                colunas[col] = convertidos
+        elif col in COLUNAS_FLOAT64:
+            observacoes[col] = "float64 obrigatório"
+        elif serie.dtype == np.float64:
+            erros[col] = erro_float32(serie)
+            if erros[col] <= TOLERANCIA_RELATIVA and _ranking_preservado(serie, anos):
+                colunas[col] = serie.to_numpy().astype(np.float32)
+            else:
+                observacoes[col] = "reprovada na verificação de precisão"
+
+    compacta = pd.DataFrame(colunas, index=base.index)
+    return compacta, relatorio_memoria(base, compacta, erros, observacoes)
+
+
+def relatorio_memoria(original, compacta, erros=None, observacoes=None):
+    """Bytes por coluna antes e depois da compactação, com o erro do float32 quando verificado."""
+    erros, observacoes = erros or {}, observacoes or {}
+    antes = original.memory_usage(index=False, deep=True)
+    depois = compacta.memory_usage(index=False, deep=True)
+    return pd.DataFrame([
+        {
+            "Coluna": col,
+            "Tipo original": str(original[col].dtype),
+            "Tipo compacto": str(compacta[col].dtype),
+            "Bytes original": int(antes[col]),
+            "Bytes compacto": int(depois[col]),
+            "Erro relativo float32": erros.get(col),
+            "Observação": observacoes.get(col, ""),
+        }
+        for col in original.columns
+    ])
+
+
+def resumo_memoria(relatorio):
+    """Linha de texto com o total antes/depois, para o log."""
+    antes = relatorio["Bytes original"].sum()
+    depois = relatorio["Bytes compacto"].sum()
+    return (
+        f"{antes / 2**20:.2f} MB -> {depois / 2**20:.2f} MB "
+        f"({100 * (1 - depois / antes) if antes else 0:.0f}% menor)"
+    )
+
+
+def main(argv=None):
+    from painel_iqe.carga import carregar_base, ler_relatorio_memoria
+
+    parser = argparse.ArgumentParser(description="Relatório de memória da versão atual da base.")
+    parser.add_argument("--dir-dados", default=None, help="pasta com as planilhas (padrão: data/)")
+    args = parser.parse_args(argv)
+
+    _, versao = carregar_base(args.dir_dados)
+    relatorio = ler_relatorio_memoria(versao)
+    if relatorio is None:
+        print(f"Versão {versao}: relatório de memória indisponível (cache sem gravação).", file=sys.stderr)
+        return 1
+    with pd.option_context("display.width", 200, "display.max_columns", None, "display.max_rows", None):
+        print(f"Versão {versao}: {resumo_memoria(relatorio)}")
+        print(relatorio.to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+# =====================================
+# painel_iqe/diagnostico.py – Diagnóstico dos subindicadores
+# Zetta Inteligência em Dados
+# =====================================
+#
+# A tabela de diagnóstico é montada de uma vez para todos os anos, municípios
+# e indicadores; trocar o município no painel vira apenas uma consulta.
+
+import numpy as np
+import pandas as pd
+
+from painel_iqe.formatacao import fmt_br_num_col
+from painel_iqe.indicadores import bloco_indicador, nome_indicador, ordem_bloco, ordem_indicador
+
+# Faixas da diferença município − média estadual
+LIMITE_MUITO_ABAIXO = -0.15
+LIMITE_ABAIXO = -0.05
+LIMITE_PROXIMO = 0.05
+
+SEM_DADO = ("⚪", "Sem dado")
+MUITO_ABAIXO = ("🔴", "Muito abaixo da média estadual")
+ABAIXO = ("🟠", "Abaixo da média estadual")
+PROXIMO = ("🟡", "Próximo da média estadual")
+ACIMA = ("🟢", "Acima da média estadual")
+
+COLUNAS_DIAGNOSTICO = [
+    "Indicador", "Descrição", "Bloco", "Status", "Leitura",
+    "Valor Município", "Média Estadual", "Diferença", "Ranking", "Posição",
+]
+
+# (título exibido, bloco) na ordem das seções do diagnóstico
+BLOCOS_DIAGNOSTICO = [
+    ("IQEF – 2º ano", "IQEF - 2º ano"),
+    ("IQEF – 5º ano", "IQEF - 5º ano"),
+    ("P – Fluxo escolar", "P"),
+    ("IMEG – 2º ano", "IMEG - 2º ano"),
+    ("IMEG – 5º ano", "IMEG - 5º ano"),
+    ("IMEG – Geral", "IMEG - Geral"),
+]
+
+
+def formatar_tabela_diagnostico(df_tab):
+    """Tabela de diagnóstico para exibição: sem Posição e com números no padrão brasileiro."""
+    if df_tab.empty:
+        return df_tab
+    out = df_tab.drop(columns=["Posição"])
+    for col in ["Valor Município", "Média Estadual", "Diferença"]:
+        out[col] = fmt_br_num_col(out[col], 3)
+    return out
+
+
+def classificar_gap(valor_mun, valor_media):
+    if pd.isna(valor_mun) or pd.isna(valor_media):
+        return *SEM_DADO, np.nan
+
+    diff = valor_mun - valor_media
+
+    if diff <= LIMITE_MUITO_ABAIXO:
+        return *MUITO_ABAIXO, diff
+    elif diff <= LIMITE_ABAIXO:
+        return *ABAIXO, diff
+    elif diff < LIMITE_PROXIMO:
+        return *PROXIMO, diff
+    else:
+        return *ACIMA, diff
+
+
+def classificar_gaps(diff):
+    """Versão vetorizada de classificar_gap: (ícones, leituras) para um array de diferenças."""
+    diff = np.asarray(diff, dtype=float)
+    with np.errstate(invalid="ignore"):
+        condicoes = [np.isnan(diff), diff <= LIMITE_MUITO_ABAIXO, diff <= LIMITE_ABAIXO, diff < LIMITE_PROXIMO]
+    classes = [SEM_DADO, MUITO_ABAIXO, ABAIXO, PROXIMO]
+    icones = np.select(condicoes, [c[0] for c in classes], default=ACIMA[0])
+    leituras = np.select(condicoes, [c[1] for c in classes], default=ACIMA[1])
+    return icones, leituras
+
+
+class DiagnosticoIndicadores:
+    def __init__(self, base, indice_ranking, indicadores, anterior=None, anos_reaproveitados=()):
+        self.indicadores = sorted(
+            indicadores, key=lambda i: (ordem_bloco(bloco_indicador(i)), ordem_indicador(i))
+        )
+        self._k = k = len(self.indicadores)
+
+        base = base.sort_values(["Ano-Referência", "Município"], kind="stable")
+        anos = base["Ano-Referência"].to_numpy()
+        municipios = base["Município"].to_numpy()
+        self._linha = {chave: i for i, chave in enumerate(zip(anos, municipios))}
+
+        # As médias e os rankings são por ano: anos sem mudança vêm do diagnóstico anterior
+        reaproveitar = []
+        if anterior is not None and anterior.indicadores == self.indicadores:
+            reaproveitar = sorted(set(anos_reaproveitados))
+        novos = ~np.isin(anos, reaproveitar)
+        self.tabela = self._montar(base[novos], indice_ranking)
+        if reaproveitar:
+            blocos = [self.tabela] + [anterior._bloco_ano(a) for a in reaproveitar]
+            anos_linhas = np.concatenate(
+                [np.repeat(anos[novos], k)] + [np.full(len(b), a) for a, b in zip(reaproveitar, blocos[1:])]
+            )
+            ordem = np.argsort(anos_linhas, kind="stable")
+            self.tabela = pd.concat(blocos, ignore_index=True).take(ordem).reset_index(drop=True)
+
+    def _montar(self, base, indice_ranking):
+        k = self._k
+        anos = base["Ano-Referência"].to_numpy()
+        municipios = base["Município"].to_numpy()
+
+        valores = base[self.indicadores].apply(pd.to_numeric, errors="coerce").astype(float)
+        medias = valores.groupby(anos).transform("mean").to_numpy(dtype=float)
+        valores = valores.to_numpy(dtype=float)
+        diff = (valores - medias).ravel()
+        icones, leituras = classificar_gaps(diff)
+
+        chave = pd.MultiIndex.from_arrays(
+            [np.repeat(anos, k), np.repeat(municipios, k), np.tile(self.indicadores, len(base))]
+        )
+        ranks = indice_ranking.tabela.reindex(chave)
+        posicao = ranks["Posição"].to_numpy()
+        ranking = np.where(
+            np.isnan(posicao),
+            "—",
+            pd.Series(posicao).astype("Int64").astype(str).to_numpy() + "º / "
+            + ranks["Total"].astype("Int64").astype(str).to_numpy(),
+        )
+
+        return pd.DataFrame({
+            "Indicador": np.tile(self.indicadores, len(base)),
+            "Descrição": np.tile([nome_indicador(i) for i in self.indicadores], len(base)),
+            "Bloco": np.tile([bloco_indicador(i) for i in self.indicadores], len(base)),
+            "Status": icones,
+            "Leitura": leituras,
+            "Valor Município": valores.ravel(),
+            "Média Estadual": medias.ravel(),
+            "Diferença": diff,
+            "Ranking": ranking,
+            "Posição": posicao,
+        })
+
+    def _bloco_ano(self, ano):
+        """Linhas de um ano da tabela (contíguas: a tabela segue a ordem de ano e município)."""
+        linhas = [i for (a, _), i in self._linha.items() if a == ano]
+        if not linhas:
+            return self.tabela.iloc[0:0]
+        return self.tabela.iloc[min(linhas) * self._k:(max(linhas) + 1) * self._k]
+
+    def municipio(self, ano, municipio):
+        """Tabela de diagnóstico de um município em um ano (vazia se não houver dados)."""
+        i = self._linha.get((ano, municipio))
+        if i is None:
+            return self.tabela.iloc[0:0].copy()
+        return self.tabela.iloc[i * self._k:(i + 1) * self._k].reset_index(drop=True)
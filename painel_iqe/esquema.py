@@ -0,0 +1,142 @@
+# =====================================
+# painel_iqe/esquema.py – Layout da aba RESUMO por edição
+# Zetta Inteligência em Dados
+# =====================================
+#
+# Cada indicador aponta para uma coluna da aba RESUMO da "Memória de cálculo IQE":
+#   (posição, padrão)  -> coluna fixa (0 = coluna A); o padrão valida o cabeçalho
+#   (None, padrão)     -> coluna localizada pelo cabeçalho (deve haver só uma)
+# Os padrões são expressões regulares aplicadas ao texto normalizado
+# (normalizar_nome: maiúsculas, sem acentos, sem símbolos como Δ) de cada uma
+# das três linhas de cabeçalho da aba.
+
+LINHAS_CABECALHO_RESUMO = 3
+
+COLUNAS_TEXTO = ["Município"]
+
+ESQUEMA_RESUMO_PADRAO = {
+    "Código Município": (0, r"CODIGO MUNICIPIO"),
+    "Município": (1, r"MUNICIPIO"),
+    "IQE": (2, r"IQE"),
+    "IQEF": (3, r"IQEF"),
+
+    "IQ2": (4, r"IQ2I\d{4}"),
+    "DeltaIDEN2": (5, r"IDEN2I\d{4}"),
+    "IDE2": (7, r"IDE2I\d{4}"),
+    "PMNLP2": (9, r"PMLP2I\d{4}"),
+    "IDALP2": (10, r"IDALP2I\d{4}"),
+    "TPLP2": (15, r"TPLP2I\d{4}"),
+    "PMNMT2": (17, r"PMMT2I\d{4}"),
+    "IDAMT2": (18, r"IDAMT2I\d{4}"),
+    "TPMT2": (23, r"TPMT2I\d{4}"),
+    "IDE2Anterior": (24, r"IDE2I\d{4}"),
+
+    "IQ5": (41, r"IQ5I\d{4}"),
+    "DeltaIDEN5": (42, r"IDEN5I\d{4}"),
+    "IDE5": (44, r"IDE5I\d{4}"),
+    "PMNLP5": (46, r"PMLP5I\d{4}"),
+    "IDALP5": (47, r"IDALP5I\d{4}"),
+    "TPLP5": (52, r"TPLP5I\d{4}"),
+    "PMNMT5": (54, r"PMMT5I\d{4}"),
+    "IDAMT5": (55, r"IDAMT5I\d{4}"),
+    "TPMT5": (60, r"TPMT5I\d{4}"),
+    "IDE5Anterior": (61, r"IDE5I\d{4}"),
+
+    "P": (None, r".*APROVACAO.*"),
+    "IMEG": (79, r"IMEG"),
+    "IVEC": (80, r"IVEC"),
+    "IEQLP2": (83, r"IEQFSET-1"),
+    "IEQMT2": (92, r"IEQFSET-1"),
+    "IEQLP5": (101, r"IEQFSET-1"),
+    "IEQMT5": (110, r"IEQFSET-1"),
+    "IEQLP2Atual": (87, r"IEQFSET"),
+    "IEQMT2Atual": (96, r"IEQFSET"),
+    "IEQLP5Atual": (105, r"IEQFSET"),
+    "IEQMT5Atual": (114, r"IEQFSET"),
+
+    "ΔDESVFSEtLP2": (89, r"DESVFSETLP2"),
+    "ΔDESVFSEtMT2": (98, r"DESVFSETMT2"),
+    "ΔDESVFSEtLP5": (107, r"DESVFSETLP5"),
+    "ΔDESVFSEtMT5": (116, r"DESVFSETMT5"),
+}
+
+# Edição 2024: os blocos de Matemática repetem o rótulo "LP" no cabeçalho do ΔDESV
+ESQUEMA_RESUMO_2024 = {
+    **ESQUEMA_RESUMO_PADRAO,
+    "ΔDESVFSEtMT2": (98, r"DESVFSETLP2"),
+    "ΔDESVFSEtMT5": (116, r"DESVFSETLP5"),
+}
+
+# Chave = ano da edição (ano do arquivo "Memória de cálculo IQE AAAA")
+ESQUEMAS_RESUMO = {
+    2024: ESQUEMA_RESUMO_2024,
+    2025: ESQUEMA_RESUMO_PADRAO,
+}
+
+
+# Insumos do cálculo: colunas que a aba RESUMO copia (PROCV) das abas do Paebes,
+# da aba P e da aba IMEG. Sufixo "Anterior" = edição anterior do Paebes.
+# (disciplina, etapa) -> coluna do IQ da disciplina na edição atual e na anterior
+INICIO_BLOCO_DISCIPLINA = {
+    ("LP", 2): (8, 25),
+    ("MT", 2): (16, 33),
+    ("LP", 5): (45, 62),
+    ("MT", 5): (53, 70),
+}
+# Colunas após o IQ: PM, IDA, AB, B, P, AV, TP (AB e IDA não entram como insumo)
+DESLOCAMENTO_INSUMO_DISCIPLINA = {"PM": 1, "B": 4, "P": 5, "AV": 6, "TP": 7}
+
+# (disciplina, etapa) -> primeira coluna do bloco de equidade na aba RESUMO:
+# proficiência do 1º e 3º quartis na edição anterior (+0, +1) e na atual (+4, +5)
+INICIO_BLOCO_EQUIDADE = {
+    ("LP", 2): 81,
+    ("MT", 2): 90,
+    ("LP", 5): 99,
+    ("MT", 5): 108,
+}
+
+
+def _esquema_insumos():
+    esquema = {
+        "Código Município": ESQUEMA_RESUMO_PADRAO["Código Município"],
+        "Município": ESQUEMA_RESUMO_PADRAO["Município"],
+        "P": ESQUEMA_RESUMO_PADRAO["P"],
+    }
+    for (disc, etapa), inicios in INICIO_BLOCO_DISCIPLINA.items():
+        for sufixo, inicio in zip(("", "Anterior"), inicios):
+            for sigla, deslocamento in DESLOCAMENTO_INSUMO_DISCIPLINA.items():
+                esquema[f"{sigla}{disc}{etapa}{sufixo}"] = (inicio + deslocamento, rf"{sigla}{disc}{etapa}I\d{{4}}")
+    # Os rótulos dos quartis variam entre edições ("1QLP22022" nos blocos de MT, "1QMT23")
+    for (disc, etapa), inicio in INICIO_BLOCO_EQUIDADE.items():
+        esquema[f"P1Q{disc}{etapa}Anterior"] = (inicio, r"PROFICIENCIA ?1Q.*")
+        esquema[f"P3Q{disc}{etapa}Anterior"] = (inicio + 1, r"PROFICIENCIA ?3Q.*")
+        esquema[f"P1Q{disc}{etapa}"] = (inicio + 4, r"PROFICIENCIA ?1Q.*")
+        esquema[f"P3Q{disc}{etapa}"] = (inicio + 5, r"PROFICIENCIA ?3Q.*")
+    return esquema
+
+
+ESQUEMA_INSUMOS = _esquema_insumos()
+
+# Blocos de colunas desalinhados da coluna Município: {edição: [(primeira, última, linhas)]}.
+# linhas = -1: o valor do município da linha i está na linha i - 1.
+# Edição 2025: o bloco IMEG/IVEC/equidade (CB:DM) está uma linha acima do restante;
+# o valor do primeiro município fica na última linha do cabeçalho. Só com o
+# deslocamento o IQE da aba bate com 0,7 × IQEF + 0,15 × P + 0,15 × IMEG.
+DESLOCAMENTOS_RESUMO = {
+    2025: [(79, 116, -1)],
+}
+
+
+def edicao_layout(edicao):
+    """Edição cujo layout vale para a edição; as ainda não mapeadas usam o mais recente."""
+    return edicao if edicao in ESQUEMAS_RESUMO else max(ESQUEMAS_RESUMO)
+
+
+def deslocamentos_resumo(edicao):
+    """Deslocamentos do layout da edição (os mesmos que esquema_resumo usa)."""
+    return DESLOCAMENTOS_RESUMO.get(edicao_layout(edicao), [])
+
+
+def esquema_resumo(edicao):
+    """Esquema da edição; edições ainda não mapeadas usam o layout mais recente."""
+    return ESQUEMAS_RESUMO[edicao_layout(edicao)]
@@ -0,0 +1,58 @@
+# =====================================
+# painel_iqe/estilos.py – CSS do painel (app e relatórios HTML)
+# Zetta Inteligência em Dados
+# =====================================
+
+CSS_PAINEL = """
+@import url('https://fonts.googleapis.com/css2?family=Montserrat:wght@300;400;600;700&display=swap');
+
+html, body, [class*="css"] {
+  font-family: 'Montserrat', sans-serif;
+  color:#5F6169;
+}
+
+.big-card{
+  background:#3A0057;
+  color:#fff;
+  padding:28px;
+  border-radius:14px;
+  text-align:center;
+  box-shadow:0 0 12px rgba(0,0,0,.15);
+}
+.big-card *{
+  color:#ffffff !important;
+}
+.small-card,.white-card{
+  padding:20px;
+  border-radius:12px;
+  text-align:center;
+  border:1px solid #E0E0E0;
+  box-shadow:0 0 6px rgba(0,0,0,.08);
+}
+.small-card{
+  background:#F3F3F3;
+  color:#3A0057;
+}
+.white-card{
+  background:#fff;
+  color:#3A0057;
+}
+
+.stTabs [data-baseweb="tab-list"] { gap: 10px; }
+.stTabs [data-baseweb="tab"] {
+  background:#fff;
+  color:#3A0057;
+  border:1px solid #E5D9EF;
+  border-radius:10px;
+  padding:10px 16px;
+}
+.stTabs [aria-selected="true"] {
+  background:#3A0057 !important;
+  color:#fff !important;
+}
+
+.dataframe td, .dataframe th {
+  text-align: center !important;
+  vertical-align: middle !important;
+}
+"""
@@ -0,0 +1,297 @@
+# =====================================
+# painel_iqe/exportacao.py – Exportação estática da seção IQE (CDN)
+# Zetta Inteligência em Dados
+# =====================================
+#
+# Pré-calcula todas as combinações município × ano × visão da seção IQE em
+# arquivos estáticos, servidos sem Python por requisição:
+#
+#   index.html                     casca estática (seleção de município, ano e visão)
+#   catalogo.json                  municípios, anos e visões disponíveis
+#   plotly.min.js
+#   paginas/<município>/<visão>-<ano>.json   (visões sem ano: <visão>.json)
+#   manifesto.json                 assinatura das entradas de cada página
+#
+# Cada página é um JSON com os blocos da visão (visoes.py): tabelas e cards
+# como HTML já formatado e figuras Plotly como JSON (data/layout).
+#
+# A assinatura de uma página combina a versão da exportação, a visão, o
+# município, o ano e o hash das linhas da base de cada edição que a visão lê
+# (visoes.VISOES_DE_UM_ANO). Numa nova exportação só as páginas com
+# assinatura diferente da do manifesto são regravadas. Como médias, rankings
+# e min-max dependem de todos os municípios do ano, a granularidade é a
+# edição: corrigir a planilha de 2025 regrava as páginas de 2025 e as que
+# leem todas as edições, e não as demais.
+#
+#   python -m painel_iqe.exportacao --saida site --workers 8
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import plotly
+
+from painel_iqe.estilos import CSS_PAINEL
+from painel_iqe.relatorios import (
+    ARQUIVO_PLOTLYJS,
+    CSS_RELATORIO,
+    RODAPE,
+    contexto_pool,
+    dados_processo,
+    nome_arquivo_municipio,
+    plotlyjs,
+)
+from painel_iqe.visoes import VISOES, VISOES_DE_UM_ANO
+
+# Incrementar sempre que o conteúdo ou o formato das páginas mudar, para regravar tudo
+VERSAO_EXPORTACAO = 3
+
+PASTA_PAGINAS = "paginas"
+ARQUIVO_MANIFESTO = "manifesto.json"
+ARQUIVO_CATALOGO = "catalogo.json"
+
+CASCA_HTML = """<!DOCTYPE html>
+<html lang='pt-BR'>
+<head>
+<meta charset='utf-8'>
+<title>Painel IQE – Zetta Inteligência em Dados</title>
+<style>{css}
+.filtros {{ display: flex; gap: 12px; flex-wrap: wrap; align-items: center; margin-bottom: 12px; }}
+.visoes button {{ background:#fff; color:#3A0057; border:1px solid #E5D9EF; border-radius:10px; padding:8px 14px; cursor:pointer; }}
+.visoes button.ativa {{ background:#3A0057; color:#fff; }}
+</style>
+<script src='{plotlyjs}'></script>
+</head>
+<body>
+<h1>📊 Painel IQE – Municípios</h1>
+<div class='filtros'>
+  <label>Município: <select id='municipio'></select></label>
+  <label>Ano de referência: <select id='ano'></select></label>
+</div>
+<div class='filtros visoes' id='visoes'></div>
+<div id='conteudo'></div>
+{rodape}
+<script>
+let catalogo = null;
+const estado = {{}};
+
+function pagina() {{
+  const visao = catalogo.visoes.find(v => v.chave === estado.visao);
+  const mun = catalogo.municipios.find(m => m.nome === estado.municipio);
+  const sufixo = visao.por_ano ? "-" + estado.ano : "";
+  return "{pasta}/" + mun.pasta + "/" + visao.chave + sufixo + ".json";
+}}
+
+function desenhar() {{
+  location.hash = [estado.municipio, estado.ano, estado.visao].map(encodeURIComponent).join("/");
+  document.querySelectorAll("#visoes button").forEach(b => b.classList.toggle("ativa", b.dataset.chave === estado.visao));
+  fetch(pagina()).then(r => r.json()).then(p => {{
+    const conteudo = document.getElementById("conteudo");
+    conteudo.innerHTML = "<h2>" + p.titulo + "</h2>";
+    p.blocos.forEach(b => {{
+      const div = document.createElement("div");
+      conteudo.appendChild(div);
+      if (b.figura) {{
+        Plotly.newPlot(div, b.figura.data, b.figura.layout, {{responsive: true}});
+      }} else {{
+        div.innerHTML = b.html;
+      }}
+    }});
+  }});
+}}
+
+fetch("{catalogo}").then(r => r.json()).then(c => {{
+  catalogo = c;
+  const [mun, ano, visao] = location.hash.slice(1).split("/").map(decodeURIComponent);
+  estado.municipio = c.municipios.some(m => m.nome === mun) ? mun : c.municipios[0].nome;
+  estado.ano = c.anos.map(String).includes(ano) ? ano : String(c.ano_atual);
+  estado.visao = c.visoes.some(v => v.chave === visao) ? visao : c.visoes[0].chave;
+
+  const selMun = document.getElementById("municipio");
+  c.municipios.forEach(m => selMun.add(new Option(m.nome, m.nome, false, m.nome === estado.municipio)));
+  selMun.onchange = () => {{ estado.municipio = selMun.value; desenhar(); }};
+
+  const selAno = document.getElementById("ano");
+  c.anos.forEach(a => selAno.add(new Option(a, String(a), false, String(a) === estado.ano)));
+  selAno.onchange = () => {{ estado.ano = selAno.value; desenhar(); }};
+
+  const nav = document.getElementById("visoes");
+  c.visoes.forEach(v => {{
+    const b = document.createElement("button");
+    b.textContent = v.titulo;
+    b.dataset.chave = v.chave;
+    b.onclick = () => {{ estado.visao = v.chave; desenhar(); }};
+    nav.appendChild(b);
+  }});
+  desenhar();
+}});
+</script>
+</body>
+</html>
+"""
+
+
+def _hash(*partes):
+    h = hashlib.blake2b(digest_size=16)
+    for parte in partes:
+        h.update(repr(parte).encode())
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def planejar_paginas(dados):
+    """{caminho relativo: (município, visão, ano, assinatura)} de todas as páginas do site."""
+    por_ano = dados.assinaturas
+    paginas = {}
+    for municipio in dados.municipios:
+        pasta = os.path.splitext(nome_arquivo_municipio(municipio))[0]
+        for chave, (_, _, depende_ano) in VISOES.items():
+            for ano in (dados.anos if depende_ano else [None]):
+                lidos = [ano] if chave in VISOES_DE_UM_ANO else dados.anos
+                assinatura = _hash(
+                    VERSAO_EXPORTACAO, plotly.__version__, chave, municipio, ano,
+                    [(a, por_ano[a]) for a in lidos],
+                )
+                nome = f"{chave}-{ano}.json" if depende_ano else f"{chave}.json"
+                paginas[f"{PASTA_PAGINAS}/{pasta}/{nome}"] = (municipio, chave, ano, assinatura)
+    return paginas
+
+
+def json_pagina(dados, municipio, chave, ano):
+    titulo, visao, _ = VISOES[chave]
+    blocos = []
+    for bloco in visao(dados, municipio, ano if ano is not None else dados.ano_atual):
+        if bloco is None:
+            continue
+        if isinstance(bloco, str):
+            blocos.append(json.dumps({"html": bloco}, ensure_ascii=False))
+        else:
+            # to_json da figura já pronta, sem reconstruí-la a partir de um dict
+            blocos.append('{"figura": ' + bloco.to_json() + "}")
+    cabecalho = json.dumps({"titulo": titulo, "municipio": municipio, "ano": ano}, ensure_ascii=False)
+    return cabecalho[:-1] + ', "blocos": [' + ", ".join(blocos) + "]}"
+
+
+def _gravar(caminho, texto):
+    """Grava via arquivo temporário + rename, para o servidor nunca ler uma página pela metade."""
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write(texto)
+    os.replace(temporario, caminho)
+
+
+def _exportar(saida, paginas):
+    """Grava [(caminho relativo, município, visão, ano)] no processo atual."""
+    dados = dados_processo()
+    for relativo, municipio, chave, ano in paginas:
+        _gravar(os.path.join(saida, relativo), json_pagina(dados, municipio, chave, ano))
+    return len(paginas)
+
+
+def ler_manifesto(saida):
+    try:
+        with open(os.path.join(saida, ARQUIVO_MANIFESTO), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def exportar_site(saida, workers=None, completo=False, dir_dados=None, dir_cache=None):
+    """Exporta (ou atualiza) o site estático em `saida`; devolve as estatísticas da execução."""
+    inicio = time.perf_counter()
+    dados = dados_processo(dir_dados, dir_cache)
+    paginas = planejar_paginas(dados)
+
+    manifesto = ler_manifesto(saida)
+    anteriores = {} if completo else manifesto.get("paginas", {})
+    pendentes = [
+        (relativo, municipio, chave, ano)
+        for relativo, (municipio, chave, ano, assinatura) in paginas.items()
+        if anteriores.get(relativo) != assinatura or not os.path.exists(os.path.join(saida, relativo))
+    ]
+
+    # Agrupadas por município: as figuras do município ficam no cache do mesmo processo
+    por_municipio = defaultdict(list)
+    for pagina in pendentes:
+        por_municipio[pagina[1]].append(pagina)
+    lotes = list(por_municipio.values())
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(lotes) or 1))
+    if workers > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=contexto_pool(),
+            initializer=dados_processo, initargs=(dir_dados, dir_cache),
+        ) as pool:
+            gravadas = sum(pool.map(_exportar, [saida] * len(lotes), lotes))
+    else:
+        gravadas = sum(_exportar(saida, lote) for lote in lotes)
+
+    removidas = 0
+    for relativo in set(anteriores) - set(paginas):
+        try:
+            os.remove(os.path.join(saida, relativo))
+            removidas += 1
+        except FileNotFoundError:
+            pass
+
+    catalogo = {
+        "anos": dados.anos,
+        "ano_atual": dados.ano_atual,
+        "municipios": [
+            {"nome": m, "pasta": os.path.splitext(nome_arquivo_municipio(m))[0]} for m in dados.municipios
+        ],
+        "visoes": [
+            {"chave": chave, "titulo": titulo, "por_ano": depende_ano}
+            for chave, (titulo, _, depende_ano) in VISOES.items()
+        ],
+    }
+    _gravar(os.path.join(saida, ARQUIVO_CATALOGO), json.dumps(catalogo, ensure_ascii=False))
+    _gravar(os.path.join(saida, "index.html"), CASCA_HTML.format(
+        css=CSS_PAINEL + CSS_RELATORIO, plotlyjs=ARQUIVO_PLOTLYJS, rodape=RODAPE,
+        pasta=PASTA_PAGINAS, catalogo=ARQUIVO_CATALOGO,
+    ))
+    if manifesto.get("plotly") != plotly.__version__ or not os.path.exists(os.path.join(saida, ARQUIVO_PLOTLYJS)):
+        _gravar(os.path.join(saida, ARQUIVO_PLOTLYJS), plotlyjs())
+
+    # O manifesto vai por último: uma exportação interrompida é refeita na próxima
+    _gravar(os.path.join(saida, ARQUIVO_MANIFESTO), json.dumps({
+        "versao": VERSAO_EXPORTACAO,
+        "plotly": plotly.__version__,
+        "paginas": {relativo: p[3] for relativo, p in paginas.items()},
+    }, ensure_ascii=False, indent=0))
+
+    return {
+        "paginas": len(paginas),
+        "gravadas": gravadas,
+        "reaproveitadas": len(paginas) - gravadas,
+        "removidas": removidas,
+        "workers": workers,
+        "tempo_s": time.perf_counter() - inicio,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta a seção IQE do painel como site estático.")
+    parser.add_argument("--saida", default="site", help="pasta do site (padrão: site/)")
+    parser.add_argument("--workers", type=int, default=None, help="processos (padrão: número de CPUs)")
+    parser.add_argument("--completo", action="store_true", help="regrava todas as páginas, ignorando o manifesto")
+    parser.add_argument("--dir-dados", default=None, help="pasta com as planilhas (padrão: data/)")
+    args = parser.parse_args(argv)
+
+    est = exportar_site(args.saida, args.workers, args.completo, args.dir_dados)
+    print(
+        f"{est['paginas']} páginas: {est['gravadas']} gravadas, {est['reaproveitadas']} reaproveitadas, "
+        f"{est['removidas']} removidas em {est['tempo_s']:.2f} s com {est['workers']} processo(s) -> "
+        f"{os.path.join(args.saida, 'index.html')}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
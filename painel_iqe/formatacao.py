@@ -0,0 +1,119 @@
+# =====================================
+# painel_iqe/formatacao.py – Formatação numérica (padrão Brasil)
+# Zetta Inteligência em Dados
+# =====================================
+#
+# fmt_br_* formatam um valor; fmt_br_*_col formatam uma coluna inteira
+# (Series, array ou lista) de uma vez e devolvem exatamente o mesmo texto
+# que a versão de um valor aplicada elemento a elemento, com "—" para
+# None/NaN/inf. Os dígitos de todos os valores são montados numa matriz de
+# caracteres, vista depois como um array de strings; só os valores cujo
+# arredondamento fica ambíguo no float (meio exato após a escala) ou muito
+# grandes passam pela formatação de um valor.
+
+import numpy as np
+import pandas as pd
+
+# Acima disto o valor escalado já não é representado exatamente em int64/float
+LIMITE_VETORIAL = 1e15
+
+
+def fmt_br_num(v, nd=2):
+    try:
+        if v is None:
+            return "—"
+        if isinstance(v, (float, np.floating)) and (np.isnan(v) or np.isinf(v)):
+            return "—"
+        s = f"{float(v):,.{nd}f}"
+        return s.replace(",", "X").replace(".", ",").replace("X", ".")
+    except Exception:
+        return "—"
+
+
+def fmt_br_money(v, nd=2):
+    return f"R$ {fmt_br_num(v, nd)}" if v is not None else "—"
+
+
+def fmt_br_pct(v, nd=2):
+    return f"{fmt_br_num(v, nd)}%" if v is not None else "—"
+
+
+def _como_float(valores):
+    if not isinstance(valores, (pd.Series, np.ndarray)):
+        valores = pd.Series(list(valores), dtype=object)
+    return np.asarray(pd.to_numeric(valores, errors="coerce"), dtype=np.float64)
+
+
+def _matriz_texto(inteiro, decimal, negativo, nd):
+    """Texto pt-BR de cada linha montado como matriz de code points (alinhado à direita, depois à esquerda)."""
+    n = len(inteiro)
+    digitos = np.ones(n, dtype=np.int64)
+    potencia = 10
+    while n and potencia <= inteiro.max():
+        digitos += inteiro >= potencia
+        potencia *= 10
+    max_digitos = int(digitos.max(initial=1))
+    largura_inteiro = max_digitos + (max_digitos - 1) // 3
+    largura = 1 + largura_inteiro + (nd + 1 if nd else 0)
+
+    matriz = np.zeros((n, largura), dtype=np.uint32)
+    col = largura - 1
+    for d in range(nd):
+        matriz[:, col] = ord("0") + (decimal // 10 ** d) % 10
+        col -= 1
+    if nd:
+        matriz[:, col] = ord(",")
+        col -= 1
+    for q in range(largura_inteiro):
+        # Da direita para a esquerda: três dígitos, um ponto, três dígitos...
+        d = q - q // 4
+        valido = d < digitos
+        if (q + 1) % 4 == 0:
+            matriz[:, col] = np.where(valido, ord("."), 0)
+        else:
+            matriz[:, col] = np.where(valido, ord("0") + (inteiro // 10 ** d) % 10, 0)
+        col -= 1
+
+    comprimento = digitos + (digitos - 1) // 3 + (nd + 1 if nd else 0) + negativo
+    inicio = largura - comprimento
+    matriz[np.flatnonzero(negativo), inicio[negativo]] = ord("-")
+    # Alinhado à esquerda, os zeros à direita são descartados pelo tipo U
+    idx = np.arange(largura)[None, :] + inicio[:, None]
+    matriz = np.take_along_axis(matriz, np.minimum(idx, largura - 1), axis=1) * (idx < largura)
+    return matriz.view(f"<U{largura}").ravel()
+
+
+def _formatar_col(valores, nd, prefixo="", sufixo=""):
+    indice = valores.index if isinstance(valores, pd.Series) else None
+    v = _como_float(valores)
+    saida = np.full(v.shape, "—", dtype=object)
+
+    finitos = np.isfinite(v)
+    escala = 10 ** nd
+    with np.errstate(invalid="ignore", over="ignore"):
+        escalado = np.abs(v) * escala
+        fracao = escalado - np.floor(escalado)
+        vetoriais = finitos & (np.abs(fracao - 0.5) > 1e-6) & (escalado < LIMITE_VETORIAL)
+
+    inteiro, decimal = np.divmod(np.rint(escalado[vetoriais]).astype(np.int64), escala)
+    texto = _matriz_texto(inteiro, decimal, np.signbit(v[vetoriais]), nd).astype(object)
+    saida[vetoriais] = prefixo + texto + sufixo if prefixo or sufixo else texto
+    for i in np.flatnonzero(finitos & ~vetoriais):
+        saida[i] = f"{prefixo}{fmt_br_num(v[i], nd)}{sufixo}"
+
+    return saida if indice is None else pd.Series(saida, index=indice, name=valores.name)
+
+
+def fmt_br_num_col(valores, nd=2):
+    """fmt_br_num de cada valor (Series -> Series com o mesmo índice; demais -> array)."""
+    return _formatar_col(valores, nd)
+
+
+def fmt_br_money_col(valores, nd=2):
+    """fmt_br_money de cada valor, com "—" (sem o "R$") onde não há valor."""
+    return _formatar_col(valores, nd, prefixo="R$ ")
+
+
+def fmt_br_pct_col(valores, nd=2):
+    """fmt_br_pct de cada valor, com "—" (sem o "%") onde não há valor."""
+    return _formatar_col(valores, nd, sufixo="%")
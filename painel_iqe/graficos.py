@@ -0,0 +1,510 @@
+# =====================================
+# painel_iqe/graficos.py – Figuras Plotly do painel IQE
+# Zetta Inteligência em Dados
+# =====================================
+#
+# Funções puras: recebem a BaseIndexada e os parâmetros da visão e devolvem a
+# figura (ou None quando não há dados). Não dependem do Streamlit, o que permite
+# guardá-las no cache de figuras e reaproveitá-las fora do app.
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from painel_iqe.formatacao import fmt_br_money, fmt_br_num_col
+from painel_iqe.indicadores import PESOS_IQE, nome_indicador
+from painel_iqe.normalizacao import NORMALIZACAO_PADRAO, NORMALIZACOES
+
+COL_ICMS = "ICMS_Educacional_Estimado"
+
+COLUNAS_RADAR = {
+    "IQEF – Geral": [
+        "IQ2", "IDE2", "PMNLP2", "PMNMT2", "IDALP2", "IDAMT2", "TPLP2", "TPMT2",
+        "IQ5", "IDE5", "PMNLP5", "PMNMT5", "IDALP5", "IDAMT5", "TPLP5", "TPMT5"
+    ],
+    "IQEF – 2º ano": ["IQ2", "IDE2", "PMNLP2", "PMNMT2", "IDALP2", "IDAMT2", "TPLP2", "TPMT2"],
+    "IQEF – 5º ano": ["IQ5", "IDE5", "PMNLP5", "PMNMT5", "IDALP5", "IDAMT5", "TPLP5", "TPMT5"],
+    "IMEG": ["IVEC", "IEQLP2", "IEQMT2", "IEQLP5", "IEQMT5"],
+}
+MODOS_RADAR = list(COLUNAS_RADAR)
+
+# Ranking IQE: acima deste número de entidades (ex.: escolas) o gráfico usa WebGL
+LIMIAR_WEBGL = 1000
+ALTURA_POR_LINHA_RANKING = 22
+ALTURA_MAX_RANKING = 4000
+COR_RANKING = "#C2A4CF"
+COR_DESTAQUE = "#3A0057"
+HOVER_RANKING_IQE = "<b>%{y}</b><br>Ranking: %{customdata[0]}º<br>IQE: %{x:.3f}<br>ICMS: R$ %{customdata[1]:,.2f}<extra></extra>"
+
+COLUNAS_DESV = ["ΔDESVFSEtLP2", "ΔDESVFSEtMT2", "ΔDESVFSEtLP5", "ΔDESVFSEtMT5"]
+
+COR_BLOCO = {
+    "IQEF - 2º ano": "#3A0057",
+    "IQEF - 5º ano": "#B48FD0",
+    "P": "#F28E2B",
+    "IMEG - 2º ano": "#00A3A3",
+    "IMEG - 5º ano": "#4CB7B0",
+    "IMEG - Geral": "#0A7C86",
+    "Outros": "#7F7F7F"
+}
+
+
+# ---------------------------------------------------------
+# RESUMO GERAL
+# ---------------------------------------------------------
+def grafico_faixa_icms(dados, municipio, ano_ref):
+    faixa = dados.estatisticas(COL_ICMS, ano_ref)
+
+    if not np.isfinite(faixa["media"]):
+        return None
+
+    v_mun = dados.valor(COL_ICMS, municipio, ano_ref)
+    v_min = faixa["minimo"]
+    v_max = faixa["maximo"]
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatter(
+        x=[v_min, v_max],
+        y=[0, 0],
+        mode="lines",
+        line=dict(color="#C9B7D8", width=18),
+        showlegend=False,
+        hoverinfo="skip"
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=[v_min],
+        y=[0],
+        mode="markers+text",
+        marker=dict(size=12, color="#7A7A7A", symbol="line-ns-open"),
+        text=[f"Mínimo<br>{fmt_br_money(v_min, 2)}"],
+        textposition="top center",
+        showlegend=False,
+        textfont=dict(color="#555555", size=12)
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=[v_max],
+        y=[0],
+        mode="markers+text",
+        marker=dict(size=12, color="#7A7A7A", symbol="line-ns-open"),
+        text=[f"Máximo<br>{fmt_br_money(v_max, 2)}"],
+        textposition="top center",
+        showlegend=False,
+        textfont=dict(color="#555555", size=12)
+    ))
+
+    if np.isfinite(v_mun):
+        fig.add_trace(go.Scatter(
+            x=[v_mun],
+            y=[0],
+            mode="markers+text",
+            marker=dict(size=20, color="#3A0057", symbol="diamond"),
+            text=[f"{municipio}<br>{fmt_br_money(v_mun, 2)}"],
+            textposition="bottom center",
+            showlegend=False,
+            textfont=dict(color="#2b2b2b", size=12)
+        ))
+
+    fig.update_layout(
+        title=f"Ano de referência {ano_ref}",
+        template="simple_white",
+        height=250,
+        margin=dict(l=20, r=20, t=50, b=30),
+        xaxis_title="Valor do ICMS Educacional (R$)",
+        yaxis=dict(visible=False, showticklabels=False),
+    )
+
+    return fig
+
+
+# ---------------------------------------------------------
+# DECOMPOSIÇÃO IQE
+# ---------------------------------------------------------
+def grafico_decomposicao(dados, municipio):
+    linhas_comp = []
+    for comp, peso in PESOS_IQE.items():
+        for ano in dados.anos:
+            est = dados.estatisticas(comp, ano)
+            linhas_comp.append({
+                "Ano": ano,
+                "Componente": comp,
+                "Peso": peso,
+                "Município": dados.valor(comp, municipio, ano),
+                "Média": est["media"],
+                "Mínimo": est["minimo"],
+                "Máximo": est["maximo"],
+                "Label": f"{comp} ({int(peso*100)}%) – {int(ano)}"
+            })
+
+    df_comp = pd.DataFrame(linhas_comp)
+    labels_ordenadas = df_comp["Label"].tolist()
+    y_map = {lab: i for i, lab in enumerate(labels_ordenadas)}
+    df_comp["y"] = df_comp["Label"].map(y_map)
+
+    fig = go.Figure()
+
+    faixas = zip(fmt_br_num_col(df_comp["Mínimo"], 3), fmt_br_num_col(df_comp["Máximo"], 3))
+    for (_, r), (texto_min, texto_max) in zip(df_comp.iterrows(), faixas):
+        cor_faixa = "rgba(58,0,87,0.18)" if r["Ano"] == dados.ano_atual else "rgba(194,164,207,0.30)"
+        fig.add_trace(go.Bar(
+            y=[r["y"]],
+            x=[r["Máximo"] - r["Mínimo"]],
+            base=r["Mínimo"],
+            orientation="h",
+            marker_color=cor_faixa,
+            showlegend=False,
+            width=0.82,
+            hovertemplate=f"{r['Label']}<br>Faixa estadual: {texto_min} a {texto_max}<extra></extra>"
+        ))
+
+    fig.add_trace(go.Scatter(
+        y=df_comp["y"],
+        x=df_comp["Município"],
+        mode="markers+text",
+        marker=dict(symbol="square", size=10, color="#3A0057"),
+        text=fmt_br_num_col(df_comp["Município"], 3),
+        textposition="middle right",
+        name="Município",
+        hovertemplate="%{text}<extra>Município</extra>"
+    ))
+
+    fig.add_trace(go.Scatter(
+        y=df_comp["y"],
+        x=df_comp["Média"],
+        mode="markers",
+        marker=dict(symbol="diamond", size=11, color="#8D6AAE"),
+        name="Média Estadual",
+        hovertemplate="Média estadual: %{x:.3f}<extra></extra>"
+    ))
+
+    fig.update_layout(
+        height=max(600, 100 * len(labels_ordenadas)),
+        template="simple_white",
+        xaxis=dict(range=[0, 1.05], title="Valor", showgrid=True, gridcolor="rgba(0,0,0,0.05)"),
+        yaxis=dict(
+            title="",
+            tickmode="array",
+            tickvals=list(range(len(labels_ordenadas))),
+            ticktext=labels_ordenadas,
+            autorange="reversed"
+        ),
+        title=f"Comparação por componente — {municipio}",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0.02),
+        margin=dict(t=90, b=40, l=40, r=40)
+    )
+
+    return fig
+
+
+# ---------------------------------------------------------
+# IQEF E IMEG DETALHADOS
+# ---------------------------------------------------------
+def eixo_radar(normalizacao, valores):
+    """Eixo radial do radar: 0 a 1 (mín–máx, percentil) ou simétrico em torno de 0 (escore z)."""
+    if normalizacao == "zscore":
+        limite = max(2, int(np.ceil(np.nanmax(np.abs(valores), initial=0))))
+        ticks = list(range(-limite, limite + 1))
+        return dict(range=[-limite, limite], tickvals=ticks, ticktext=list(fmt_br_num_col(ticks, 0)))
+    ticks = [0, 0.25, 0.5, 0.75, 1.0]
+    if normalizacao == "percentil":
+        return dict(range=[0, 1], tickvals=ticks, ticktext=["0%", "25%", "50%", "75%", "100%"])
+    return dict(range=[0, 1], tickvals=ticks, ticktext=["0", "0,25", "0,50", "0,75", "1,00"])
+
+
+def grafico_radar(dados, municipio, ano, modo_radar, normalizacao=NORMALIZACAO_PADRAO):
+    """Radar município × média estadual; None se faltarem indicadores ou o município."""
+    cols_radar = [c for c in COLUNAS_RADAR[modo_radar] if c in dados.pos_indicador]
+
+    if not cols_radar or not dados.tem_municipio(ano, municipio):
+        return None
+
+    # Linha do município e médias estaduais já normalizadas na carga (BaseIndexada.normalizados)
+    linha_mun, media_est = dados.normalizado(normalizacao, municipio, ano, cols_radar)
+
+    categorias = [nome_indicador(c) for c in cols_radar]
+    categorias = categorias + [categorias[0]]
+
+    valores_mun = linha_mun.tolist() + [linha_mun.tolist()[0]]
+    valores_med = media_est.tolist() + [media_est.tolist()[0]]
+    titulo = modo_radar if normalizacao == NORMALIZACAO_PADRAO else f"{modo_radar}; {NORMALIZACOES[normalizacao]}"
+
+    fig_radar = go.Figure()
+
+    fig_radar.add_trace(go.Scatterpolar(
+        r=valores_med,
+        theta=categorias,
+        fill='toself',
+        name='Média Estadual',
+        line=dict(color='#00A3A3', width=2),
+        fillcolor='rgba(0,163,163,0.25)'
+    ))
+
+    fig_radar.add_trace(go.Scatterpolar(
+        r=valores_mun,
+        theta=categorias,
+        fill='toself',
+        name=municipio,
+        line=dict(color='#3A0057', width=2),
+        fillcolor='rgba(58,0,87,0.35)'
+    ))
+
+    fig_radar.update_layout(
+        title=f"{municipio} × Média Estadual — posição relativa dos indicadores ({titulo})",
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                **eixo_radar(normalizacao, np.concatenate([linha_mun, media_est])),
+                gridcolor='rgba(0,0,0,0.08)'
+            )
+        ),
+        showlegend=True,
+        legend=dict(orientation='h', y=-0.15, x=0.25),
+        height=650,
+        font=dict(family='Montserrat', size=12, color='#3A0057'),
+        paper_bgcolor='white',
+        plot_bgcolor='white'
+    )
+
+    return fig_radar
+
+
+# ---------------------------------------------------------
+# DIAGNÓSTICO DOS SUBINDICADORES
+# ---------------------------------------------------------
+def grafico_ranking_subindicadores(dados, municipio, ano):
+    df_diag = dados.diagnostico.municipio(ano, municipio)
+    df_rank_plot = df_diag.dropna(subset=["Posição"]).sort_values("Posição", ascending=False)
+
+    cores = [COR_BLOCO.get(g, "#7F7F7F") for g in df_rank_plot["Bloco"]]
+
+    fig_rank_sub = go.Figure()
+    fig_rank_sub.add_trace(go.Bar(
+        x=df_rank_plot["Posição"],
+        y=df_rank_plot["Indicador"],
+        orientation="h",
+        marker_color=cores,
+        text=df_rank_plot["Ranking"],
+        textposition="outside",
+        textfont=dict(color="black", size=13),
+        customdata=np.stack([df_rank_plot["Descrição"], df_rank_plot["Bloco"]], axis=-1),
+        hovertemplate="<b>%{y}</b><br>%{customdata[0]}<br>Bloco: %{customdata[1]}<br>Ranking: %{text}<extra></extra>"
+    ))
+
+    fig_rank_sub.update_layout(
+        title="Posição do município nos subindicadores",
+        xaxis_title="Posição no ranking estadual",
+        yaxis_title="Indicador",
+        template="simple_white",
+        height=1050
+    )
+
+    return fig_rank_sub
+
+
+# ---------------------------------------------------------
+# EVOLUÇÃO & EQUIDADE
+# ---------------------------------------------------------
+def grafico_evolucao_iqe(dados, municipio):
+    hist_mun = pd.DataFrame({"Ano-Referência": dados.anos, "IQE": dados.historico("IQE", municipio)}).dropna()
+
+    if hist_mun.empty:
+        return None
+
+    estat = dados.estatisticas_por_ano("IQE")
+
+    fig1 = go.Figure()
+    fig1.add_trace(go.Scatter(
+        x=hist_mun["Ano-Referência"],
+        y=hist_mun["IQE"],
+        mode="lines+markers",
+        name=municipio,
+        line=dict(color="#3A0057", width=4),
+        marker=dict(size=9)
+    ))
+    fig1.add_trace(go.Scatter(
+        x=estat["Ano-Referência"],
+        y=estat["Média"],
+        mode="lines+markers",
+        name="Média Estadual",
+        line=dict(color="#B48FD0", dash="dash", width=3)
+    ))
+    fig1.add_trace(go.Scatter(
+        x=estat["Ano-Referência"],
+        y=estat["Mín"],
+        mode="lines",
+        name="Mínimo Estadual",
+        line=dict(color="#999999", dash="dot", width=2.5)
+    ))
+    fig1.add_trace(go.Scatter(
+        x=estat["Ano-Referência"],
+        y=estat["Máx"],
+        mode="lines",
+        name="Máximo Estadual",
+        line=dict(color="#666666", dash="dot", width=2.5)
+    ))
+
+    fig1.update_layout(
+        title=f"Evolução do IQE ({municipio})",
+        xaxis=dict(
+            title="Ano de Referência",
+            tickmode="array",
+            tickvals=sorted(hist_mun["Ano-Referência"].unique()),
+            ticktext=[str(int(x)) for x in sorted(hist_mun["Ano-Referência"].unique())]
+        ),
+        yaxis=dict(title="IQE", range=[0, 1]),
+        height=470,
+        plot_bgcolor="white",
+        paper_bgcolor="white",
+        margin=dict(t=90, b=50, l=50, r=30),
+        legend=dict(orientation="h", yanchor="bottom", y=1.12, xanchor="center", x=0.5),
+        font=dict(family="Montserrat", size=12, color="#3A0057")
+    )
+
+    return fig1
+
+
+def grafico_desv(dados, municipio):
+    """ΔDESV por edição; None com menos de duas edições ou sem colunas ΔDESV."""
+    cols_desv = [c for c in COLUNAS_DESV if c in dados.pos_indicador]
+
+    if len(dados.anos) < 2 or not cols_desv:
+        return None
+
+    def cor_edicao(ano_ref):
+        if ano_ref == dados.ano_atual:
+            return "#3A0057"
+        if ano_ref == dados.ano_anterior:
+            return "#C2A4CF"
+        return "#E5D9EF"
+
+    fig2 = go.Figure()
+    for ano_ref in dados.anos:
+        v_ano = [dados.valor(c, municipio, ano_ref) for c in cols_desv]
+        fig2.add_trace(go.Bar(
+            x=[nome_indicador(c) for c in cols_desv],
+            y=v_ano,
+            name=f"Edição {int(ano_ref)}",
+            marker_color=cor_edicao(ano_ref),
+            text=fmt_br_num_col(v_ano, 3),
+            textposition="outside"
+        ))
+    fig2.update_layout(
+        barmode="group",
+        yaxis=dict(range=[0, 1], title="Valor"),
+        xaxis_title="Indicador de equidade",
+        height=460,
+        plot_bgcolor="white",
+        paper_bgcolor="white",
+        font=dict(family="Montserrat", size=12, color="#3A0057")
+    )
+
+    return fig2
+
+
+# ---------------------------------------------------------
+# RANKING IQE
+# ---------------------------------------------------------
+def tabela_ranking_iqe(dados, ano):
+    """Municípios com IQE no ano, do maior para o menor, com a posição no ranking."""
+    df_rank = dados.ano(ano)[["Município", "IQE", COL_ICMS]]
+    df_rank = df_rank.dropna(subset=["IQE"]).sort_values("IQE", ascending=False).reset_index(drop=True)
+    df_rank["Ranking"] = df_rank["Município"].map(dados.ranking.ano(ano, "IQE")["Posição"]).astype(int)
+    return df_rank
+
+
+def grafico_ranking_iqe_base(dados, ano):
+    """Ranking de todos os municípios no ano, sem destaque (igual para todas as sessões).
+
+    Acima de LIMIAR_WEBGL entidades as barras viram pontos em WebGL (Scattergl)
+    e a altura é limitada a ALTURA_MAX_RANKING, com os rótulos do eixo ocultos.
+    """
+    df_rank = tabela_ranking_iqe(dados, ano)
+    n = len(df_rank)
+    webgl = n > LIMIAR_WEBGL
+    altura = max(900, n * ALTURA_POR_LINHA_RANKING)
+
+    comuns = dict(
+        x=df_rank["IQE"].to_numpy(),
+        y=df_rank["Município"].to_numpy(dtype=object),
+        customdata=np.stack([df_rank["Ranking"], df_rank[COL_ICMS]], axis=-1),
+        hovertemplate=HOVER_RANKING_IQE,
+        name="IQE",
+        showlegend=False,
+    )
+    fig = go.Figure()
+    if webgl:
+        fig.add_trace(go.Scattergl(mode="markers", marker=dict(color=COR_RANKING, size=6), **comuns))
+    else:
+        fig.add_trace(go.Bar(
+            orientation="h",
+            marker_color=COR_RANKING,
+            text=(df_rank["Ranking"].astype(str) + "º").to_numpy(dtype=object),
+            textposition="inside",
+            insidetextanchor="start",
+            textfont=dict(color="black", size=13),
+            **comuns
+        ))
+
+    fig.update_layout(
+        title=f"Ranking completo pelo IQE – referência {ano}",
+        xaxis_title="IQE",
+        yaxis_title="Município",
+        yaxis=dict(showticklabels=altura <= ALTURA_MAX_RANKING),
+        template="simple_white",
+        barmode="overlay",
+        height=min(altura, ALTURA_MAX_RANKING),
+        margin=dict(l=120, r=60, t=60, b=40)
+    )
+
+    return fig
+
+
+def destacar_ranking_iqe(fig_base, dados, municipio, ano):
+    """Cópia da figura base com o município selecionado sobreposto (uma barra e um rótulo)."""
+    fig = go.Figure(fig_base)
+
+    iqe = dados.valor("IQE", municipio, ano)
+    posicao, _ = dados.ranking.posicao(ano, municipio, "IQE")
+    if posicao is None or not np.isfinite(iqe):
+        return fig
+
+    destaque = dict(
+        x=[iqe],
+        y=[municipio],
+        customdata=[[posicao, dados.valor(COL_ICMS, municipio, ano)]],
+        hovertemplate=HOVER_RANKING_IQE,
+        name=municipio,
+        showlegend=False,
+    )
+    if isinstance(fig_base.data[0], go.Scattergl):
+        fig.add_trace(go.Scattergl(mode="markers", marker=dict(color=COR_DESTAQUE, size=12), **destaque))
+    else:
+        fig.add_trace(go.Bar(
+            orientation="h",
+            marker_color=COR_DESTAQUE,
+            text=[f"{posicao}º"],
+            textposition="inside",
+            insidetextanchor="start",
+            textfont=dict(color="black", size=13),
+            **destaque
+        ))
+
+    # camada só para destacar o município selecionado com texto mais visível
+    fig.add_trace(go.Scatter(
+        x=[iqe],
+        y=[municipio],
+        mode="text",
+        text=[f"{posicao}º lugar"],
+        textposition="middle right",
+        textfont=dict(color="black", size=16),
+        showlegend=False,
+        hoverinfo="skip"
+    ))
+
+    return fig
+
+
+def grafico_ranking_iqe(dados, municipio, ano):
+    return destacar_ranking_iqe(grafico_ranking_iqe_base(dados, ano), dados, municipio, ano)
@@ -0,0 +1,122 @@
+# =====================================
+# painel_iqe/indicadores.py – Dicionário e agrupamento dos indicadores
+# Zetta Inteligência em Dados
+# =====================================
+
+INDICADOR_DESC = {
+    "IQE": "Índice de Qualidade Educacional",
+    "IQEF": "Indicador de Qualidade dos Anos Iniciais do Ensino Fundamental",
+    "P": "Indicador da Taxa de Aprovação",
+    "IMEG": "Indicador de Melhoria da Equidade Global considerando o Nível Socioeconômico",
+
+    "IQ2": "Indicador do 2º ano",
+    "IQ5": "Indicador do 5º ano",
+    "IDE2": "Indicador de Desempenho do 2º ano",
+    "IDE5": "Indicador de Desempenho do 5º ano",
+
+    "PMNLP2": "Proficiência Média Normalizada de Língua Portuguesa - 2º ano",
+    "PMNMT2": "Proficiência Média Normalizada de Matemática - 2º ano",
+    "PMNLP5": "Proficiência Média Normalizada de Língua Portuguesa - 5º ano",
+    "PMNMT5": "Proficiência Média Normalizada de Matemática - 5º ano",
+
+    "IDALP2": "Indicador de Distribuição dos Alunos por Padrão de Desempenho em Língua Portuguesa - 2º ano",
+    "IDAMT2": "Indicador de Distribuição dos Alunos por Padrão de Desempenho em Matemática - 2º ano",
+    "IDALP5": "Indicador de Distribuição dos Alunos por Padrão de Desempenho em Língua Portuguesa - 5º ano",
+    "IDAMT5": "Indicador de Distribuição dos Alunos por Padrão de Desempenho em Matemática - 5º ano",
+
+    "TPLP2": "Taxa de Participação em Língua Portuguesa - 2º ano",
+    "TPMT2": "Taxa de Participação em Matemática - 2º ano",
+    "TPLP5": "Taxa de Participação em Língua Portuguesa - 5º ano",
+    "TPMT5": "Taxa de Participação em Matemática - 5º ano",
+
+    "IVEC": "Indicador de Variação da Equidade",
+    "IEQLP2": "Indicador de Equidade em Língua Portuguesa - 2º ano",
+    "IEQMT2": "Indicador de Equidade em Matemática - 2º ano",
+    "IEQLP5": "Indicador de Equidade em Língua Portuguesa - 5º ano",
+    "IEQMT5": "Indicador de Equidade em Matemática - 5º ano",
+
+    "IDE2Anterior": "Indicador de Desempenho do 2º ano na edição anterior",
+    "IDE5Anterior": "Indicador de Desempenho do 5º ano na edição anterior",
+    "IEQLP2Atual": "Indicador de Equidade em Língua Portuguesa - 2º ano (edição atual)",
+    "IEQMT2Atual": "Indicador de Equidade em Matemática - 2º ano (edição atual)",
+    "IEQLP5Atual": "Indicador de Equidade em Língua Portuguesa - 5º ano (edição atual)",
+    "IEQMT5Atual": "Indicador de Equidade em Matemática - 5º ano (edição atual)",
+
+    "DeltaIDEN2": "Variação padronizada do desempenho do 2º ano",
+    "DeltaIDEN5": "Variação padronizada do desempenho do 5º ano",
+
+    "ΔDESVFSEtLP2": "Variação do indicador de equidade em Língua Portuguesa - 2º ano",
+    "ΔDESVFSEtMT2": "Variação do indicador de equidade em Matemática - 2º ano",
+    "ΔDESVFSEtLP5": "Variação do indicador de equidade em Língua Portuguesa - 5º ano",
+    "ΔDESVFSEtMT5": "Variação do indicador de equidade em Matemática - 5º ano",
+}
+
+ORDEM_IQEF_2 = [
+    "IQ2", "IDE2", "PMNLP2", "PMNMT2", "IDALP2", "IDAMT2", "TPLP2", "TPMT2", "DeltaIDEN2"
+]
+ORDEM_IQEF_5 = [
+    "IQ5", "IDE5", "PMNLP5", "PMNMT5", "IDALP5", "IDAMT5", "TPLP5", "TPMT5", "DeltaIDEN5"
+]
+ORDEM_P = ["P"]
+ORDEM_IMEG_2 = ["IEQLP2", "IEQMT2", "ΔDESVFSEtLP2", "ΔDESVFSEtMT2"]
+ORDEM_IMEG_5 = ["IEQLP5", "IEQMT5", "ΔDESVFSEtLP5", "ΔDESVFSEtMT5"]
+ORDEM_IMEG_GERAL = ["IVEC"]
+
+# Pesos oficiais dos componentes no IQE
+PESOS_IQE = {"IQEF": 0.70, "P": 0.15, "IMEG": 0.15}
+
+
+def nome_indicador(sigla):
+    return INDICADOR_DESC.get(sigla, sigla)
+
+
+def bloco_indicador(sigla):
+    if sigla in ORDEM_IQEF_2:
+        return "IQEF - 2º ano"
+    if sigla in ORDEM_IQEF_5:
+        return "IQEF - 5º ano"
+    if sigla in ORDEM_P:
+        return "P"
+    if sigla in ORDEM_IMEG_2:
+        return "IMEG - 2º ano"
+    if sigla in ORDEM_IMEG_5:
+        return "IMEG - 5º ano"
+    if sigla in ORDEM_IMEG_GERAL:
+        return "IMEG - Geral"
+    return "Outros"
+
+
+def ordem_indicador(sigla):
+    if sigla in ORDEM_IQEF_2:
+        return 100 + ORDEM_IQEF_2.index(sigla)
+    if sigla in ORDEM_IQEF_5:
+        return 200 + ORDEM_IQEF_5.index(sigla)
+    if sigla in ORDEM_P:
+        return 300 + ORDEM_P.index(sigla)
+    if sigla in ORDEM_IMEG_2:
+        return 400 + ORDEM_IMEG_2.index(sigla)
+    if sigla in ORDEM_IMEG_5:
+        return 500 + ORDEM_IMEG_5.index(sigla)
+    if sigla in ORDEM_IMEG_GERAL:
+        return 600 + ORDEM_IMEG_GERAL.index(sigla)
+    return 999
+
+
+ORDEM_BLOCOS = {
+    "IQEF - 2º ano": 1,
+    "IQEF - 5º ano": 2,
+    "P": 3,
+    "IMEG - 2º ano": 4,
+    "IMEG - 5º ano": 5,
+    "IMEG - Geral": 6
+}
+
+
+def ordem_bloco(bloco):
+    return ORDEM_BLOCOS.get(bloco, 9)
+
+
+def indicadores_diagnostico(colunas):
+    """Subindicadores presentes em colunas, na ordem de exibição do diagnóstico."""
+    todos = ORDEM_IQEF_2 + ORDEM_IQEF_5 + ORDEM_P + ORDEM_IMEG_2 + ORDEM_IMEG_5 + ORDEM_IMEG_GERAL
+    return [c for c in todos if c in colunas]
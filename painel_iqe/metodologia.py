@@ -0,0 +1,107 @@
+# =====================================
+# painel_iqe/metodologia.py – Fórmulas do IQE (Memória de cálculo)
+# Zetta Inteligência em Dados
+# =====================================
+#
+# Fórmulas da "Memória de cálculo IQE" (abas IQEF, IMEG e IQE) em NumPy.
+# Todas aceitam arrays com o eixo dos municípios por último e qualquer número
+# de eixos à frente (ex.: cenários × municípios); as normalizações min-max são
+# feitas entre os municípios de cada cenário, como na planilha.
+
+import numpy as np
+
+from painel_iqe.indicadores import PESOS_IQE
+
+ETAPAS = (2, 5)
+DISCIPLINAS = ("LP", "MT")
+
+# Proficiência média e desvio padrão do Paebes 2022 (aba "REF - Profic Média e DP 2022").
+# A proficiência normalizada usa a faixa média ± 3 DP dessa referência fixa.
+REFERENCIA_PROFICIENCIA = {
+    ("LP", 2): (619.27962905, 107.76006197),
+    ("MT", 2): (520.74798807, 88.02908741),
+    ("LP", 5): (204.39724781, 51.58659561),
+    ("MT", 5): (216.17343134, 45.87094673),
+}
+DESVIOS_REFERENCIA = 3
+
+PESOS_IDE = {2: {"LP": 0.6, "MT": 0.4}, 5: {"LP": 0.5, "MT": 0.5}}
+PESOS_IQEF = {2: 0.6, 5: 0.4}
+
+# ΔDESV = 1 quando o desvio atual já é pequeno (≤ 10%)
+LIMITE_DESVIO_EQUIDADE = 0.1
+
+
+def minmax(valores):
+    """(x − mín) / (máx − mín) entre os municípios (último eixo), ignorando NaN."""
+    valores = np.asarray(valores, dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        minimo = np.nanmin(valores, axis=-1, keepdims=True)
+        maximo = np.nanmax(valores, axis=-1, keepdims=True)
+        return (valores - minimo) / (maximo - minimo)
+
+
+def faixa_proficiencia(disciplina, etapa):
+    media, desvio = REFERENCIA_PROFICIENCIA[(disciplina, etapa)]
+    return media - DESVIOS_REFERENCIA * desvio, media + DESVIOS_REFERENCIA * desvio
+
+
+def proficiencia_normalizada(proficiencia, disciplina, etapa):
+    """PMN = (PM − PMmín) / (PMmáx − PMmín), com a faixa da referência de 2022."""
+    minimo, maximo = faixa_proficiencia(disciplina, etapa)
+    return (np.asarray(proficiencia, dtype=float) - minimo) / (maximo - minimo)
+
+
+def distribuicao_padroes(basico, proficiente, avancado):
+    """IDA = (0,3 × Básico + 0,7 × (Proficiente + Avançado)) / 0,7."""
+    return (0.3 * np.asarray(basico, dtype=float) + 0.7 * (np.asarray(proficiente) + np.asarray(avancado))) / 0.7
+
+
+def qualidade_disciplina(pmn, ida, tp):
+    """IQ da disciplina = 0,5 × PMN + 0,25 × IDA + 0,25 × TP."""
+    return 0.5 * np.asarray(pmn, dtype=float) + 0.25 * np.asarray(ida) + 0.25 * np.asarray(tp)
+
+
+def desempenho_etapa(iq_lp, iq_mt, etapa):
+    """IDE da etapa: média ponderada de LP e MT (2º ano 60/40, 5º ano 50/50)."""
+    pesos = PESOS_IDE[etapa]
+    return pesos["LP"] * np.asarray(iq_lp, dtype=float) + pesos["MT"] * np.asarray(iq_mt)
+
+
+def qualidade_etapa(ide, ide_anterior):
+    """(ΔIDE, ΔIDEN, IQ) da etapa: IQ = 0,5 × IDE + 0,5 × min-max(IDE − IDE anterior)."""
+    ide = np.asarray(ide, dtype=float)
+    delta = ide - np.asarray(ide_anterior, dtype=float)
+    delta_n = minmax(delta)
+    return delta, delta_n, 0.5 * ide + 0.5 * delta_n
+
+
+def iqef(iq2, iq5):
+    return PESOS_IQEF[2] * np.asarray(iq2, dtype=float) + PESOS_IQEF[5] * np.asarray(iq5)
+
+
+def equidade(proficiencia_1q, proficiencia_3q):
+    """IEQ = proficiência do 1º quartil / 3º quartil (0 quando não há dado, como no IFERROR)."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ieq = np.asarray(proficiencia_1q, dtype=float) / np.asarray(proficiencia_3q, dtype=float)
+    return np.where(np.isfinite(ieq), ieq, 0.0)
+
+
+def variacao_desvio(ieq_anterior, ieq_atual):
+    """ΔDESV: 1 se o desvio atual ≤ 10%; 0 se piorou; senão a redução relativa do desvio."""
+    desv_ant = np.abs(np.asarray(ieq_anterior, dtype=float) - 1)
+    desv_atu = np.abs(np.asarray(ieq_atual, dtype=float) - 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        reducao = (desv_ant - desv_atu) / desv_ant
+    return np.where(desv_atu <= LIMITE_DESVIO_EQUIDADE, 1.0, np.where(desv_atu > desv_ant, 0.0, reducao))
+
+
+def imeg(variacoes_desvio):
+    """(IVEC, IMEG): IVEC é a média dos quatro ΔDESV; IMEG é o IVEC em min-max."""
+    ivec = np.mean(np.stack([np.asarray(v, dtype=float) for v in variacoes_desvio]), axis=0)
+    return ivec, minmax(ivec)
+
+
+def iqe(iqef_, p, imeg_, pesos=None):
+    pesos = pesos or PESOS_IQE
+    return pesos["IQEF"] * np.asarray(iqef_, dtype=float) + pesos["P"] * np.asarray(p) + pesos["IMEG"] * np.asarray(imeg_)
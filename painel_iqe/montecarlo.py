@@ -0,0 +1,190 @@
+# =====================================
+# painel_iqe/montecarlo.py – Sensibilidade do ICMS Educacional (Monte Carlo)
+# Zetta Inteligência em Dados
+# =====================================
+#
+# Perturba os subindicadores da aba RESUMO (PMN, IDA, TP, IDE, IEQ e P) e
+# propaga cada cenário pelas fórmulas da Memória de cálculo (metodologia.py)
+# até o IQE e o ICMS de todos os municípios, com arrays cenários × municípios.
+# As normalizações min-max (ΔIDEN, IMEG) são refeitas em cada cenário, então
+# a melhora de um município também desloca os demais.
+#
+# Como no simulador de pesos, o IQE de cada cenário parte do IQE oficial:
+#     IQE_cenário = IQE_oficial + (modelo(perturbado) − modelo(sem perturbação))
+# Os cenários são processados em lotes para limitar a memória dos
+# intermediários; de cada cenário só ficam o IQE e o ganho de ICMS frente ao
+# valor oficial, em float32 (o ganho é pequeno, então a precisão é de centavos).
+
+import numpy as np
+import pandas as pd
+
+from painel_iqe import metodologia
+from painel_iqe.simulacao import repartir_icms
+
+DISTRIBUICOES = ("normal", "uniforme", "triangular", "fixa")
+
+TAMANHO_LOTE_PADRAO = 5_000
+PERCENTIS_PADRAO = (5, 50, 95)
+
+# Subindicadores que podem ser perturbados. PMN está em pontos da escala Paebes
+# (a coluna guarda a proficiência média); IEQ...Atual é a equidade da edição.
+INDICADORES_PERTURBAVEIS = (
+    [f"{sigla}{d}{e}" for e in metodologia.ETAPAS for d in metodologia.DISCIPLINAS for sigla in ("PMN", "IDA", "TP")]
+    + [f"IDE{e}" for e in metodologia.ETAPAS]
+    + [f"IEQ{d}{e}Atual" for e in metodologia.ETAPAS for d in metodologia.DISCIPLINAS]
+    + ["P"]
+)
+
+# Colunas da base usadas pelo modelo
+COLUNAS_MODELO = (
+    [f"{sigla}{d}{e}" for e in metodologia.ETAPAS for d in metodologia.DISCIPLINAS for sigla in ("PMN", "IDA", "TP")]
+    + [f"IDE{e}" for e in metodologia.ETAPAS]
+    + [f"IDE{e}Anterior" for e in metodologia.ETAPAS]
+    + [f"IEQ{d}{e}" for e in metodologia.ETAPAS for d in metodologia.DISCIPLINAS]
+    + [f"IEQ{d}{e}Atual" for e in metodologia.ETAPAS for d in metodologia.DISCIPLINAS]
+    + ["P"]
+)
+
+
+class Perturbacao:
+    """Perturbação de um subindicador.
+
+    distribuicao: "normal" (desvio = escala), "uniforme" (±escala),
+    "triangular" (±escala, moda 0) ou "fixa" (soma exatamente escala).
+    relativa=True aplica o ruído como fração do valor (valor × (1 + ruído)).
+    municipios restringe a perturbação a uma lista de municípios.
+    """
+
+    def __init__(self, indicador, distribuicao="normal", escala=0.01, municipios=None, relativa=False):
+        if indicador not in INDICADORES_PERTURBAVEIS:
+            raise ValueError(f"{indicador} não é um subindicador perturbável: {', '.join(INDICADORES_PERTURBAVEIS)}")
+        if distribuicao not in DISTRIBUICOES:
+            raise ValueError(f"Distribuição '{distribuicao}' desconhecida; use uma de {', '.join(DISTRIBUICOES)}.")
+        self.indicador = indicador
+        self.distribuicao = distribuicao
+        self.escala = float(escala)
+        self.municipios = None if municipios is None else list(municipios)
+        self.relativa = relativa
+
+    def ruido(self, rng, n_cenarios, n_municipios):
+        forma = (n_cenarios, n_municipios)
+        if self.distribuicao == "normal":
+            return rng.normal(0.0, self.escala, forma)
+        if self.distribuicao == "uniforme":
+            return rng.uniform(-self.escala, self.escala, forma)
+        if self.distribuicao == "triangular":
+            return rng.triangular(-self.escala, 0.0, self.escala, forma)
+        return np.full(forma, self.escala)
+
+
+class ModeloMonteCarlo:
+    """Propagação vetorizada subindicadores → IQE → ICMS para um ano de referência."""
+
+    def __init__(self, dados, ano):
+        self.ano = ano
+        self.simulador = dados.simuladores[ano]
+        self.municipios = self.simulador.municipios
+        self.pos_municipio = self.simulador.pos_municipio
+
+        faltando = [c for c in COLUNAS_MODELO if c not in dados.pos_indicador]
+        if faltando:
+            raise KeyError(f"A base não tem as colunas necessárias para a simulação: {', '.join(faltando)}")
+
+        fatia = dados.cubo[dados.pos_ano[ano]][[dados.pos_municipio[m] for m in self.municipios]]
+        self.entradas = {c: fatia[:, dados.pos_indicador[c]] for c in COLUNAS_MODELO}
+        self.iqe_modelo_base = self.propagar({c: v[None, :] for c, v in self.entradas.items()})[0]
+
+        self.montante = self.simulador.fundo_oficial * self.simulador.percentual_oficial
+        self.icms_oficial = self.simulador.icms_oficial
+
+    @staticmethod
+    def propagar(entradas):
+        """IQE pelas fórmulas da Memória de cálculo; entradas são arrays (cenários × municípios)."""
+        iq = {}
+        for e in metodologia.ETAPAS:
+            iq_disc = {
+                d: metodologia.qualidade_disciplina(
+                    metodologia.proficiencia_normalizada(entradas[f"PMN{d}{e}"], d, e),
+                    entradas[f"IDA{d}{e}"],
+                    entradas[f"TP{d}{e}"],
+                )
+                for d in metodologia.DISCIPLINAS
+            }
+            ide = metodologia.desempenho_etapa(iq_disc["LP"], iq_disc["MT"], e)
+            # Perturbação direta do IDE (além da que vem de PMN/IDA/TP)
+            ide = ide + entradas.get(f"_delta_IDE{e}", 0.0)
+            _, _, iq[e] = metodologia.qualidade_etapa(ide, entradas[f"IDE{e}Anterior"])
+
+        variacoes = [
+            metodologia.variacao_desvio(entradas[f"IEQ{d}{e}"], entradas[f"IEQ{d}{e}Atual"])
+            for e in metodologia.ETAPAS for d in metodologia.DISCIPLINAS
+        ]
+        _, imeg = metodologia.imeg(variacoes)
+        return metodologia.iqe(metodologia.iqef(iq[2], iq[5]), entradas["P"], imeg)
+
+    def _entradas_lote(self, perturbacoes, rng, n_cenarios):
+        n_mun = len(self.municipios)
+        entradas = {c: np.broadcast_to(v, (n_cenarios, n_mun)) for c, v in self.entradas.items()}
+        for pert in perturbacoes:
+            ruido = pert.ruido(rng, n_cenarios, n_mun)
+            if pert.municipios is not None:
+                mascara = np.zeros(n_mun, dtype=bool)
+                mascara[[self.pos_municipio[m] for m in pert.municipios if m in self.pos_municipio]] = True
+                ruido = np.where(mascara, ruido, 0.0)
+
+            if pert.indicador in ("IDE2", "IDE5"):
+                chave = f"_delta_IDE{pert.indicador[-1]}"
+                base = entradas.get(chave, 0.0)
+                if pert.relativa:
+                    ruido = ruido * self.entradas[pert.indicador]
+                entradas[chave] = base + ruido
+                continue
+
+            atual = entradas[pert.indicador]
+            novo = atual * (1 + ruido) if pert.relativa else atual + ruido
+            # Proficiência fica livre; taxas e índices ficam em [0, 1] (IEQ ≥ 0)
+            if pert.indicador.startswith("PMN"):
+                entradas[pert.indicador] = novo
+            elif pert.indicador.startswith("IEQ"):
+                entradas[pert.indicador] = np.clip(novo, 0.0, None)
+            else:
+                entradas[pert.indicador] = np.clip(novo, 0.0, 1.0)
+        return entradas
+
+    def executar(self, perturbacoes, n_cenarios=10_000, tamanho_lote=TAMANHO_LOTE_PADRAO, semente=None):
+        """Simula n_cenarios e devolve (IQE, ganho de ICMS) como arrays float32 cenários × municípios."""
+        rng = np.random.default_rng(semente)
+        n_mun = len(self.municipios)
+        iqe_oficial = self.simulador.iqe_oficial
+        iqe_out = np.empty((n_cenarios, n_mun), dtype=np.float32)
+        ganho_out = np.empty((n_cenarios, n_mun), dtype=np.float32)
+
+        for inicio in range(0, n_cenarios, tamanho_lote):
+            n = min(tamanho_lote, n_cenarios - inicio)
+            iqe_modelo = self.propagar(self._entradas_lote(perturbacoes, rng, n))
+            iqe_cen = iqe_oficial + np.nan_to_num(iqe_modelo - self.iqe_modelo_base)
+            iqe_out[inicio:inicio + n] = iqe_cen
+            ganho_out[inicio:inicio + n] = repartir_icms(iqe_cen, self.montante) - self.icms_oficial
+        return iqe_out, ganho_out
+
+    def faixas(self, perturbacoes, n_cenarios=10_000, tamanho_lote=TAMANHO_LOTE_PADRAO,
+               semente=None, percentis=PERCENTIS_PADRAO):
+        """Faixas de percentis por município para IQE, ICMS e ganho de ICMS frente ao oficial."""
+        iqe_cen, ganho = self.executar(perturbacoes, n_cenarios, tamanho_lote, semente)
+
+        out = pd.DataFrame({
+            "Município": self.municipios,
+            "IQE Oficial": self.simulador.iqe_oficial,
+            "ICMS Oficial": self.icms_oficial,
+        })
+        faixas_iqe = np.percentile(iqe_cen, percentis, axis=0)
+        faixas_ganho = np.percentile(ganho, percentis, axis=0)
+        for p, faixa in zip(percentis, faixas_iqe):
+            out[f"IQE P{p:g}"] = faixa
+        # Percentis são invariantes a translação: ICMS = oficial + ganho
+        for p, faixa in zip(percentis, faixas_ganho):
+            out[f"ICMS P{p:g}"] = self.icms_oficial + faixa
+        for p, faixa in zip(percentis, faixas_ganho):
+            out[f"Ganho P{p:g}"] = faixa
+        out["Prob. ganho"] = (ganho > 0).mean(axis=0)
+        return out
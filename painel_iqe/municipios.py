@@ -0,0 +1,121 @@
+# =====================================
+# painel_iqe/municipios.py – Dimensão de municípios pelo código IBGE
+# Zetta Inteligência em Dados
+# =====================================
+#
+# O código IBGE (Código Município) é a chave dos municípios. Os nomes, que
+# mudam de grafia entre fontes (acentos, espaços), servem só para chegar ao
+# código: a tabela de apelidos liga cada nome normalizado a um código, a
+# partir dos pares (código, nome) da planilha de ICMS (aba Plan5, que
+# prevalece) e da aba RESUMO. Os cruzamentos entre fontes são feitos pelo
+# código (inteiro).
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+COL_CODIGO = "Código Município"
+COL_NOME_NORM = "Nome normalizado"
+
+
+def normalizar_nomes(nomes):
+    """normalizar_nome (carga.py) de uma coluna inteira, pelos métodos .str do pandas."""
+    nomes = nomes if isinstance(nomes, pd.Series) else pd.Series(nomes, dtype=object)
+    texto = nomes.astype(object).where(nomes.notna(), "").astype(str).str.strip().str.upper()
+    texto = texto.str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+    return texto.str.split().str.join(" ")
+
+
+def tabela_apelidos(pares):
+    """Nome normalizado -> código, a partir de [DataFrame com as colunas código e nome].
+
+    As fontes vêm em ordem de prioridade: um nome presente em mais de uma
+    fonte fica com o código da primeira (a aba Plan5 da planilha de ICMS
+    corrige um código digitado errado numa edição da RESUMO). Um nome com
+    códigos diferentes dentro da fonte que decide é ambíguo: fica fora da
+    tabela, com aviso no log, em vez de cruzar com o município errado.
+    """
+    blocos = []
+    for prioridade, par in enumerate(pares):
+        codigo, nome = par.columns[:2]
+        bloco = pd.DataFrame({COL_CODIGO: pd.to_numeric(par[codigo], errors="coerce"), "Nome": par[nome].astype(object)})
+        bloco = bloco.dropna().drop_duplicates()
+        blocos.append(pd.DataFrame({
+            COL_NOME_NORM: normalizar_nomes(bloco["Nome"]).to_numpy(),
+            COL_CODIGO: bloco[COL_CODIGO].to_numpy(),
+            "_prioridade": prioridade,
+        }))
+    if not blocos:
+        return pd.DataFrame({COL_NOME_NORM: pd.Series(dtype=object), COL_CODIGO: pd.Series(dtype=np.int64)})
+
+    apelidos = pd.concat(blocos, ignore_index=True).drop_duplicates([COL_NOME_NORM, COL_CODIGO])
+    apelidos = apelidos[apelidos[COL_NOME_NORM] != ""]
+    decide = apelidos.groupby(COL_NOME_NORM)["_prioridade"].transform("min")
+    apelidos = apelidos.loc[apelidos["_prioridade"] == decide, [COL_NOME_NORM, COL_CODIGO]]
+
+    ambiguos = apelidos[COL_NOME_NORM].duplicated(keep=False)
+    if ambiguos.any():
+        logger.warning(
+            "Nomes ligados a mais de um código IBGE, ignorados no cruzamento: %s.",
+            ", ".join(sorted(apelidos.loc[ambiguos, COL_NOME_NORM].unique())),
+        )
+        apelidos = apelidos[~ambiguos]
+    return apelidos.astype({COL_CODIGO: np.int64}).sort_values(COL_NOME_NORM).reset_index(drop=True)
+
+
+def codigos_por_nome(nomes, apelidos):
+    """Código IBGE de cada nome pela tabela de apelidos (NaN quando não há apelido)."""
+    nomes = nomes if isinstance(nomes, pd.Series) else pd.Series(nomes, dtype=object)
+    unicos = pd.Series(nomes.astype(object).unique(), dtype=object)
+    codigo_por_unico = pd.Series(
+        normalizar_nomes(unicos).map(apelidos.set_index(COL_NOME_NORM)[COL_CODIGO]).to_numpy(dtype=float),
+        index=unicos,
+    )
+    return nomes.astype(object).map(codigo_por_unico).astype(float)
+
+
+def dimensao_municipios(base):
+    """Uma linha por código IBGE: nome da edição mais recente e primeiro/último ano com dados."""
+    linhas = base[[COL_CODIGO, "Município", "Ano-Referência"]].dropna(subset=[COL_CODIGO])
+    linhas = linhas.assign(Município=linhas["Município"].astype(str)).sort_values("Ano-Referência", kind="stable")
+    dim = linhas.groupby(COL_CODIGO, sort=True).agg(
+        **{
+            "Município": ("Município", "last"),
+            "Primeiro ano": ("Ano-Referência", "min"),
+            "Último ano": ("Ano-Referência", "max"),
+        }
+    ).reset_index()
+    dim[COL_NOME_NORM] = normalizar_nomes(dim["Município"])
+    return dim.astype({COL_CODIGO: np.int64, "Primeiro ano": int, "Último ano": int})
+
+
+def linhas_sem_par(base, icms, anos_icms):
+    """Linhas que ficaram de fora do cruzamento da base com o ICMS.
+
+    Origem, Município, Ano-Referência e Motivo: nome do ICMS sem código,
+    município da base sem código, ou município sem valor de ICMS num ano
+    que a planilha de ICMS cobre.
+    """
+    sem_codigo_icms = icms[icms[COL_CODIGO].isna()]
+    sem_codigo_base = base[base[COL_CODIGO].isna()]
+    chaves_icms = pd.MultiIndex.from_frame(icms[[COL_CODIGO, "Ano-Referência"]].dropna())
+    chaves_base = pd.MultiIndex.from_frame(base[[COL_CODIGO, "Ano-Referência"]])
+    sem_icms = base[
+        base[COL_CODIGO].notna() & base["Ano-Referência"].isin(anos_icms) & ~chaves_base.isin(chaves_icms)
+    ]
+    partes = [
+        (sem_codigo_icms, "NomeMunicipio", "ICMS", "nome sem código IBGE"),
+        (sem_codigo_base, "Município", "RESUMO", "sem código IBGE"),
+        (sem_icms, "Município", "RESUMO", "sem valor de ICMS no ano"),
+    ]
+    return pd.DataFrame(
+        [
+            {"Origem": origem, "Município": nome, "Ano-Referência": int(ano), "Motivo": motivo}
+            for linhas, col_nome, origem, motivo in partes
+            for nome, ano in zip(linhas[col_nome].astype(str), linhas["Ano-Referência"])
+        ],
+        columns=["Origem", "Município", "Ano-Referência", "Motivo"],
+    ).drop_duplicates(ignore_index=True)
@@ -0,0 +1,77 @@
+# =====================================
+# painel_iqe/normalizacao.py – Indicadores normalizados por ano (radar)
+# Zetta Inteligência em Dados
+# =====================================
+#
+# Calculadas uma vez por versão da base, sobre o cubo da BaseIndexada
+# (ano × município × indicador), em operações de array: cada normalização
+# vira um cubo do mesmo formato e um vetor de médias estaduais por ano. O
+# radar só consulta a linha do município e o vetor de médias.
+#
+#   minmax     (valor - mínimo) / (máximo - mínimo) no ano; 0,5 para todos
+#              quando o indicador não varia (ou não tem dado) no ano
+#   zscore     (valor - média) / desvio padrão populacional no ano; 0 quando
+#              o indicador não varia
+#   percentil  fração dos municípios do ano com valor igual ou menor (0 a 1;
+#              empatados ficam todos com a maior posição do empate)
+#
+# Só entram os municípios presentes na edição; um valor ausente continua
+# ausente (exceto no minmax de indicador sem variação, como no radar antigo).
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+NORMALIZACOES = {
+    "minmax": "Mínimo–máximo (0 a 1)",
+    "zscore": "Escore z",
+    "percentil": "Percentil",
+}
+NORMALIZACAO_PADRAO = "minmax"
+
+
+def _minmax(cubo, presentes):
+    minimo = np.nanmin(cubo, axis=1, keepdims=True)
+    amplitude = np.nanmax(cubo, axis=1, keepdims=True) - minimo
+    sem_variacao = ~(amplitude > 0)
+    escalado = np.where(sem_variacao, 0.5, (cubo - minimo) / np.where(sem_variacao, 1.0, amplitude))
+    return np.where(presentes[:, :, None], escalado, np.nan)
+
+
+def _zscore(cubo, presentes):
+    media = np.nanmean(cubo, axis=1, keepdims=True)
+    desvio = np.nanstd(cubo, axis=1, keepdims=True)
+    sem_variacao = ~(desvio > 0)
+    escore = np.where(sem_variacao, 0.0, (cubo - media) / np.where(sem_variacao, 1.0, desvio))
+    return np.where(np.isnan(cubo), np.nan, escore)
+
+
+def _percentil(cubo, presentes):
+    saida = np.full(cubo.shape, np.nan)
+    for i in range(cubo.shape[0]):
+        linhas = presentes[i]
+        saida[i, linhas] = pd.DataFrame(cubo[i, linhas]).rank(method="max", pct=True).to_numpy()
+    return saida
+
+
+CALCULOS = {"minmax": _minmax, "zscore": _zscore, "percentil": _percentil}
+
+
+class IndicadoresNormalizados:
+    """Cubos normalizados (ano × município × indicador) e médias estaduais (ano × indicador)."""
+
+    def __init__(self, cubo, presentes):
+        self.cubos, self.medias = {}, {}
+        with warnings.catch_warnings():
+            # Ano sem nenhum valor do indicador: o resultado fica NaN
+            warnings.simplefilter("ignore", RuntimeWarning)
+            for nome, calcular in CALCULOS.items():
+                self.cubos[nome] = calcular(cubo, presentes)
+                self.medias[nome] = np.nanmean(self.cubos[nome], axis=1)
+
+    def linha(self, normalizacao, i_ano, i_municipio, i_indicadores):
+        return self.cubos[normalizacao][i_ano, i_municipio, i_indicadores]
+
+    def media(self, normalizacao, i_ano, i_indicadores):
+        return self.medias[normalizacao][i_ano, i_indicadores]
@@ -0,0 +1,222 @@
+# =====================================
+# painel_iqe/perfil.py – Tempo de cada trecho de um rerun e perfil opcional
+# Zetta Inteligência em Dados
+# =====================================
+#
+# Instrumentação opcional: variável PAINEL_IQE_PERFIL=1 (todas as sessões) ou
+# ?perfil=1 na URL (só a sessão). Cada rerun vira uma MedicaoRerun com os
+# trechos nomeados (carga da base, corpo de cada aba, construção das figuras,
+# st.plotly_chart/st.dataframe), que o app mostra no painel de depuração da
+# barra lateral e que é gravada como uma linha JSON em perfil.jsonl.
+# Com ?perfil=cprofile ou ?perfil=pyinstrument um único rerun também passa
+# pelo profiler. Sem medição ativa, trecho() devolve um contexto nulo.
+
+import cProfile
+import datetime
+import functools
+import importlib.util
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from painel_iqe.cache import dir_cache_padrao
+
+logger = logging.getLogger(__name__)
+
+ENV_PERFIL = "PAINEL_IQE_PERFIL"
+ENV_LOG_PERFIL = "PAINEL_IQE_LOG_PERFIL"
+PARAMETRO_PERFIL = "perfil"
+FERRAMENTAS_PERFIL = ("cprofile", "pyinstrument")
+VALORES_DESLIGADO = {"", "0", "false", "nao", "não"}
+
+# Medição do rerun em curso; o Streamlit executa cada sessão na sua própria thread
+_local = threading.local()
+_NULO = nullcontext()
+_trava_log = threading.Lock()
+
+
+class MedicaoRerun:
+    def __init__(self, rotulo, **contexto):
+        self.rotulo = rotulo
+        self.contexto = contexto
+        self.data = datetime.datetime.now().isoformat(timespec="milliseconds")
+        self.inicio = time.perf_counter()
+        self.total_ms = None
+        self.trechos = []
+        self._nivel = 0
+
+    @contextmanager
+    def trecho(self, nome):
+        nivel = self._nivel
+        self._nivel += 1
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._nivel -= 1
+            self.trechos.append({
+                "nome": nome,
+                "nivel": nivel,
+                "inicio_ms": (inicio - self.inicio) * 1000,
+                "duracao_ms": (time.perf_counter() - inicio) * 1000,
+            })
+
+    def finalizar(self):
+        self.total_ms = (time.perf_counter() - self.inicio) * 1000
+        # Os trechos são fechados de dentro para fora; na ordem de início cada um vem antes dos internos
+        self.trechos.sort(key=lambda t: (t["inicio_ms"], t["nivel"]))
+
+    def linhas(self):
+        """Trechos na ordem de execução, com recuo pelo aninhamento e a fração do rerun."""
+        total = self.total_ms or (time.perf_counter() - self.inicio) * 1000
+        return [
+            {
+                "Trecho": "· " * t["nivel"] + t["nome"],
+                "ms": round(t["duracao_ms"], 1),
+                "% do rerun": round(100 * t["duracao_ms"] / total, 1) if total else 0.0,
+            }
+            for t in self.trechos
+        ]
+
+    def como_dict(self):
+        return {
+            "data": self.data,
+            "rotulo": self.rotulo,
+            **self.contexto,
+            "total_ms": self.total_ms,
+            "trechos": self.trechos,
+        }
+
+
+def medicao_atual():
+    return getattr(_local, "medicao", None)
+
+
+def trecho(nome):
+    """Contexto que mede `nome` dentro do rerun em curso (nulo se não houver medição)."""
+    medicao = medicao_atual()
+    return _NULO if medicao is None else medicao.trecho(nome)
+
+
+@contextmanager
+def medir_rerun(rotulo, **contexto):
+    """Abre a medição de um rerun na thread (ou reaproveita a que já está aberta) e a registra no fim."""
+    aberta = medicao_atual()
+    if aberta is not None:
+        yield aberta
+        return
+
+    medicao = MedicaoRerun(rotulo, **contexto)
+    _local.medicao = medicao
+    try:
+        yield medicao
+    finally:
+        _local.medicao = None
+        medicao.finalizar()
+        registrar(medicao)
+
+
+def instrumentar(nome, funcao, rerun=None):
+    """`funcao` medida como o trecho `nome`.
+
+    Com `rerun`, uma chamada fora de um rerun medido abre a própria medição
+    (é o caso do rerun de um st.fragment, que não passa pelo script inteiro).
+    """
+    @functools.wraps(funcao)
+    def medida(*args, **kwargs):
+        if rerun is not None and medicao_atual() is None:
+            with medir_rerun(rerun), trecho(nome):
+                return funcao(*args, **kwargs)
+        with trecho(nome):
+            return funcao(*args, **kwargs)
+    return medida
+
+
+def instrumentacao_ativa(valor_parametro=None):
+    """Ligada pela variável PAINEL_IQE_PERFIL ou pelo valor do parâmetro ?perfil da URL."""
+    if os.environ.get(ENV_PERFIL, "").strip().lower() not in VALORES_DESLIGADO:
+        return True
+    return valor_parametro is not None and valor_parametro.strip().lower() not in VALORES_DESLIGADO
+
+
+def ferramenta_solicitada(valor_parametro):
+    """'cprofile' ou 'pyinstrument' se o parâmetro pedir um perfil (cProfile se o pyinstrument faltar)."""
+    valor = (valor_parametro or "").strip().lower()
+    if valor not in FERRAMENTAS_PERFIL:
+        return None
+    if valor == "pyinstrument" and importlib.util.find_spec("pyinstrument") is None:
+        logger.warning("pyinstrument não está instalado; usando cProfile.")
+        return "cprofile"
+    return valor
+
+
+def arquivo_log_padrao():
+    """Arquivo do log: variável PAINEL_IQE_LOG_PERFIL ou perfil.jsonl no diretório do cache."""
+    return os.environ.get(ENV_LOG_PERFIL) or os.path.join(dir_cache_padrao(), "perfil.jsonl")
+
+
+def registrar(medicao, caminho=None):
+    """Acrescenta a medição ao log como uma linha JSON (falhas de escrita não interrompem o painel)."""
+    caminho = caminho or arquivo_log_padrao()
+    linha = json.dumps(medicao.como_dict(), ensure_ascii=False)
+    try:
+        with _trava_log:
+            os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+            with open(caminho, "a", encoding="utf-8") as f:
+                f.write(linha + "\n")
+    except OSError as exc:
+        logger.warning("Não foi possível gravar o log de desempenho em %s: %s", caminho, exc)
+
+
+class Perfilador:
+    """Perfil (cProfile ou pyinstrument) do código executado dentro do bloco with, na thread atual."""
+
+    def __init__(self, ferramenta="cprofile"):
+        if ferramenta not in FERRAMENTAS_PERFIL:
+            raise ValueError(f"Ferramenta de perfil '{ferramenta}' desconhecida; use uma de {', '.join(FERRAMENTAS_PERFIL)}.")
+        self.ferramenta = ferramenta
+        self._perfil = None
+
+    def __enter__(self):
+        if self.ferramenta == "pyinstrument":
+            from pyinstrument import Profiler
+
+            self._perfil = Profiler()
+            self._perfil.start()
+        else:
+            self._perfil = cProfile.Profile()
+            self._perfil.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self.ferramenta == "pyinstrument":
+            self._perfil.stop()
+        else:
+            self._perfil.disable()
+        return False
+
+    def texto(self, limite=40):
+        if self.ferramenta == "pyinstrument":
+            return self._perfil.output_text(unicode=True, color=False)
+        saida = io.StringIO()
+        pstats.Stats(self._perfil, stream=saida).sort_stats("cumulative").print_stats(limite)
+        return saida.getvalue()
+
+    def gravar(self, pasta=None):
+        """Grava o perfil completo (.prof para o cProfile, .html para o pyinstrument); devolve o caminho."""
+        pasta = pasta or os.path.dirname(arquivo_log_padrao())
+        os.makedirs(pasta, exist_ok=True)
+        nome = f"perfil-{datetime.datetime.now():%Y%m%d-%H%M%S-%f}"
+        if self.ferramenta == "pyinstrument":
+            caminho = os.path.join(pasta, nome + ".html")
+            with open(caminho, "w", encoding="utf-8") as f:
+                f.write(self._perfil.output_html())
+        else:
+            caminho = os.path.join(pasta, nome + ".prof")
+            self._perfil.dump_stats(caminho)
+        return caminho
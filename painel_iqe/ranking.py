@@ -0,0 +1,98 @@
+# =====================================
+# painel_iqe/ranking.py – Índice de rankings por ano × município × indicador
+# Zetta Inteligência em Dados
+# =====================================
+#
+# Calculado uma vez por carga da base: cada posição é o rank decrescente do
+# valor entre os municípios com dado naquele ano (empates recebem a mesma
+# posição, a melhor do grupo) e Total é o número de municípios com dado.
+
+import numpy as np
+import pandas as pd
+
+COLUNAS_CHAVE = ["Ano-Referência", "Município"]
+COLUNAS_NAO_INDICADORES = ["Código Município", "Ano-Referência", "Município"]
+
+
+def texto_ranking(posicao, total):
+    if posicao is None or pd.isna(posicao):
+        return "—"
+    return f"{int(posicao)}º / {int(total)}"
+
+
+def texto_variacao_ranking(posicao_atual, posicao_anterior, total):
+    """Texto "12º / 78 ↑ 3 posições" (HTML, variação colorida) frente à edição anterior."""
+    if posicao_atual and posicao_anterior:
+        delta = posicao_anterior - posicao_atual
+        if delta > 0:
+            return f"{posicao_atual}º / {total} <span style='color:green;'>↑ {delta} posições</span>"
+        if delta < 0:
+            return f"{posicao_atual}º / {total} <span style='color:red;'>↓ {abs(delta)} posições</span>"
+        return f"{posicao_atual}º / {total} (sem variação)"
+    if posicao_atual:
+        return f"{posicao_atual}º / {total}"
+    return "Sem ranking"
+
+
+class IndiceRanking:
+    def __init__(self, base, indicadores=None, anterior=None, anos_reaproveitados=()):
+        if indicadores is None:
+            indicadores = [
+                c for c in base.columns
+                if c not in COLUNAS_NAO_INDICADORES and pd.api.types.is_numeric_dtype(base[c])
+            ]
+        self.indicadores = list(indicadores)
+
+        # Os rankings de cada ano são independentes: anos sem mudança vêm do índice anterior
+        reaproveitar = []
+        if anterior is not None and anterior.indicadores == self.indicadores:
+            reaproveitar = sorted(set(anos_reaproveitados))
+            base = base[~base["Ano-Referência"].isin(reaproveitar)]
+
+        longo = base[COLUNAS_CHAVE + self.indicadores].melt(
+            id_vars=COLUNAS_CHAVE, var_name="Indicador", value_name="Valor"
+        )
+        longo["Valor"] = pd.to_numeric(longo["Valor"], errors="coerce")
+
+        grupos = longo.groupby(["Ano-Referência", "Indicador"], sort=False)["Valor"]
+        longo["Posição"] = grupos.rank(method="min", ascending=False)
+        longo["Total"] = grupos.transform("count").astype(int)
+
+        tabela = longo.set_index(["Ano-Referência", "Município", "Indicador"])[["Posição", "Total"]]
+        if reaproveitar:
+            anos_anterior = anterior.tabela.index.get_level_values("Ano-Referência")
+            tabela = pd.concat([tabela, anterior.tabela[anos_anterior.isin(reaproveitar)]])
+        self.tabela = tabela.sort_index()
+
+    def posicao(self, ano, municipio, indicador):
+        """(posição, total); posição é None quando o município não tem dado."""
+        try:
+            pos, total = self.tabela.loc[(ano, municipio, indicador)]
+        except KeyError:
+            return None, self.total(ano, indicador)
+        return (None if np.isnan(pos) else int(pos)), int(total)
+
+    def texto(self, ano, municipio, indicador):
+        return texto_ranking(*self.posicao(ano, municipio, indicador))
+
+    def total(self, ano, indicador):
+        try:
+            return int(self.tabela.xs((ano, indicador), level=["Ano-Referência", "Indicador"])["Total"].iloc[0])
+        except KeyError:
+            return 0
+
+    def municipio(self, ano, municipio):
+        """Posição, Total e texto "12º / 78" de todos os indicadores de um município."""
+        try:
+            out = self.tabela.loc[(ano, municipio)].copy()
+        except KeyError:
+            out = pd.DataFrame(columns=["Posição", "Total"], index=pd.Index([], name="Indicador"))
+        out["Ranking"] = [texto_ranking(p, t) for p, t in zip(out["Posição"], out["Total"])]
+        return out
+
+    def ano(self, ano, indicador):
+        """Posições de todos os municípios em um indicador, indexadas pelo município."""
+        try:
+            return self.tabela.xs((ano, indicador), level=["Ano-Referência", "Indicador"])
+        except KeyError:
+            return pd.DataFrame(columns=["Posição", "Total"], index=pd.Index([], name="Município"))
@@ -0,0 +1,121 @@
+# =====================================
+# painel_iqe/recarga.py – Recarga a quente das planilhas alteradas
+# Zetta Inteligência em Dados
+# =====================================
+#
+# O RepositorioDados guarda a BaseIndexada em uso e, numa thread em segundo
+# plano, observa a pasta de dados (tamanho e data de modificação das
+# planilhas). Quando uma planilha muda e fica igual por duas verificações
+# seguidas (a SEDU pode estar copiando o arquivo), a carga relê só essa
+# planilha (cache por planilha em carga.py) e a nova BaseIndexada reaproveita
+# os anos que não mudaram. A troca de versão é uma atribuição: reruns novos
+# pegam a versão nova e os que estão em andamento terminam com a que já
+# tinham. O cache de figuras tem a versão na chave, então nenhuma figura
+# antiga é servida para a versão nova.
+
+import logging
+import os
+import threading
+import time
+
+from painel_iqe.base_indexada import BaseIndexada
+from painel_iqe.carga import carregar_base, descobrir_arquivos, dir_dados_padrao
+
+logger = logging.getLogger(__name__)
+
+ENV_INTERVALO_RECARGA = "PAINEL_IQE_RECARGA_S"
+INTERVALO_PADRAO = 5.0
+
+
+def _intervalo_padrao():
+    try:
+        return float(os.environ.get(ENV_INTERVALO_RECARGA, INTERVALO_PADRAO))
+    except ValueError:
+        return INTERVALO_PADRAO
+
+
+def assinatura_pasta(dir_dados):
+    """(arquivo, tamanho, data de modificação) de cada planilha reconhecida na pasta."""
+    edicoes, arquivos_icms = descobrir_arquivos(dir_dados)
+    estado = []
+    for caminho in sorted(list(edicoes.values()) + arquivos_icms):
+        try:
+            info = os.stat(caminho)
+        except OSError:
+            continue
+        estado.append((os.path.basename(caminho), info.st_size, info.st_mtime_ns))
+    return tuple(estado)
+
+
+class RepositorioDados:
+    """Versão atual da base, trocada em segundo plano quando as planilhas mudam."""
+
+    def __init__(self, dir_dados=None, dir_cache=None, intervalo=None):
+        self.dir_dados = dir_dados or dir_dados_padrao()
+        self.dir_cache = dir_cache
+        self.intervalo = _intervalo_padrao() if intervalo is None else intervalo
+        self._trava = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+        self._pendente = None
+
+        self._assinatura = assinatura_pasta(self.dir_dados)
+        base, versao = carregar_base(self.dir_dados, self.dir_cache)
+        self._dados = BaseIndexada(base, versao)
+
+    def atual(self):
+        """BaseIndexada em uso; guarde a referência durante o rerun inteiro."""
+        return self._dados
+
+    def verificar(self):
+        """Uma verificação da pasta; devolve True se uma nova versão entrou em uso."""
+        assinatura = assinatura_pasta(self.dir_dados)
+        if assinatura == self._assinatura:
+            self._pendente = None
+            return False
+        if assinatura != self._pendente:
+            # Só recarrega quando a mudança se repete na verificação seguinte
+            self._pendente = assinatura
+            return False
+        return self.recarregar(assinatura)
+
+    def recarregar(self, assinatura=None):
+        """Relê as planilhas alteradas e troca a versão em uso; devolve True se ela mudou."""
+        assinatura = assinatura or assinatura_pasta(self.dir_dados)
+        with self._trava:
+            inicio = time.perf_counter()
+            base, versao = carregar_base(self.dir_dados, self.dir_cache)
+            anterior = self._dados
+            if versao != anterior.versao:
+                self._dados = BaseIndexada(base, versao, anterior=anterior)
+            self._assinatura, self._pendente = assinatura, None
+
+        if versao == anterior.versao:
+            return False
+        logger.info(
+            "Base recarregada em %.2f s (versão %s); anos reaproveitados da versão anterior: %s.",
+            time.perf_counter() - inicio, versao, self._dados.anos_reaproveitados or "nenhum",
+        )
+        return True
+
+    def iniciar(self):
+        """Inicia a observação da pasta (intervalo <= 0 desliga a recarga automática)."""
+        if self.intervalo > 0 and (self._thread is None or not self._thread.is_alive()):
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._observar, name="painel-iqe-recarga", daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _observar(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.verificar()
+            except Exception as exc:
+                # Planilha ainda incompleta ou inválida: segue com a versão atual e tenta de novo
+                logger.warning("Falha ao recarregar as planilhas (%s); mantendo a versão em uso.", exc)
+                logger.debug("Detalhes da falha na recarga.", exc_info=True)
@@ -0,0 +1,226 @@
+# =====================================
+# painel_iqe/relatorios.py – Relatórios HTML de todos os municípios (sem Streamlit)
+# Zetta Inteligência em Dados
+# =====================================
+#
+# Gera, para cada município, um HTML com as mesmas visões da seção IQE do
+# painel (resumo, decomposição, radar, diagnóstico, evolução e ranking) e um
+# índice com o ranking do ano atual. Usa as mesmas funções do app (graficos,
+# diagnóstico, ranking e simuladores da BaseIndexada), via visoes.py.
+#
+# A base é carregada uma vez no processo principal. Com "fork" os processos
+# do pool herdam a BaseIndexada já montada (cópia sob demanda, sem reler as
+# planilhas); onde só há "spawn" cada processo a remonta a partir do cache
+# em disco da carga.
+#
+#   python -m painel_iqe.relatorios --saida relatorios --workers 8
+
+import argparse
+import html
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import plotly
+
+from painel_iqe import graficos
+from painel_iqe.base_indexada import BaseIndexada
+from painel_iqe.carga import carregar_base, normalizar_nome
+from painel_iqe.estilos import CSS_PAINEL
+from painel_iqe.formatacao import fmt_br_money_col, fmt_br_num_col
+from painel_iqe.visoes import VISOES
+
+# Como o plotly.js entra nas páginas: embutido em cada HTML (autocontido),
+# um arquivo único na pasta de saída ou pela CDN do Plotly
+MODOS_PLOTLYJS = ("embutido", "pasta", "cdn")
+ARQUIVO_PLOTLYJS = "plotly.min.js"
+PASTA_MUNICIPIOS = "municipios"
+
+CSS_RELATORIO = """
+body { max-width: 1200px; margin: 0 auto; padding: 24px; }
+.cards { display: grid; grid-template-columns: repeat(auto-fit, minmax(220px, 1fr)); gap: 16px; margin: 16px 0; }
+table.dataframe { border-collapse: collapse; width: 100%; margin-bottom: 16px; }
+table.dataframe th { background:#3A0057; color:#fff; padding: 6px; }
+table.dataframe td { border-bottom: 1px solid #E0E0E0; padding: 4px 6px; }
+a { color:#3A0057; }
+"""
+
+RODAPE = (
+    "<p style='text-align:center;color:#5F6169;'>Painel desenvolvido por "
+    "<b>Zetta Inteligência em Dados</b></p>"
+)
+
+# BaseIndexada do processo (herdada via fork ou montada no inicializador do worker)
+_DADOS = None
+
+
+@lru_cache(maxsize=1)
+def plotlyjs():
+    """Código do plotly.js (plotly.offline só é importado quando é preciso gravá-lo)."""
+    from plotly.offline import get_plotlyjs
+
+    return get_plotlyjs()
+
+
+def nome_arquivo_municipio(municipio):
+    return normalizar_nome(municipio).lower().replace(" ", "-") + ".html"
+
+
+def _script_plotlyjs(modo, prefixo=""):
+    if modo == "embutido":
+        return f"<script type='text/javascript'>{plotlyjs()}</script>"
+    if modo == "pasta":
+        return f"<script src='{prefixo}{ARQUIVO_PLOTLYJS}'></script>"
+    return f"<script src='https://cdn.plot.ly/plotly-{plotly.__version__.split('+')[0]}.min.js'></script>"
+
+
+def _pagina(titulo, corpo, script_plotly=""):
+    return (
+        "<!DOCTYPE html>\n<html lang='pt-BR'>\n<head>\n<meta charset='utf-8'>\n"
+        f"<title>{html.escape(titulo)}</title>\n"
+        f"<style>{CSS_PAINEL}{CSS_RELATORIO}</style>\n{script_plotly}\n</head>\n"
+        f"<body>\n{corpo}\n{RODAPE}\n</body>\n</html>\n"
+    )
+
+
+def _figura(fig):
+    return fig.to_html(full_html=False, include_plotlyjs=False, config={"responsive": True})
+
+
+def html_blocos(blocos):
+    return "".join(b if isinstance(b, str) else _figura(b) for b in blocos if b is not None)
+
+
+def secoes_municipio(dados, municipio, ano=None):
+    """[(título, HTML)] com as visões da seção IQE do painel para o município."""
+    ano = ano if ano is not None else dados.ano_atual
+    return [(titulo, html_blocos(visao(dados, municipio, ano))) for titulo, visao, _ in VISOES.values()]
+
+
+def relatorio_municipio(dados, municipio, modo_plotlyjs="embutido"):
+    corpo = f"<p><a href='../index.html'>← Todos os municípios</a></p><h1>Painel IQE – {html.escape(municipio)}</h1>"
+    corpo += "".join(f"<h2>{titulo}</h2>\n{conteudo}\n" for titulo, conteudo in secoes_municipio(dados, municipio))
+    return _pagina(f"Painel IQE – {municipio}", corpo, _script_plotlyjs(modo_plotlyjs, "../"))
+
+
+def indice(dados):
+    """Página inicial: ranking do ano atual com links para os relatórios."""
+    ano = dados.ano_atual
+    df = graficos.tabela_ranking_iqe(dados, ano)
+    sem_iqe = sorted(set(dados.municipios) - set(df["Município"]))
+
+    linhas = [
+        (str(r), m, iqe, icms)
+        for r, m, iqe, icms in zip(
+            df["Ranking"], df["Município"], fmt_br_num_col(df["IQE"], 3), fmt_br_money_col(df[graficos.COL_ICMS], 2)
+        )
+    ] + [("—", m, "—", "—") for m in sem_iqe]
+
+    corpo_tabela = "".join(
+        f"<tr><td>{r}</td><td><a href='{PASTA_MUNICIPIOS}/{nome_arquivo_municipio(m)}'>{html.escape(m)}</a></td>"
+        f"<td>{iqe}</td><td>{icms}</td></tr>"
+        for r, m, iqe, icms in linhas
+    )
+    corpo = (
+        f"<h1>📊 Painel IQE – Relatórios por município</h1><h3>Ranking pelo IQE – referência {int(ano)}</h3>"
+        "<table class='dataframe'><thead><tr><th>Ranking</th><th>Município</th><th>IQE</th>"
+        f"<th>ICMS Educacional</th></tr></thead><tbody>{corpo_tabela}</tbody></table>"
+    )
+    return _pagina("Painel IQE – Relatórios por município", corpo)
+
+
+def dados_processo(dir_dados=None, dir_cache=None):
+    """BaseIndexada do processo, carregada na primeira chamada (também usada como inicializador do pool)."""
+    global _DADOS
+    if _DADOS is None:
+        base, versao = carregar_base(dir_dados, dir_cache)
+        _DADOS = BaseIndexada(base, versao)
+    return _DADOS
+
+
+def _gerar(municipio, pasta, modo_plotlyjs):
+    inicio = time.perf_counter()
+    caminho = os.path.join(pasta, nome_arquivo_municipio(municipio))
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write(relatorio_municipio(_DADOS, municipio, modo_plotlyjs))
+    return municipio, caminho, time.perf_counter() - inicio
+
+
+def contexto_pool():
+    # fork: os workers herdam a base já carregada sem serializá-la
+    metodos = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("fork" if "fork" in metodos else "spawn")
+
+
+def gerar_relatorios(saida, municipios=None, workers=None, modo_plotlyjs="embutido", dir_dados=None, dir_cache=None):
+    """Gera os relatórios e o índice em `saida`; devolve as estatísticas da execução."""
+    if modo_plotlyjs not in MODOS_PLOTLYJS:
+        raise ValueError(f"Modo do plotly.js '{modo_plotlyjs}' desconhecido; use um de {', '.join(MODOS_PLOTLYJS)}.")
+
+    inicio = time.perf_counter()
+    dados = dados_processo(dir_dados, dir_cache)
+    tempo_carga = time.perf_counter() - inicio
+
+    municipios = list(municipios) if municipios else list(dados.municipios)
+    desconhecidos = sorted(set(municipios) - set(dados.municipios))
+    if desconhecidos:
+        raise KeyError(f"Municípios fora da base: {', '.join(desconhecidos)}")
+
+    pasta = os.path.join(saida, PASTA_MUNICIPIOS)
+    os.makedirs(pasta, exist_ok=True)
+    if modo_plotlyjs == "pasta":
+        with open(os.path.join(saida, ARQUIVO_PLOTLYJS), "w", encoding="utf-8") as f:
+            f.write(plotlyjs())
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(municipios)))
+    inicio = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=contexto_pool(),
+            initializer=dados_processo, initargs=(dir_dados, dir_cache),
+        ) as pool:
+            resultados = list(pool.map(
+                _gerar, municipios, [pasta] * len(municipios), [modo_plotlyjs] * len(municipios),
+                chunksize=max(1, len(municipios) // (4 * workers)),
+            ))
+    else:
+        resultados = [_gerar(m, pasta, modo_plotlyjs) for m in municipios]
+
+    with open(os.path.join(saida, "index.html"), "w", encoding="utf-8") as f:
+        f.write(indice(dados))
+    tempo_geracao = time.perf_counter() - inicio
+
+    return {
+        "relatorios": len(resultados),
+        "workers": workers,
+        "carga_s": tempo_carga,
+        "geracao_s": tempo_geracao,
+        "relatorios_por_s": len(resultados) / tempo_geracao if tempo_geracao > 0 else float("inf"),
+        "maior_relatorio_s": max((t for _, _, t in resultados), default=0.0),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera os relatórios HTML do IQE para todos os municípios.")
+    parser.add_argument("--saida", default="relatorios", help="pasta de saída (padrão: relatorios/)")
+    parser.add_argument("--workers", type=int, default=None, help="processos (padrão: número de CPUs)")
+    parser.add_argument("--municipio", action="append", help="gera só este município (pode repetir)")
+    parser.add_argument("--plotlyjs", choices=MODOS_PLOTLYJS, default="embutido",
+                        help="embutido: HTML autocontido; pasta: um plotly.min.js na saída; cdn: CDN do Plotly")
+    parser.add_argument("--dir-dados", default=None, help="pasta com as planilhas (padrão: data/)")
+    args = parser.parse_args(argv)
+
+    est = gerar_relatorios(args.saida, args.municipio, args.workers, args.plotlyjs, args.dir_dados)
+    print(
+        f"{est['relatorios']} relatórios em {est['geracao_s']:.2f} s com {est['workers']} processo(s) "
+        f"({est['relatorios_por_s']:.1f} relatórios/s; carga da base {est['carga_s']:.2f} s) -> "
+        f"{os.path.join(args.saida, 'index.html')}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
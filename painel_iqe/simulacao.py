@@ -0,0 +1,123 @@
+# =====================================
+# painel_iqe/simulacao.py – Simulação do ICMS Educacional ("e se?")
+# Zetta Inteligência em Dados
+# =====================================
+#
+# O ICMS Educacional de cada município é a fatia do IQE no fundo do ICMS
+# repartida em proporção ao IQE:
+#     ICMS_m = fundo × percentual_IQE × IQE_m / Σ IQE
+# O IQE simulado parte do IQE oficial e soma a diferença de pesos aplicada
+# aos componentes (IQEF, P, IMEG):
+#     IQE_sim = IQE_oficial + Σ_k (peso_k − peso_oficial_k) × componente_k
+# Assim o cenário com os pesos oficiais reproduz exatamente o ICMS publicado,
+# mesmo nas edições em que a planilha aplica ajustes que a combinação linear
+# dos componentes da aba RESUMO não captura. Componentes sem dado contam como 0.
+
+import numpy as np
+import pandas as pd
+
+from painel_iqe.indicadores import PESOS_IQE
+
+COL_ICMS = "ICMS_Educacional_Estimado"
+
+# Percentual do ICMS distribuído pelo IQE, por ano de repasse
+PERCENTUAL_IQE_REPASSE = {2025: 0.10, 2026: 0.12, 2027: 0.125, 2028: 0.125}
+
+COLUNAS_SIMULACAO = [
+    "Município", "IQE Oficial", "IQE Simulado",
+    "ICMS Oficial", "ICMS Simulado", "Diferença", "Diferença %",
+]
+
+
+def percentual_iqe(ano_referencia):
+    """Percentual do IQE no repasse calculado com o IQE do ano de referência (repasse = ano + 2)."""
+    ano_repasse = ano_referencia + 2
+    if ano_repasse in PERCENTUAL_IQE_REPASSE:
+        return PERCENTUAL_IQE_REPASSE[ano_repasse]
+    anos = sorted(PERCENTUAL_IQE_REPASSE)
+    return PERCENTUAL_IQE_REPASSE[anos[0] if ano_repasse < anos[0] else anos[-1]]
+
+
+def repartir_icms(iqe, montante):
+    """ICMS de cada município: montante × IQE / ΣIQE no último eixo (IQE negativo ou ausente conta 0)."""
+    iqe = np.clip(np.asarray(iqe, dtype=float), 0.0, None)
+    iqe = np.where(np.isnan(iqe), 0.0, iqe)
+    montante = np.asarray(montante, dtype=float)
+    if montante.ndim == 1 and iqe.ndim == 2:
+        montante = montante[:, None]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return montante * iqe / iqe.sum(axis=-1, keepdims=True)
+
+
+def normalizar_pesos(pesos):
+    """Vetor de pesos na ordem de PESOS_IQE, somando 1 (em cada linha, se for uma matriz)."""
+    if isinstance(pesos, dict):
+        pesos = [pesos.get(c, 0.0) for c in PESOS_IQE]
+    pesos = np.asarray(pesos, dtype=float)
+    soma = pesos.sum(axis=-1, keepdims=True)
+    if np.any(soma <= 0):
+        raise ValueError("A soma dos pesos dos componentes deve ser positiva.")
+    return pesos / soma
+
+
+class SimuladorICMS:
+    """Simulação vetorizada de um ano de referência para todos os municípios."""
+
+    def __init__(self, dados, ano):
+        self.ano = ano
+        presentes = [m for m in dados.municipios if dados.tem_municipio(ano, m)]
+        idx_mun = [dados.pos_municipio[m] for m in presentes]
+        fatia = dados.cubo[dados.pos_ano[ano]][idx_mun]
+
+        def coluna(indicador):
+            if indicador not in dados.pos_indicador:
+                return np.full(len(presentes), np.nan)
+            return fatia[:, dados.pos_indicador[indicador]]
+
+        self.municipios = np.array(presentes, dtype=object)
+        self.pos_municipio = {m: i for i, m in enumerate(presentes)}
+        self.componentes = np.nan_to_num(np.column_stack([coluna(c) for c in PESOS_IQE]))
+        self.pesos_oficiais = normalizar_pesos(PESOS_IQE)
+        self.iqe_oficial = coluna("IQE")
+        self.icms_oficial = coluna(COL_ICMS)
+
+        self.percentual_oficial = percentual_iqe(ano)
+        # Fundo total implícito nos valores publicados (Σ ICMS / percentual)
+        total_icms = np.nansum(self.icms_oficial)
+        self.fundo_oficial = total_icms / self.percentual_oficial if total_icms > 0 else np.nan
+
+    @property
+    def tem_icms(self):
+        return np.isfinite(self.fundo_oficial)
+
+    def iqe(self, pesos=None):
+        """IQE simulado: vetor (municípios) ou matriz (cenários × municípios) para uma matriz de pesos."""
+        if pesos is None:
+            return self.iqe_oficial.copy()
+        delta = normalizar_pesos(pesos) - self.pesos_oficiais
+        return self.iqe_oficial + delta @ self.componentes.T
+
+    def icms(self, pesos=None, percentual=None, fundo=None):
+        """ICMS simulado com a mesma forma de iqe(); percentual e fundo podem ser escalares ou vetores por cenário."""
+        percentual = self.percentual_oficial if percentual is None else np.asarray(percentual, dtype=float)
+        fundo = self.fundo_oficial if fundo is None else np.asarray(fundo, dtype=float)
+        return repartir_icms(self.iqe(pesos), fundo * percentual)
+
+    def simular(self, pesos=None, percentual=None, fundo=None):
+        """Tabela de um cenário: IQE e ICMS oficiais × simulados de todos os municípios."""
+        iqe_sim = self.iqe(pesos)
+        icms_sim = self.icms(pesos, percentual, fundo)
+        diferenca = icms_sim - self.icms_oficial
+        # Menos de meio centavo é ruído de ponto flutuante (cenário oficial = diferença zero)
+        diferenca = np.where(np.abs(diferenca) < 0.005, 0.0, diferenca)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            diferenca_pct = 100 * diferenca / self.icms_oficial
+        return pd.DataFrame({
+            "Município": self.municipios,
+            "IQE Oficial": self.iqe_oficial,
+            "IQE Simulado": iqe_sim,
+            "ICMS Oficial": self.icms_oficial,
+            "ICMS Simulado": icms_sim,
+            "Diferença": diferenca,
+            "Diferença %": diferenca_pct,
+        }, columns=COLUNAS_SIMULACAO)
@@ -0,0 +1,136 @@
+# =====================================
+# painel_iqe/visoes.py – Conteúdo das visões da seção IQE fora do Streamlit
+# Zetta Inteligência em Dados
+# =====================================
+#
+# Cada visão devolve uma lista de blocos: HTML já formatado (str) ou figuras
+# Plotly, na ordem em que aparecem no painel. Os relatórios HTML
+# (relatorios.py) e a exportação estática (exportacao.py) só decidem como
+# gravar esses blocos. As figuras passam pelo cache_figuras, com as mesmas
+# chaves do app.
+
+import html
+
+from painel_iqe import graficos
+from painel_iqe.cache_figuras import figura_em_cache
+from painel_iqe.diagnostico import BLOCOS_DIAGNOSTICO, formatar_tabela_diagnostico
+from painel_iqe.formatacao import fmt_br_money, fmt_br_money_col, fmt_br_num, fmt_br_num_col
+from painel_iqe.normalizacao import NORMALIZACAO_PADRAO
+from painel_iqe.ranking import texto_variacao_ranking
+
+
+def card(classe, titulo, valor, tag="h2"):
+    return f"<div class='{classe}'><h4>{titulo}</h4><{tag}>{valor}</{tag}></div>"
+
+
+def tabela(df):
+    return df.to_html(index=False, border=0, classes="dataframe", na_rep="—")
+
+
+def ano_anterior_de(dados, ano):
+    """Edição anterior a `ano` na base (a própria, se for a primeira)."""
+    anteriores = [a for a in dados.anos if a < ano]
+    return anteriores[-1] if anteriores else ano
+
+
+def visao_resumo(dados, municipio, ano):
+    ano_ant = ano_anterior_de(dados, ano)
+    rank_atual, total_mun = dados.ranking.posicao(ano, municipio, "IQE")
+    rank_ant, _ = dados.ranking.posicao(ano_ant, municipio, "IQE")
+    cards = "".join([
+        card("big-card", f"IQE {int(ano)}", fmt_br_num(dados.valor("IQE", municipio, ano), 3), "h1"),
+        card("small-card", f"IQE {int(ano_ant)}", fmt_br_num(dados.valor("IQE", municipio, ano_ant), 3)),
+        card("white-card", f"Média Estadual ({int(ano)})", fmt_br_num(dados.estatisticas("IQE", ano)["media"], 3)),
+        card("white-card", f"Ranking ({int(ano)})", texto_variacao_ranking(rank_atual, rank_ant, total_mun)),
+    ])
+    blocos = [f"<div class='cards'>{cards}</div>", "<h3>💰 ICMS Educacional – posição entre mínimo e máximo</h3>"]
+    for ano_faixa in dados.anos:
+        blocos.append(figura_em_cache(
+            "faixa_icms", dados, municipio, ano_faixa,
+            construir=lambda: graficos.grafico_faixa_icms(dados, municipio, ano_faixa)
+        ))
+    return blocos
+
+
+def visao_decomposicao(dados, municipio, ano):
+    blocos = [figura_em_cache(
+        "decomposicao", dados, municipio,
+        construir=lambda: graficos.grafico_decomposicao(dados, municipio)
+    )]
+    simulador = dados.simuladores[ano]
+    if simulador.tem_icms and municipio in simulador.pos_municipio:
+        icms = simulador.icms_oficial[simulador.pos_municipio[municipio]]
+        blocos.append(f"<div class='cards'>{card('white-card', f'ICMS Educacional ({int(ano)})', fmt_br_money(icms, 2))}</div>")
+    return blocos
+
+
+def visao_iqef_imeg(dados, municipio, ano):
+    blocos = []
+    for modo in graficos.MODOS_RADAR:
+        fig = figura_em_cache(
+            "radar", dados, municipio, ano, modo, NORMALIZACAO_PADRAO,
+            construir=lambda: graficos.grafico_radar(dados, municipio, ano, modo)
+        )
+        if fig is not None:
+            blocos += [f"<h3>{html.escape(modo)}</h3>", fig]
+    return blocos or ["<p>Não encontrei indicadores suficientes para gerar o radar.</p>"]
+
+
+def visao_diagnostico(dados, municipio, ano):
+    df_diag = dados.diagnostico.municipio(ano, municipio)
+    if df_diag.empty:
+        return ["<p>Não há dados suficientes para gerar o diagnóstico dos subindicadores.</p>"]
+    blocos = [
+        f"<h3>{titulo}</h3>{tabela(formatar_tabela_diagnostico(df_diag[df_diag['Bloco'] == bloco]))}"
+        for titulo, bloco in BLOCOS_DIAGNOSTICO
+        if (df_diag["Bloco"] == bloco).any()
+    ]
+    blocos.append(figura_em_cache(
+        "ranking_subindicadores", dados, municipio, ano,
+        construir=lambda: graficos.grafico_ranking_subindicadores(dados, municipio, ano)
+    ))
+    return blocos
+
+
+def visao_evolucao(dados, municipio, ano=None):
+    return [
+        figura_em_cache(
+            "evolucao_iqe", dados, municipio,
+            construir=lambda: graficos.grafico_evolucao_iqe(dados, municipio)
+        ),
+        figura_em_cache(
+            "desv", dados, municipio,
+            construir=lambda: graficos.grafico_desv(dados, municipio)
+        ),
+    ]
+
+
+def visao_ranking(dados, municipio, ano):
+    # A figura base do ano é comum a todos os municípios; só o destaque muda
+    fig_base = figura_em_cache(
+        "ranking_iqe_base", dados, ano,
+        construir=lambda: graficos.grafico_ranking_iqe_base(dados, ano)
+    )
+    fig = figura_em_cache(
+        "ranking_iqe", dados, municipio, ano,
+        construir=lambda: graficos.destacar_ranking_iqe(fig_base, dados, municipio, ano)
+    )
+    df = graficos.tabela_ranking_iqe(dados, ano)
+    df["IQE"] = fmt_br_num_col(df["IQE"], 3)
+    df[graficos.COL_ICMS] = fmt_br_money_col(df[graficos.COL_ICMS], 2)
+    return [fig, "<h3>📋 Tabela completa</h3>", tabela(df[["Ranking", "Município", "IQE", graficos.COL_ICMS]])]
+
+
+# chave -> (título, função(dados, município, ano), depende do ano de referência)
+VISOES = {
+    "resumo": ("📊 Resumo Geral", visao_resumo, True),
+    "decomposicao": ("⚙️ Decomposição IQE", visao_decomposicao, True),
+    "iqef_imeg": ("📘 IQEF e IMEG Detalhados", visao_iqef_imeg, True),
+    "diagnostico": ("🩺 Diagnóstico dos Subindicadores", visao_diagnostico, True),
+    "evolucao": ("📈 Evolução & Equidade", visao_evolucao, False),
+    "ranking": ("🏁 Ranking IQE", visao_ranking, True),
+}
+
+# Visões que só leem dados do próprio ano de referência (radar, diagnóstico e
+# ranking normalizam entre os municípios do ano); as demais leem todas as edições.
+VISOES_DE_UM_ANO = {"iqef_imeg", "diagnostico", "ranking"}
@@ -0,0 +1,13 @@
+# =====================================
+# tests/conftest.py – Raiz do repositório no sys.path
+# Zetta Inteligência em Dados
+# =====================================
+#
+#   python -m pytest -q tests
+
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
@@ -0,0 +1,25 @@
+# =====================================
+# tests/test_esquema.py – Layout da aba RESUMO por edição
+# Zetta Inteligência em Dados
+# =====================================
+
+from painel_iqe.esquema import (
+    DESLOCAMENTOS_RESUMO,
+    ESQUEMAS_RESUMO,
+    deslocamentos_resumo,
+    esquema_resumo,
+)
+
+
+def test_edicao_mapeada_usa_o_proprio_layout():
+    for edicao in ESQUEMAS_RESUMO:
+        assert esquema_resumo(edicao) is ESQUEMAS_RESUMO[edicao]
+        assert deslocamentos_resumo(edicao) == DESLOCAMENTOS_RESUMO.get(edicao, [])
+
+
+def test_edicao_nao_mapeada_usa_esquema_e_deslocamentos_da_mais_recente():
+    recente = max(ESQUEMAS_RESUMO)
+    futura = recente + 1
+    assert esquema_resumo(futura) is ESQUEMAS_RESUMO[recente]
+    assert deslocamentos_resumo(futura) == deslocamentos_resumo(recente)
+    assert deslocamentos_resumo(futura) == [(79, 116, -1)]
@@ -0,0 +1,59 @@
+# =====================================
+# tests/test_formatacao.py – Formatação de colunas igual à de um valor
+# Zetta Inteligência em Dados
+# =====================================
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from painel_iqe.formatacao import (
+    LIMITE_VETORIAL,
+    fmt_br_money,
+    fmt_br_money_col,
+    fmt_br_num,
+    fmt_br_num_col,
+    fmt_br_pct,
+    fmt_br_pct_col,
+)
+
+VALORES = [
+    0.0, -0.0, 0.004, -0.004, 0.005, 0.125, -0.125, 2.675, 1.005, 0.5, 1.5, -2.5,
+    7, -7, 999.995, 999.994, 1234.5, -1234567.891, 12345678.9, 1e14 + 0.25,
+    LIMITE_VETORIAL, 3.5e15, -2e18, 1e300,
+    np.nan, np.inf, -np.inf, None,
+]
+
+
+def _escalar(fmt, v, nd):
+    # Sem valor, a versão de coluna devolve só "—" (sem o "R$" ou o "%")
+    return "—" if v is None or not np.isfinite(v) else fmt(v, nd)
+
+
+@pytest.mark.parametrize("nd", [0, 1, 2, 3])
+@pytest.mark.parametrize(
+    "fmt, fmt_col",
+    [(fmt_br_num, fmt_br_num_col), (fmt_br_money, fmt_br_money_col), (fmt_br_pct, fmt_br_pct_col)],
+)
+def test_coluna_igual_a_um_valor_por_vez(fmt, fmt_col, nd):
+    esperado = [_escalar(fmt, v, nd) for v in VALORES]
+    assert list(fmt_col(VALORES, nd)) == esperado
+
+
+def test_valores_aleatorios():
+    rng = np.random.default_rng(0)
+    valores = np.concatenate([
+        rng.normal(0, 1, 2000),
+        rng.uniform(-1e14, 1e14, 2000),
+        np.round(rng.uniform(-1e4, 1e4, 2000), 3),
+    ])
+    for nd in (0, 2, 3):
+        assert list(fmt_br_num_col(valores, nd)) == [fmt_br_num(v, nd) for v in valores]
+
+
+def test_series_mantem_indice_e_nome():
+    serie = pd.Series([1.5, np.nan, -1234.0], index=[10, 20, 30], name="IQE")
+    saida = fmt_br_money_col(serie)
+    assert saida.index.tolist() == [10, 20, 30]
+    assert saida.name == "IQE"
+    assert saida.tolist() == ["R$ 1,50", "—", "R$ -1.234,00"]
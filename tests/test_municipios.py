@@ -0,0 +1,68 @@
+# =====================================
+# tests/test_municipios.py – Tabela de apelidos e cruzamento com o ICMS
+# Zetta Inteligência em Dados
+# =====================================
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from painel_iqe.carga import _cruzar_icms
+from painel_iqe.municipios import COL_CODIGO, COL_NOME_NORM, codigos_por_nome, tabela_apelidos
+
+FUNDAO, LINDENBERG, GUACUI, SERRA = 3202207, 3202256, 3202405, 3205002
+
+
+def _pares(linhas):
+    return pd.DataFrame(linhas, columns=["Código IBGE", "Município"])
+
+
+def test_grafias_diferentes_chegam_ao_mesmo_codigo():
+    apelidos = tabela_apelidos([_pares([(FUNDAO, "FUNDÃO"), (LINDENBERG, "GOVERNADOR LINDENBERG")])])
+    nomes = pd.Series(["Fundão ", "FUNDAO", "Governador  Lindenberg", "Fundão"])
+    assert codigos_por_nome(nomes, apelidos).tolist() == [FUNDAO, FUNDAO, LINDENBERG, FUNDAO]
+    assert np.isnan(codigos_por_nome(pd.Series(["VITÓRIA"]), apelidos).iloc[0])
+
+
+def test_primeira_fonte_prevalece_sobre_codigo_errado():
+    plan5 = _pares([(GUACUI, "GUAÇUÍ")])
+    resumo = _pares([(GUACUI + 1, "GUACUI"), (FUNDAO, "FUNDÃO")])
+    apelidos = tabela_apelidos([plan5, resumo]).set_index(COL_NOME_NORM)[COL_CODIGO]
+    assert apelidos.to_dict() == {"FUNDAO": FUNDAO, "GUACUI": GUACUI}
+    assert apelidos.dtype == np.int64
+
+
+def test_nome_ambiguo_fica_fora_e_vai_para_o_log(caplog):
+    resumo = _pares([(SERRA, "SERRA"), (SERRA + 1, "Serra"), (FUNDAO, "FUNDÃO")])
+    with caplog.at_level(logging.WARNING, logger="painel_iqe.municipios"):
+        apelidos = tabela_apelidos([resumo])
+    assert apelidos[COL_NOME_NORM].tolist() == ["FUNDAO"]
+    assert "SERRA" in caplog.text
+    assert np.isnan(codigos_por_nome(pd.Series(["SERRA"]), apelidos).iloc[0])
+
+
+def test_cruzamento_corrige_codigos_e_nao_cruza_nome_ambiguo(caplog):
+    base = pd.DataFrame({
+        COL_CODIGO: [FUNDAO, 9999999, LINDENBERG, SERRA, SERRA + 1],
+        "Município": ["FUNDÃO", "GUAÇUÍ", "Governador Lindenberg", "SERRA", "SERRA"],
+        "Ano-Referência": [2024, 2024, 2024, 2023, 2024],
+    })
+    icms = pd.DataFrame({
+        # Plan5 só conhece Guaçuí; Fundão e Lindenberg vêm sem código, com outra grafia
+        COL_CODIGO: [np.nan, GUACUI, np.nan, np.nan],
+        "NomeMunicipio": ["FUNDAO", "GUACUI", "GOVERNADOR  LINDENBERG ", "SERRA"],
+        "Ano-Referência": 2024,
+        "Tipo": "DISTRIBUIDO",
+        "ICMS_Educacional_Estimado": [1.0, 2.0, 3.0, 4.0],
+    })
+    with caplog.at_level(logging.WARNING):
+        cruzada = _cruzar_icms(base, icms)
+
+    assert cruzada[COL_CODIGO].iloc[:3].tolist() == [FUNDAO, GUACUI, LINDENBERG]
+    assert cruzada["ICMS_Educacional_Estimado"].iloc[:3].tolist() == [1.0, 2.0, 3.0]
+    assert "9999999 -> 3202405" in caplog.text
+    # SERRA tem dois códigos na RESUMO: nenhum dos dois recebe o ICMS do nome
+    assert cruzada["ICMS_Educacional_Estimado"].iloc[3:].isna().all()
+    assert "Nomes ligados a mais de um código IBGE" in caplog.text
+    assert "sem par no cruzamento" in caplog.text
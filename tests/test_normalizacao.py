@@ -0,0 +1,35 @@
+# =====================================
+# tests/test_normalizacao.py – Normalizações do radar
+# Zetta Inteligência em Dados
+# =====================================
+
+import numpy as np
+
+from painel_iqe.normalizacao import IndicadoresNormalizados
+
+
+def _normalizados(colunas, presentes=None):
+    """Um ano, um município por linha, um indicador por coluna."""
+    cubo = np.array(colunas, dtype=float).T[None, :, :]
+    presentes = np.ones(cubo.shape[:2], dtype=bool) if presentes is None else np.array([presentes])
+    return IndicadoresNormalizados(cubo, presentes)
+
+
+def test_percentil_e_a_fracao_com_valor_igual_ou_menor():
+    cubos = _normalizados([[1, 1, 2, 3], [5, 5, 5, 5]]).cubos["percentil"][0]
+    np.testing.assert_allclose(cubos[:, 0], [0.5, 0.5, 0.75, 1.0])
+    np.testing.assert_allclose(cubos[:, 1], [1.0, 1.0, 1.0, 1.0])
+
+
+def test_percentil_ignora_ausentes_e_municipios_fora_da_edicao():
+    normalizados = _normalizados([[1, np.nan, 2, 2, 0]], presentes=[True, True, True, True, False])
+    np.testing.assert_allclose(normalizados.cubos["percentil"][0, :, 0], [1 / 3, np.nan, 1.0, 1.0, np.nan])
+
+
+def test_minmax_e_zscore():
+    normalizados = _normalizados([[1, 1, 2, 3], [4, 4, 4, 4]])
+    np.testing.assert_allclose(normalizados.cubos["minmax"][0], [[0, 0.5], [0, 0.5], [0.5, 0.5], [1, 0.5]])
+    escore = normalizados.cubos["zscore"][0]
+    np.testing.assert_allclose(escore[:, 0], (np.array([1, 1, 2, 3]) - 1.75) / np.std([1, 1, 2, 3]))
+    np.testing.assert_allclose(escore[:, 1], 0.0)
+    np.testing.assert_allclose(normalizados.media("minmax", 0, [0, 1]), [0.375, 0.5])